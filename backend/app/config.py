@@ -28,9 +28,25 @@ class Settings(BaseSettings):
 
     # Keygen settings
     KEYGEN_ACCOUNT_ID: str = Field(default="", env="KEYGEN_ACCOUNT_ID")
+    KEYGEN_API_URL: str = Field(default="https://api.keygen.sh/v1", env="KEYGEN_API_URL")
+    KEYGEN_TIMEOUT: float = Field(default=5.0, env="KEYGEN_TIMEOUT")
+    LICENSE_CACHE_TTL: float = Field(default=300.0, env="LICENSE_CACHE_TTL")
+    LICENSE_NEGATIVE_CACHE_TTL: float = Field(default=30.0, env="LICENSE_NEGATIVE_CACHE_TTL")
+    LICENSE_CACHE_SIZE: int = Field(default=10000, env="LICENSE_CACHE_SIZE")
 
     # Splitter service settings
     SPLITTER_URL: str = Field(default="http://localhost:9000", env="SPLITTER_URL")
+    SPLITTER_HTTP_MAX_CONNECTIONS: int = Field(default=100, env="SPLITTER_HTTP_MAX_CONNECTIONS")
+    SPLITTER_HTTP_MAX_KEEPALIVE: int = Field(default=20, env="SPLITTER_HTTP_MAX_KEEPALIVE")
+    SPLITTER_HTTP_KEEPALIVE_EXPIRY: float = Field(default=30.0, env="SPLITTER_HTTP_KEEPALIVE_EXPIRY")
+    SPLITTER_HTTP_TIMEOUT: float = Field(default=30.0, env="SPLITTER_HTTP_TIMEOUT")
+    SPLITTER_HTTP_CONNECT_TIMEOUT: float = Field(default=5.0, env="SPLITTER_HTTP_CONNECT_TIMEOUT")
+    SPLITTER_HTTP_RETRIES: int = Field(default=2, env="SPLITTER_HTTP_RETRIES")
+    SPLITTER_HTTP_RETRY_BACKOFF: float = Field(default=0.5, env="SPLITTER_HTTP_RETRY_BACKOFF")
+
+    # Job event stream settings
+    JOB_EVENTS_KEEPALIVE_SECONDS: float = Field(default=15.0, env="JOB_EVENTS_KEEPALIVE_SECONDS")
+    JOB_EVENTS_POLL_INTERVAL: float = Field(default=2.0, env="JOB_EVENTS_POLL_INTERVAL")
 
     # MinIO settings
     MINIO_ENDPOINT: str = Field(default="localhost:9000", env="MINIO_ENDPOINT")
@@ -38,6 +54,17 @@ class Settings(BaseSettings):
     MINIO_SECRET_KEY: str = Field(default="minioadmin", env="MINIO_SECRET_KEY")
     MINIO_BUCKET_NAME: str = Field(default="stems", env="MINIO_BUCKET_NAME")
     MINIO_SECURE: bool = Field(default=False, env="MINIO_SECURE")
+    MINIO_PART_SIZE: int = Field(default=16 * 1024 * 1024, env="MINIO_PART_SIZE")
+    PRESIGNED_URL_MIN_TTL: int = Field(default=900, env="PRESIGNED_URL_MIN_TTL")
+    PRESIGNED_URL_CACHE_SIZE: int = Field(default=10000, env="PRESIGNED_URL_CACHE_SIZE")
+
+    # Upload settings
+    MAX_UPLOAD_SIZE_MB: int = Field(default=500, env="MAX_UPLOAD_SIZE_MB")
+    UPLOAD_PART_SIZE: int = Field(default=16 * 1024 * 1024, env="UPLOAD_PART_SIZE")
+    UPLOAD_URL_EXPIRY_SECONDS: int = Field(default=3600, env="UPLOAD_URL_EXPIRY_SECONDS")
+
+    # Batch (album) splitting
+    MAX_BATCH_TRACKS: int = Field(default=50, env="MAX_BATCH_TRACKS")
 
     @validator("CORS_ORIGINS", pre=True)
     def parse_cors_origins(cls, v):
@@ -8,6 +8,9 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 
 from app.routes import ping, keygen, upload, split
+from app.utils.http_client import start_splitter_client, close_splitter_client
+from app.utils.job_events import job_event_hub
+from app.utils.license_client import license_validator
 from app.utils.sessions import validate_session
 from app.config import settings
 
@@ -71,10 +74,14 @@ async def session_validation_middleware(request: Request, call_next):
 async def startup_event():
     """Execute actions on application startup."""
     print(f"Starting backend API on {settings.HOST}:{settings.PORT}")
+    start_splitter_client()
 
 
 # Shutdown event
 @app.on_event("shutdown")
 async def shutdown_event():
     """Execute actions on application shutdown."""
-    print("Shutting down backend API")
\ No newline at end of file
+    print("Shutting down backend API")
+    await job_event_hub.close()
+    await close_splitter_client()
+    await license_validator.close()
\ No newline at end of file
@@ -1,14 +1,13 @@
 """
 License validation routes for the Keygen.sh API integration.
 """
-import json
-import requests
 from typing import Dict, Any
 
 from fastapi import APIRouter, Response, Form
 from fastapi.responses import JSONResponse
 
 from app.config import settings
+from app.utils.license_client import license_validator
 from app.utils.sessions import get_license_hash, create_session_cookie, clear_session_cookie
 
 router = APIRouter(prefix="/api", tags=["license"])
@@ -73,41 +72,5 @@ async def check_key(key: str) -> bool:
         # In development, accept any key that's not empty
         return bool(key and len(key) > 0)
 
-    # Construct API endpoint
-    api_endpoint = f"https://api.keygen.sh/v1/accounts/{settings.KEYGEN_ACCOUNT_ID}/licenses/actions/validate-key"
-
-    # Prepare request data
-    request_data = json.dumps({
-        "meta": {
-            "key": key
-        }
-    })
-
-    # Make the API request
-    try:
-        response = requests.post(
-            api_endpoint,
-            headers={
-                "Content-Type": "application/vnd.api+json",
-                "Accept": "application/vnd.api+json"
-            },
-            data=request_data
-        )
-
-        validation = response.json()
-
-        # Check for errors
-        if "errors" in validation:
-            errs = validation["errors"]
-            error_messages = '\n'.join(map(lambda e: f"{e['title']} - {e['detail']}".lower(), errs))
-            print(f"License validation failed: {error_messages}")
-            return False
-
-        # Return validation result
-        valid = validation["meta"]["valid"]
-        print(f"License validation result: {valid}")
-        return valid
-
-    except Exception as e:
-        print(f"Exception during license validation API request: {str(e)}")
-        return False
\ No newline at end of file
+    # Cached, coalesced validation with a timeout
+    return await license_validator.validate(key)
@@ -4,26 +4,33 @@ This module orchestrates requests between the frontend and the splitter service.
 """
 import os
 import json
-import requests
-from typing import Dict, Any
+import asyncio
+import httpx
+from typing import Dict, Any, List, Optional
 
-from fastapi import APIRouter, HTTPException, BackgroundTasks, Body
-from fastapi.responses import JSONResponse
+from fastapi import APIRouter, HTTPException, BackgroundTasks, Body, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, StreamingResponse
 
 from app.config import settings
-from app.utils.minio_client import get_presigned_url
+from app.utils.http_client import splitter_request
+from app.utils.job_events import job_event_hub
+from app.utils.minio_client import add_download_urls, object_exists
+from app.utils.sessions import get_session_license_hash
 
 router = APIRouter(prefix="/api", tags=["split"])
 
 
 @router.post("/split")
-async def split_audio(background_tasks: BackgroundTasks, data: Dict[str, Any] = Body(...)):
+async def split_audio(request: Request, background_tasks: BackgroundTasks, data: Dict[str, Any] = Body(...)):
     """
     Request audio splitting for a previously uploaded file.
 
     Args:
+        request: The FastAPI request object, whose session identifies the tenant
         background_tasks: FastAPI background tasks for async processing
-        data: Request data containing file details
+        data: Request data containing file details, optional "formats" and
+            "quality" (preview, standard or mastering)
 
     Returns:
         JSON response with job status or error
@@ -35,18 +42,33 @@ async def split_audio(background_tasks: BackgroundTasks, data: Dict[str, Any] =
             detail="No file specified for splitting"
         )
 
+    # Only split files that finished uploading (and passed verification)
+    if not await run_in_threadpool(object_exists, object_name):
+        raise HTTPException(
+            status_code=404,
+            detail="Uploaded file not found, please upload it again"
+        )
+
     try:
         # Forward the request to the splitter service
-        splitter_response = await request_splitting(object_name)
+        splitter_response = await request_splitting(
+            object_name,
+            data.get("formats"),
+            tenant=get_session_license_hash(request),
+            quality=data.get("quality")
+        )
 
         # Return the job ID and status from the splitter service
         return {
             "success": True,
             "status": "processing",
             "job_id": splitter_response.get("job_id"),
+            "queue_position": splitter_response.get("queue_position"),
             "message": "Audio splitting started successfully"
         }
 
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=500,
@@ -54,6 +76,76 @@ async def split_audio(background_tasks: BackgroundTasks, data: Dict[str, Any] =
         )
 
 
+@router.post("/split/batch")
+async def split_batch(request: Request, data: Dict[str, Any] = Body(...)):
+    """
+    Request splitting of several uploaded files (e.g. an album) as one batch.
+
+    The splitter queues all tracks together and reports their aggregate
+    progress on the batch job, whose status and events endpoints are the
+    same as for single jobs.
+
+    Args:
+        request: The FastAPI request object, whose session identifies the tenant
+        data: Request data containing "object_names", optional "formats",
+            "quality", "album_archive" and "album_name"
+
+    Returns:
+        JSON response with the batch job ID and its track jobs
+    """
+    object_names = data.get("object_names")
+    if not isinstance(object_names, list) or not object_names:
+        raise HTTPException(
+            status_code=400,
+            detail="No files specified for splitting"
+        )
+    if not all(isinstance(name, str) and name for name in object_names):
+        raise HTTPException(
+            status_code=400,
+            detail="File names must be non-empty strings"
+        )
+    if len(object_names) > settings.MAX_BATCH_TRACKS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"A batch can contain at most {settings.MAX_BATCH_TRACKS} tracks"
+        )
+
+    # Only split files that finished uploading (and passed verification)
+    exists = await asyncio.gather(*(run_in_threadpool(object_exists, name) for name in object_names))
+    missing = [name for name, found in zip(object_names, exists) if not found]
+    if missing:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Uploaded files not found, please upload them again: {', '.join(missing)}"
+        )
+
+    try:
+        splitter_response = await request_batch_splitting(
+            object_names,
+            data.get("formats"),
+            tenant=get_session_license_hash(request),
+            album_archive=bool(data.get("album_archive")),
+            album_name=data.get("album_name"),
+            quality=data.get("quality")
+        )
+
+        return {
+            "success": True,
+            "status": "processing",
+            "job_id": splitter_response.get("batch_id"),
+            "jobs": splitter_response.get("jobs", []),
+            "message": f"Splitting of {len(object_names)} tracks started successfully"
+        }
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error initiating batch split: {str(e)}"
+        )
+
+
 @router.get("/split/{job_id}/status")
 async def get_split_status(job_id: str):
     """
@@ -67,10 +159,7 @@ async def get_split_status(job_id: str):
     """
     try:
         # Make request to splitter service to check status
-        response = requests.get(
-            f"{settings.SPLITTER_URL}/split/{job_id}/status",
-            timeout=10
-        )
+        response = await splitter_request("GET", f"/split/{job_id}/status", timeout=10)
 
         if response.status_code != 200:
             return JSONResponse(
@@ -83,12 +172,8 @@ async def get_split_status(job_id: str):
 
         # If the job is complete, add presigned URLs for the stems
         if data.get("status") == "completed":
-            # Generate presigned URLs for each stem
-            stems = data.get("stems", [])
-            for i, stem in enumerate(stems):
-                stem_object_name = stem.get("object_name")
-                if stem_object_name:
-                    stems[i]["download_url"] = get_presigned_url(stem_object_name)
+            # Generate presigned URLs for each stem off the event loop
+            await run_in_threadpool(add_download_urls, data)
 
         return data
 
@@ -99,20 +184,116 @@ async def get_split_status(job_id: str):
         )
 
 
-async def request_splitting(object_name: str) -> Dict[str, Any]:
+@router.get("/split/{job_id}/events")
+async def stream_split_status(job_id: str):
+    """
+    Stream the status of a splitting job as Server-Sent Events.
+
+    Sends the current job record first and then one "status" event per
+    change, until the job completes or fails. Completed records carry
+    presigned download URLs like the status endpoint.
+
+    Args:
+        job_id: The ID of the splitting job
+
+    Returns:
+        Streaming response of text/event-stream
+    """
+    async def event_stream():
+        async for record in job_event_hub.subscribe(job_id):
+            if record is None:
+                yield ": keep-alive\n\n"
+            else:
+                yield f"event: status\ndata: {json.dumps(record)}\n\n"
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no"
+        }
+    )
+
+
+async def request_splitting(
+        object_name: str,
+        formats: Optional[List[str]] = None,
+        tenant: Optional[str] = None,
+        quality: Optional[str] = None
+) -> Dict[str, Any]:
     """
     Send a request to the splitter service to process an audio file.
 
     Args:
         object_name: The name of the audio file object in MinIO
+        formats: Deliverable formats (wav, wav24, flac, mp3, opus)
+        tenant: License hash the splitter schedules the job under
+        quality: Quality preset (preview, standard, mastering)
+
+    Returns:
+        The response from the splitter service
+    """
+    request_data = {"object_name": object_name}
+    if formats:
+        request_data["formats"] = formats
+    if tenant:
+        request_data["tenant"] = tenant
+    if quality:
+        request_data["quality"] = quality
+
+    return await post_to_splitter("/split", request_data)
+
+
+async def request_batch_splitting(
+        object_names: List[str],
+        formats: Optional[List[str]] = None,
+        tenant: Optional[str] = None,
+        album_archive: bool = False,
+        album_name: Optional[str] = None,
+        quality: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Send a batch of audio files to the splitter service in one request.
+
+    Args:
+        object_names: Names of the audio file objects in MinIO
+        formats: Deliverable formats (wav, wav24, flac, mp3, opus)
+        tenant: License hash the splitter schedules the jobs under
+        album_archive: Pack all stems into one ZIP instead of one per track
+        album_name: Base name of the album ZIP
+        quality: Quality preset (preview, standard, mastering)
+
+    Returns:
+        The response from the splitter service
+    """
+    request_data = {"object_names": object_names, "album_archive": album_archive}
+    if formats:
+        request_data["formats"] = formats
+    if tenant:
+        request_data["tenant"] = tenant
+    if album_name:
+        request_data["album_name"] = album_name
+    if quality:
+        request_data["quality"] = quality
+
+    return await post_to_splitter("/split/batch", request_data)
+
+
+async def post_to_splitter(path: str, request_data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Submit work to the splitter service along with the MinIO connection info.
+
+    Args:
+        path: Splitter endpoint, e.g. "/split"
+        request_data: Request body without MinIO details
 
     Returns:
         The response from the splitter service
     """
     try:
-        # Prepare request data
         request_data = {
-            "object_name": object_name,
+            **request_data,
             "bucket_name": settings.MINIO_BUCKET_NAME,
             "minio_endpoint": settings.MINIO_ENDPOINT,
             "minio_access_key": settings.MINIO_ACCESS_KEY,
@@ -121,11 +302,15 @@ async def request_splitting(object_name: str) -> Dict[str, Any]:
         }
 
         # Send request to splitter service
-        response = requests.post(
-            f"{settings.SPLITTER_URL}/split",
-            json=request_data,
-            timeout=30
-        )
+        response = await splitter_request("POST", path, json=request_data)
+
+        if response.status_code == 429:
+            # Splitter queue is full, pass the back-off hint on to the client
+            raise HTTPException(
+                status_code=429,
+                detail="Splitter is at capacity, please retry later",
+                headers={"Retry-After": response.headers.get("Retry-After", "30")}
+            )
 
         if response.status_code != 200:
             error_message = f"Splitter service returned status {response.status_code}"
@@ -137,5 +322,5 @@ async def request_splitting(object_name: str) -> Dict[str, Any]:
 
         return response.json()
 
-    except requests.RequestException as e:
-        raise Exception(f"Error communicating with splitter service: {str(e)}")
\ No newline at end of file
+    except httpx.HTTPError as e:
+        raise Exception(f"Error communicating with splitter service: {str(e)}")
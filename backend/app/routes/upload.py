@@ -2,16 +2,72 @@
 File upload handling routes for audio files.
 """
 import os
-from typing import Dict, Any
-from fastapi import APIRouter, UploadFile, File, Form, HTTPException
+import math
+import uuid
+from typing import Dict, Any, BinaryIO
+from fastapi import APIRouter, UploadFile, File, Form, HTTPException, Body, Query
+from fastapi.concurrency import run_in_threadpool
+from minio.error import S3Error
 
-from app.utils.minio_client import upload_file
+from app.config import settings
+from app.utils.minio_client import (
+    upload_stream,
+    create_multipart_upload,
+    get_presigned_part_urls,
+    list_uploaded_parts,
+    complete_multipart_upload,
+    abort_multipart_upload,
+    read_object_head,
+    delete_file
+)
 
 router = APIRouter(prefix="/api", tags=["upload"])
 
 # Allowed audio file extensions
 ALLOWED_EXTENSIONS = [".aif", ".mp3", ".flac", ".wav"]
 
+# Content type stored for each allowed extension
+CONTENT_TYPES = {
+    ".aif": "audio/aiff",
+    ".mp3": "audio/mpeg",
+    ".flac": "audio/flac",
+    ".wav": "audio/wav",
+}
+
+# S3 limits for multipart uploads
+MIN_PART_SIZE = 5 * 1024 * 1024
+MAX_PARTS = 10000
+
+# Bytes read from a completed upload to check its audio header
+AUDIO_HEADER_SIZE = 12
+
+# Maximum upload size in bytes
+MAX_UPLOAD_SIZE = settings.MAX_UPLOAD_SIZE_MB * 1024 * 1024
+
+
+class UploadTooLargeError(Exception):
+    """Raised when an upload exceeds MAX_UPLOAD_SIZE."""
+
+
+class SizeLimitedReader:
+    """
+    File wrapper that counts the bytes read and stops past a size limit.
+    """
+
+    def __init__(self, fileobj: BinaryIO, limit: int):
+        self._fileobj = fileobj
+        self.limit = limit
+        self.bytes_read = 0
+
+    def read(self, size: int = -1) -> bytes:
+        # Never read more than one byte past the limit
+        remaining = self.limit + 1 - self.bytes_read
+        data = self._fileobj.read(remaining if size < 0 else min(size, remaining))
+        self.bytes_read += len(data)
+        if self.bytes_read > self.limit:
+            raise UploadTooLargeError(f"Upload exceeds {self.limit} bytes")
+        return data
+
 
 @router.post("/upload-audio")
 async def upload_audio(file: UploadFile = File(...)):
@@ -35,33 +91,17 @@ async def upload_audio(file: UploadFile = File(...)):
         )
 
     # Determine content type
-    content_type = "audio/mpeg"
-    if ext == ".wav":
-        content_type = "audio/wav"
-    elif ext == ".flac":
-        content_type = "audio/flac"
-    elif ext == ".aif":
-        content_type = "audio/aiff"
+    content_type = CONTENT_TYPES[ext]
+
+    # Reject uploads whose declared size is already too large
+    if file.size is not None and file.size > MAX_UPLOAD_SIZE:
+        raise_too_large()
 
     try:
-        # Read file content
-        file_content = await file.read()
-        file_size = len(file_content)
-
-        # Check file size (limit to 500MB)
-        if file_size > 500 * 1024 * 1024:
-            raise HTTPException(
-                status_code=400,
-                detail="File too large. Maximum size is 500MB."
-            )
-
-        # Upload to MinIO
-        object_name = await upload_file_to_minio(file_content, filename, content_type)
-        if not object_name:
-            raise HTTPException(
-                status_code=500,
-                detail="Failed to upload file to storage."
-            )
+        # Stream the spooled upload to MinIO part by part
+        reader = SizeLimitedReader(file.file, MAX_UPLOAD_SIZE)
+        object_name = await upload_file_to_minio(reader, filename, content_type)
+        file_size = reader.bytes_read
 
         # Return successful response with file details
         return {
@@ -72,19 +112,37 @@ async def upload_audio(file: UploadFile = File(...)):
             "content_type": content_type
         }
 
+    except UploadTooLargeError:
+        raise_too_large()
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=500,
             detail=f"Error processing upload: {str(e)}"
         )
+    finally:
+        await file.close()
 
 
-async def upload_file_to_minio(file_content: bytes, filename: str, content_type: str) -> str:
+def raise_too_large():
+    """
+    Reject an upload over the size limit.
+    """
+    raise HTTPException(
+        status_code=400,
+        detail=f"File too large. Maximum size is {settings.MAX_UPLOAD_SIZE_MB}MB."
+    )
+
+
+async def upload_file_to_minio(file_stream: BinaryIO, filename: str, content_type: str) -> str:
     """
     Upload file to MinIO storage.
 
+    Runs in the threadpool, so the event loop is free while parts are sent.
+
     Args:
-        file_content: The file content as bytes
+        file_stream: Readable file object with the file content
         filename: Original filename
         content_type: MIME type of the file
 
@@ -92,8 +150,9 @@ async def upload_file_to_minio(file_content: bytes, filename: str, content_type:
         The object name in MinIO
     """
     # Upload to MinIO
-    object_name = upload_file(
-        file_data=file_content,
+    object_name = await run_in_threadpool(
+        upload_stream,
+        stream=file_stream,
         object_name=filename,  # Use original filename
         content_type=content_type
     )
@@ -101,4 +160,204 @@ async def upload_file_to_minio(file_content: bytes, filename: str, content_type:
     if not object_name:
         raise Exception("Failed to upload file to MinIO")
 
-    return object_name
\ No newline at end of file
+    return object_name
+
+
+@router.post("/uploads")
+async def start_direct_upload(data: Dict[str, Any] = Body(...)):
+    """
+    Start a direct upload from the client to storage.
+
+    The client PUTs each part of the file to its presigned URL (in
+    parallel), then calls the completion endpoint.
+
+    Args:
+        data: Request data with filename and size (bytes) of the file
+
+    Returns:
+        JSON response with the upload ID, object name, part size and
+        presigned part URLs
+    """
+    filename = os.path.basename(str(data.get("filename") or ""))
+    _, ext = os.path.splitext(filename.lower())
+
+    if ext not in ALLOWED_EXTENSIONS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"File type not supported. Please upload {', '.join(ALLOWED_EXTENSIONS)} files."
+        )
+
+    try:
+        size = int(data.get("size"))
+    except (TypeError, ValueError):
+        raise HTTPException(status_code=400, detail="File size is required")
+    if size <= 0:
+        raise HTTPException(status_code=400, detail="File is empty")
+    if size > MAX_UPLOAD_SIZE:
+        raise_too_large()
+
+    # Keep within the S3 part count limit for very large files
+    part_size = max(settings.UPLOAD_PART_SIZE, MIN_PART_SIZE, math.ceil(size / MAX_PARTS))
+    part_count = math.ceil(size / part_size)
+
+    # Prefix with a random ID so uploads of equally named files never collide
+    object_name = f"{uuid.uuid4().hex}/{filename}"
+
+    try:
+        upload_id = await run_in_threadpool(create_multipart_upload, object_name, CONTENT_TYPES[ext])
+        urls = await run_in_threadpool(
+            get_presigned_part_urls, object_name, upload_id, list(range(1, part_count + 1))
+        )
+    except S3Error as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error starting upload: {str(e)}"
+        )
+
+    return {
+        "success": True,
+        "upload_id": upload_id,
+        "object_name": object_name,
+        "part_size": part_size,
+        "part_count": part_count,
+        "parts": [{"part_number": number, "url": url} for number, url in urls.items()]
+    }
+
+
+@router.get("/uploads/{upload_id}")
+async def resume_direct_upload(upload_id: str, object_name: str = Query(...), part_count: int = Query(...)):
+    """
+    Get the state of a direct upload, to resume it.
+
+    Args:
+        upload_id: The upload ID
+        object_name: The object name returned when the upload was started
+        part_count: The part count returned when the upload was started
+
+    Returns:
+        JSON response with the uploaded parts and fresh presigned URLs for
+        the missing ones
+    """
+    try:
+        uploaded = await run_in_threadpool(list_uploaded_parts, object_name, upload_id)
+    except S3Error:
+        raise HTTPException(status_code=404, detail="Upload not found or expired")
+
+    uploaded_numbers = {part.part_number for part in uploaded}
+    missing = [number for number in range(1, part_count + 1) if number not in uploaded_numbers]
+    urls = await run_in_threadpool(get_presigned_part_urls, object_name, upload_id, missing)
+
+    return {
+        "success": True,
+        "upload_id": upload_id,
+        "object_name": object_name,
+        "uploaded": [{"part_number": part.part_number, "size": part.size} for part in uploaded],
+        "parts": [{"part_number": number, "url": url} for number, url in urls.items()]
+    }
+
+
+@router.post("/uploads/{upload_id}/complete")
+async def complete_direct_upload(upload_id: str, data: Dict[str, Any] = Body(...)):
+    """
+    Complete a direct upload and verify the stored object.
+
+    The parts are taken from storage rather than from the client. The
+    object is only kept if its size matches and it starts with a valid
+    header for its audio format.
+
+    Args:
+        upload_id: The upload ID
+        data: Request data with object_name and size (bytes) of the file
+
+    Returns:
+        JSON response with file metadata, like /upload-audio
+    """
+    object_name = str(data.get("object_name") or "")
+    filename = os.path.basename(object_name)
+    _, ext = os.path.splitext(filename.lower())
+    if ext not in ALLOWED_EXTENSIONS:
+        raise HTTPException(status_code=400, detail="Invalid upload")
+
+    try:
+        expected_size = int(data.get("size"))
+    except (TypeError, ValueError):
+        raise HTTPException(status_code=400, detail="File size is required")
+
+    try:
+        parts = await run_in_threadpool(list_uploaded_parts, object_name, upload_id)
+    except S3Error:
+        raise HTTPException(status_code=404, detail="Upload not found or expired")
+
+    # Every part must be present exactly once and add up to the file
+    uploaded_size = sum(part.size or 0 for part in parts)
+    if [part.part_number for part in parts] != list(range(1, len(parts) + 1)) or uploaded_size != expected_size:
+        raise HTTPException(
+            status_code=409,
+            detail=f"Upload incomplete: received {uploaded_size} of {expected_size} bytes"
+        )
+    if uploaded_size > MAX_UPLOAD_SIZE:
+        await run_in_threadpool(abort_multipart_upload, object_name, upload_id)
+        raise_too_large()
+
+    try:
+        await run_in_threadpool(complete_multipart_upload, object_name, upload_id, parts)
+        header = await run_in_threadpool(read_object_head, object_name, AUDIO_HEADER_SIZE)
+    except S3Error as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error completing upload: {str(e)}"
+        )
+
+    if not is_audio_header(header, ext):
+        await run_in_threadpool(delete_file, object_name)
+        raise HTTPException(
+            status_code=400,
+            detail=f"File is not a valid {ext[1:].upper()} file."
+        )
+
+    return {
+        "success": True,
+        "filename": filename,
+        "object_name": object_name,
+        "size": uploaded_size,
+        "content_type": CONTENT_TYPES[ext]
+    }
+
+
+@router.delete("/uploads/{upload_id}")
+async def cancel_direct_upload(upload_id: str, object_name: str = Query(...)):
+    """
+    Cancel a direct upload and discard its parts.
+
+    Args:
+        upload_id: The upload ID
+        object_name: The object name returned when the upload was started
+
+    Returns:
+        JSON response with the result
+    """
+    aborted = await run_in_threadpool(abort_multipart_upload, object_name, upload_id)
+    return {"success": aborted}
+
+
+def is_audio_header(header: bytes, ext: str) -> bool:
+    """
+    Check that a file starts like the audio format its extension claims.
+
+    Args:
+        header: The first AUDIO_HEADER_SIZE bytes of the file
+        ext: The lowercase file extension
+
+    Returns:
+        True if the header matches the format
+    """
+    if ext == ".wav":
+        return header[:4] in (b"RIFF", b"RF64") and header[8:12] == b"WAVE"
+    if ext == ".aif":
+        return header[:4] == b"FORM" and header[8:12] in (b"AIFF", b"AIFC")
+    if ext == ".flac":
+        return header[:4] == b"fLaC" or header[:3] == b"ID3"
+    if ext == ".mp3":
+        # ID3 tag or an MPEG audio frame sync
+        return header[:3] == b"ID3" or (len(header) >= 2 and header[0] == 0xFF and header[1] & 0xE0 == 0xE0)
+    return False
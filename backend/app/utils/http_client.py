@@ -0,0 +1,109 @@
+"""
+Shared async HTTP client for calls to the splitter service.
+
+One connection pool is opened at startup and reused by every request
+handler, so splitter calls keep connections alive and never block the event
+loop. Failed calls are retried with exponential backoff where it is safe.
+"""
+import asyncio
+from typing import Optional
+
+import httpx
+
+from app.config import settings
+
+# Upstream errors worth retrying, the splitter may be restarting
+RETRY_STATUS_CODES = (502, 503, 504)
+
+# Errors raised before the request reached the splitter, safe to retry for
+# any method
+CONNECT_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+
+# Methods that can be repeated without side effects
+IDEMPOTENT_METHODS = ("GET", "HEAD", "OPTIONS", "DELETE")
+
+_splitter_client: Optional[httpx.AsyncClient] = None
+
+
+def start_splitter_client() -> httpx.AsyncClient:
+    """
+    Open the shared splitter client if it is not open yet.
+
+    Returns:
+        The shared client
+    """
+    global _splitter_client
+    if _splitter_client is None or _splitter_client.is_closed:
+        _splitter_client = httpx.AsyncClient(
+            base_url=settings.SPLITTER_URL,
+            limits=httpx.Limits(
+                max_connections=settings.SPLITTER_HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.SPLITTER_HTTP_MAX_KEEPALIVE,
+                keepalive_expiry=settings.SPLITTER_HTTP_KEEPALIVE_EXPIRY
+            ),
+            timeout=httpx.Timeout(
+                settings.SPLITTER_HTTP_TIMEOUT,
+                connect=settings.SPLITTER_HTTP_CONNECT_TIMEOUT
+            )
+        )
+    return _splitter_client
+
+
+def get_splitter_client() -> httpx.AsyncClient:
+    """
+    Get the shared splitter client, opening it on first use.
+    """
+    return start_splitter_client()
+
+
+async def close_splitter_client():
+    """
+    Close the shared splitter client and its connections.
+    """
+    global _splitter_client
+    if _splitter_client is not None:
+        await _splitter_client.aclose()
+        _splitter_client = None
+
+
+async def splitter_request(method: str, path: str, **kwargs) -> httpx.Response:
+    """
+    Send a request to the splitter service with retries.
+
+    Connection failures are retried for every method. Timeouts, dropped
+    connections and 502/503/504 responses are only retried for idempotent
+    methods, so a split request is never submitted twice.
+
+    Args:
+        method: HTTP method
+        path: Path on the splitter service, e.g. "/split"
+        **kwargs: Extra arguments for httpx.AsyncClient.request
+
+    Returns:
+        The splitter's response
+
+    Raises:
+        httpx.HTTPError: If the last attempt failed
+    """
+    client = get_splitter_client()
+    method = method.upper()
+    retries = max(0, settings.SPLITTER_HTTP_RETRIES)
+
+    for attempt in range(retries + 1):
+        last_attempt = attempt == retries
+        try:
+            response = await client.request(method, path, **kwargs)
+        except CONNECT_ERRORS as e:
+            if last_attempt:
+                raise
+            print(f"Splitter {method} {path} could not connect (attempt {attempt + 1}): {str(e)}")
+        except httpx.TransportError as e:
+            if last_attempt or method not in IDEMPOTENT_METHODS:
+                raise
+            print(f"Splitter {method} {path} failed (attempt {attempt + 1}): {str(e)}")
+        else:
+            if last_attempt or method not in IDEMPOTENT_METHODS or response.status_code not in RETRY_STATUS_CODES:
+                return response
+            print(f"Splitter {method} {path} returned {response.status_code} (attempt {attempt + 1})")
+
+        await asyncio.sleep(settings.SPLITTER_HTTP_RETRY_BACKOFF * (2 ** attempt))
@@ -0,0 +1,201 @@
+"""
+Fan-out of splitting job status to streaming clients.
+
+Every watched job has one channel holding a single upstream subscription to
+the splitter's event stream. Watchers of the same job share that channel and
+only receive an event when the job actually changed. Presigned download URLs
+are signed once, when the job completes, instead of on every poll.
+"""
+import asyncio
+import json
+from typing import Any, AsyncIterator, Dict, Optional
+
+import httpx
+from fastapi.concurrency import run_in_threadpool
+
+from app.config import settings
+from app.utils.http_client import get_splitter_client, splitter_request
+from app.utils.minio_client import add_download_urls
+
+# Job statuses after which a job no longer changes
+TERMINAL_STATUSES = ("completed", "failed", "not_found")
+
+# Record fields that change without the job changing for the client
+VOLATILE_FIELDS = ("updated_at", "last_progress_at")
+
+
+class _JobChannel:
+    """
+    Latest state of one job and the watchers waiting for changes.
+    """
+
+    def __init__(self, job_id: str):
+        self.job_id = job_id
+        self.latest: Optional[Dict[str, Any]] = None
+        self.version = 0
+        self.watchers = 0
+        self.closed = False
+        self.changed = asyncio.Condition()
+        self.task: Optional[asyncio.Task] = None
+
+
+class JobEventHub:
+    """
+    Keeps one upstream subscription per job and fans changes out to watchers.
+    """
+
+    def __init__(self):
+        self._channels: Dict[str, _JobChannel] = {}
+
+    async def subscribe(self, job_id: str) -> AsyncIterator[Optional[Dict[str, Any]]]:
+        """
+        Watch a job.
+
+        Args:
+            job_id: The ID of the splitting job
+
+        Yields:
+            The job record whenever it changes (the current one first), or
+            None when nothing changed for JOB_EVENTS_KEEPALIVE_SECONDS. Ends
+            after a terminal status.
+        """
+        channel = self._channels.get(job_id)
+        if channel is None or channel.closed:
+            channel = _JobChannel(job_id)
+            self._channels[job_id] = channel
+            channel.task = asyncio.create_task(self._follow(channel))
+
+        channel.watchers += 1
+        seen = 0
+
+        try:
+            while True:
+                async with channel.changed:
+                    try:
+                        await asyncio.wait_for(
+                            channel.changed.wait_for(lambda: channel.version > seen or channel.closed),
+                            settings.JOB_EVENTS_KEEPALIVE_SECONDS
+                        )
+                        idle = False
+                    except asyncio.TimeoutError:
+                        idle = True
+
+                if idle:
+                    yield None
+                elif channel.version > seen:
+                    # Slow watchers skip straight to the latest state
+                    seen = channel.version
+                    yield channel.latest
+                    if channel.latest.get("status") in TERMINAL_STATUSES:
+                        return
+                elif channel.closed:
+                    return
+        finally:
+            channel.watchers -= 1
+            if channel.watchers == 0:
+                self._close(channel)
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Get the number of followed jobs and watchers.
+        """
+        return {
+            "jobs": len(self._channels),
+            "watchers": sum(channel.watchers for channel in self._channels.values())
+        }
+
+    async def close(self):
+        """
+        Stop following every job.
+        """
+        for channel in list(self._channels.values()):
+            self._close(channel)
+
+    def _close(self, channel: _JobChannel):
+        channel.closed = True
+        if channel.task is not None and not channel.task.done():
+            channel.task.cancel()
+        if self._channels.get(channel.job_id) is channel:
+            del self._channels[channel.job_id]
+
+    async def _follow(self, channel: _JobChannel):
+        """
+        Follow a job upstream until it reaches a terminal status.
+
+        Prefers the splitter's event stream and falls back to polling its
+        status endpoint if the stream cannot be opened or drops.
+        """
+        path = f"/split/{channel.job_id}"
+        client = get_splitter_client()
+        # Keep-alives arrive every JOB_EVENTS_KEEPALIVE_SECONDS, a longer
+        # silence means the stream is dead
+        stream_timeout = httpx.Timeout(
+            settings.SPLITTER_HTTP_TIMEOUT,
+            connect=settings.SPLITTER_HTTP_CONNECT_TIMEOUT,
+            read=settings.JOB_EVENTS_KEEPALIVE_SECONDS * 3
+        )
+
+        try:
+            while not self._is_terminal(channel):
+                try:
+                    async with client.stream("GET", f"{path}/events", timeout=stream_timeout) as response:
+                        if response.status_code == 404:
+                            await self._publish(channel, {"status": "not_found", "success": False})
+                            return
+                        if response.status_code == 200:
+                            async for line in response.aiter_lines():
+                                if line.startswith("data:"):
+                                    await self._publish(channel, json.loads(line[5:]))
+                except (httpx.HTTPError, ValueError) as e:
+                    print(f"Job event stream for {channel.job_id} failed: {str(e)}")
+
+                if self._is_terminal(channel):
+                    break
+
+                # Stream unavailable or ended early, poll once and retry
+                try:
+                    response = await splitter_request("GET", f"{path}/status")
+                    if response.status_code == 404:
+                        await self._publish(channel, {"status": "not_found", "success": False})
+                        return
+                    if response.status_code == 200:
+                        await self._publish(channel, response.json())
+                except (httpx.HTTPError, ValueError) as e:
+                    print(f"Error polling job {channel.job_id}: {str(e)}")
+
+                await asyncio.sleep(settings.JOB_EVENTS_POLL_INTERVAL)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"Error following job {channel.job_id}: {str(e)}")
+        finally:
+            async with channel.changed:
+                channel.closed = True
+                channel.changed.notify_all()
+
+    async def _publish(self, channel: _JobChannel, record: Dict[str, Any]):
+        """
+        Publish a record to the watchers of a channel if the job changed.
+        """
+        if channel.latest is not None and self._comparable(record) == self._comparable(channel.latest):
+            return
+
+        if record.get("status") == "completed":
+            await run_in_threadpool(add_download_urls, record)
+
+        async with channel.changed:
+            channel.latest = record
+            channel.version += 1
+            channel.changed.notify_all()
+
+    @staticmethod
+    def _is_terminal(channel: _JobChannel) -> bool:
+        return channel.latest is not None and channel.latest.get("status") in TERMINAL_STATUSES
+
+    @staticmethod
+    def _comparable(record: Dict[str, Any]) -> Dict[str, Any]:
+        return {key: value for key, value in record.items() if key not in VOLATILE_FIELDS}
+
+
+# Shared hub instance
+job_event_hub = JobEventHub()
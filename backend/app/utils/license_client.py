@@ -0,0 +1,136 @@
+"""
+Async license validation against the Keygen.sh API.
+
+Results are cached by license hash, valid ones for LICENSE_CACHE_TTL seconds
+and invalid ones for the shorter LICENSE_NEGATIVE_CACHE_TTL, and concurrent
+validations of the same key share one Keygen request. Keygen calls have a
+timeout, so a slow Keygen can no longer hold up the backend.
+"""
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Dict, Optional
+
+import httpx
+
+from app.config import settings
+from app.utils.sessions import get_license_hash
+
+
+class LicenseValidator:
+    """
+    Keygen client with a TTL cache and request coalescing.
+    """
+
+    def __init__(self):
+        self._client: Optional[httpx.AsyncClient] = None
+        # License hash -> (valid, cached until)
+        self._cache: "OrderedDict[str, tuple]" = OrderedDict()
+        # License hash -> validation in progress
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self.keygen_requests = 0
+
+    async def validate(self, key: str) -> bool:
+        """
+        Validate a license key.
+
+        Args:
+            key: The license key to validate
+
+        Returns:
+            True if the license is valid, False otherwise
+        """
+        license_hash = get_license_hash(key)
+
+        cached = self._cache.get(license_hash)
+        if cached is not None:
+            valid, expires_at = cached
+            if time.monotonic() < expires_at:
+                self._cache.move_to_end(license_hash)
+                return valid
+            del self._cache[license_hash]
+
+        inflight = self._inflight.get(license_hash)
+        if inflight is None:
+            inflight = asyncio.ensure_future(self._validate_and_cache(license_hash, key))
+            self._inflight[license_hash] = inflight
+            inflight.add_done_callback(lambda _: self._inflight.pop(license_hash, None))
+
+        # Shielded so one caller disconnecting does not cancel the others
+        return await asyncio.shield(inflight)
+
+    async def close(self):
+        """
+        Close the HTTP client.
+        """
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def clear(self):
+        """
+        Forget all cached validation results.
+        """
+        self._cache.clear()
+
+    async def _validate_and_cache(self, license_hash: str, key: str) -> bool:
+        valid = await self._request(key)
+        if valid is None:
+            # Keygen unreachable, don't cache so the next attempt retries
+            return False
+
+        ttl = settings.LICENSE_CACHE_TTL if valid else settings.LICENSE_NEGATIVE_CACHE_TTL
+        self._cache[license_hash] = (valid, time.monotonic() + ttl)
+        self._cache.move_to_end(license_hash)
+        while len(self._cache) > settings.LICENSE_CACHE_SIZE:
+            self._cache.popitem(last=False)
+        return valid
+
+    async def _request(self, key: str) -> Optional[bool]:
+        """
+        Ask Keygen whether a key is valid.
+
+        Returns:
+            The validation result, or None if Keygen could not be reached
+        """
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(timeout=settings.KEYGEN_TIMEOUT)
+
+        api_endpoint = (
+            f"{settings.KEYGEN_API_URL}/accounts/{settings.KEYGEN_ACCOUNT_ID}"
+            "/licenses/actions/validate-key"
+        )
+
+        try:
+            self.keygen_requests += 1
+            response = await self._client.post(
+                api_endpoint,
+                headers={
+                    "Content-Type": "application/vnd.api+json",
+                    "Accept": "application/vnd.api+json"
+                },
+                json={"meta": {"key": key}}
+            )
+            if response.status_code >= 500:
+                print(f"Keygen returned status {response.status_code}")
+                return None
+
+            validation = response.json()
+        except (httpx.HTTPError, ValueError) as e:
+            print(f"Exception during license validation API request: {str(e)}")
+            return None
+
+        # Check for errors
+        if "errors" in validation:
+            errs = validation["errors"]
+            error_messages = '\n'.join(map(lambda e: f"{e.get('title')} - {e.get('detail')}".lower(), errs))
+            print(f"License validation failed: {error_messages}")
+            return False
+
+        valid = bool(validation.get("meta", {}).get("valid"))
+        print(f"License validation result: {valid}")
+        return valid
+
+
+# Shared validator instance
+license_validator = LicenseValidator()
@@ -2,10 +2,15 @@
 MinIO client utilities for handling file storage.
 """
 import os
+import threading
+import time
+from collections import OrderedDict
 from io import BytesIO
-from datetime import timedelta
+from datetime import datetime, timedelta, timezone
 import uuid
+from typing import Any, BinaryIO, Dict, List
 from minio import Minio
+from minio.datatypes import Part
 from minio.error import S3Error
 
 from app.config import settings
@@ -18,15 +23,29 @@ minio_client = Minio(
     secure=settings.MINIO_SECURE
 )
 
+# Whether the stems bucket is known to exist
+_bucket_ready = False
+
+# Presigned download URLs by (object name, expiry, signing time)
+_presigned_url_cache = OrderedDict()
+_presigned_url_lock = threading.Lock()
+
 
 def ensure_bucket_exists():
     """
     Ensure that the stems bucket exists, creating it if needed.
+
+    Only checked until it succeeds once, later calls return immediately.
     """
+    global _bucket_ready
+    if _bucket_ready:
+        return True
+
     try:
         if not minio_client.bucket_exists(settings.MINIO_BUCKET_NAME):
             minio_client.make_bucket(settings.MINIO_BUCKET_NAME)
             print(f"Bucket '{settings.MINIO_BUCKET_NAME}' created successfully.")
+        _bucket_ready = True
         return True
     except S3Error as err:
         print(f"Error ensuring bucket exists: {err}")
@@ -78,10 +97,51 @@ def upload_file(file_data: bytes, object_name: str = None, content_type: str = "
         return None
 
 
+def upload_stream(stream: BinaryIO, object_name: str, content_type: str = "audio/mpeg", length: int = -1):
+    """
+    Upload a file-like object to MinIO without reading it into memory.
+
+    Objects of unknown length, or larger than MINIO_PART_SIZE, are sent as
+    a multipart upload, holding only one part in memory at a time. Errors
+    raised by the stream abort the upload and are passed on to the caller.
+
+    Args:
+        stream: Readable binary file object
+        object_name: The name to use for the object in the bucket
+        content_type: The content type of the file
+        length: Size of the stream in bytes, or -1 if unknown
+
+    Returns:
+        The object name if successful, None otherwise
+    """
+    try:
+        # Ensure bucket exists
+        ensure_bucket_exists()
+
+        minio_client.put_object(
+            bucket_name=settings.MINIO_BUCKET_NAME,
+            object_name=object_name,
+            data=stream,
+            length=length,
+            content_type=content_type,
+            part_size=settings.MINIO_PART_SIZE
+        )
+
+        print(f"Uploaded {object_name} to MinIO")
+        return object_name
+    except S3Error as err:
+        print(f"Error uploading file to MinIO: {err}")
+        return None
+
+
 def get_presigned_url(object_name: str, expires: int = 3600):
     """
     Generate a presigned URL for downloading an object.
 
+    URLs are signed for fixed time windows and cached, so repeated calls
+    return the same URL (cacheable by browsers and CDNs) until it has less
+    than PRESIGNED_URL_MIN_TTL seconds left.
+
     Args:
         object_name: The name of the object in the bucket
         expires: Expiry time in seconds (default: 1 hour)
@@ -89,17 +149,57 @@ def get_presigned_url(object_name: str, expires: int = 3600):
     Returns:
         The presigned URL if successful, None otherwise
     """
+    # Sign at the start of the current window, every window's URL still has
+    # at least min_ttl seconds left when the next window starts
+    min_ttl = min(settings.PRESIGNED_URL_MIN_TTL, expires // 2)
+    window = expires - min_ttl
+    signed_at = int(time.time()) // window * window
+    key = (object_name, expires, signed_at)
+
+    with _presigned_url_lock:
+        url = _presigned_url_cache.get(key)
+        if url is not None:
+            _presigned_url_cache.move_to_end(key)
+            return url
+
     try:
         url = minio_client.presigned_get_object(
             bucket_name=settings.MINIO_BUCKET_NAME,
             object_name=object_name,
-            expires=timedelta(seconds=expires)
+            expires=timedelta(seconds=expires),
+            request_date=datetime.fromtimestamp(signed_at, tz=timezone.utc)
         )
-        return url
     except S3Error as err:
         print(f"Error generating presigned URL: {err}")
         return None
 
+    with _presigned_url_lock:
+        _presigned_url_cache[key] = url
+        # Drop the least recently used URLs; stale windows age out the same way
+        while len(_presigned_url_cache) > settings.PRESIGNED_URL_CACHE_SIZE:
+            _presigned_url_cache.popitem(last=False)
+    return url
+
+
+def add_download_urls(record: Dict[str, Any]):
+    """
+    Add presigned download URLs to the stems of a completed job record.
+
+    Covers the record's own stems and, for batch jobs, the stems of every
+    track.
+
+    Args:
+        record: Job record from the splitter service
+    """
+    stem_lists = [record.get("stems", [])]
+    stem_lists.extend(track.get("stems", []) for track in record.get("tracks", []))
+
+    for stems in stem_lists:
+        for stem in stems:
+            stem_object_name = stem.get("object_name")
+            if stem_object_name:
+                stem["download_url"] = get_presigned_url(stem_object_name)
+
 
 def delete_file(object_name: str):
     """
@@ -119,4 +219,151 @@ def delete_file(object_name: str):
         return True
     except S3Error as err:
         print(f"Error deleting file from MinIO: {err}")
-        return False
\ No newline at end of file
+        return False
+
+def object_exists(object_name: str) -> bool:
+    """
+    Check whether an object exists in the bucket.
+
+    Args:
+        object_name: The name of the object
+
+    Returns:
+        True if the object exists, False otherwise
+    """
+    try:
+        minio_client.stat_object(settings.MINIO_BUCKET_NAME, object_name)
+        return True
+    except S3Error:
+        return False
+
+
+def read_object_head(object_name: str, length: int) -> bytes:
+    """
+    Read the first bytes of an object.
+
+    Args:
+        object_name: The name of the object
+        length: Number of bytes to read
+
+    Returns:
+        Up to `length` bytes from the start of the object
+    """
+    response = minio_client.get_object(settings.MINIO_BUCKET_NAME, object_name, offset=0, length=length)
+    try:
+        return response.read()
+    finally:
+        response.close()
+        response.release_conn()
+
+
+# Direct (browser to MinIO) multipart uploads. The minio package exposes the
+# multipart primitives only as private methods, which are stable across 7.x.
+
+def create_multipart_upload(object_name: str, content_type: str) -> str:
+    """
+    Start a multipart upload that the client fills through presigned URLs.
+
+    Args:
+        object_name: The name to use for the object in the bucket
+        content_type: The content type of the file
+
+    Returns:
+        The upload ID
+    """
+    ensure_bucket_exists()
+    return minio_client._create_multipart_upload(
+        settings.MINIO_BUCKET_NAME,
+        object_name,
+        {"Content-Type": content_type}
+    )
+
+
+def get_presigned_part_urls(object_name: str, upload_id: str, part_numbers: List[int]) -> Dict[int, str]:
+    """
+    Generate presigned PUT URLs for parts of a multipart upload.
+
+    Args:
+        object_name: The name of the object being uploaded
+        upload_id: The upload ID
+        part_numbers: Part numbers (1-based) to sign
+
+    Returns:
+        Dictionary mapping part numbers to URLs
+    """
+    expires = timedelta(seconds=settings.UPLOAD_URL_EXPIRY_SECONDS)
+    return {
+        part_number: minio_client.get_presigned_url(
+            "PUT",
+            settings.MINIO_BUCKET_NAME,
+            object_name,
+            expires=expires,
+            extra_query_params={"uploadId": upload_id, "partNumber": str(part_number)}
+        )
+        for part_number in part_numbers
+    }
+
+
+def list_uploaded_parts(object_name: str, upload_id: str) -> List[Part]:
+    """
+    List the parts uploaded so far.
+
+    Args:
+        object_name: The name of the object being uploaded
+        upload_id: The upload ID
+
+    Returns:
+        List of parts ordered by part number
+
+    Raises:
+        S3Error: If the upload does not exist (anymore)
+    """
+    parts = []
+    marker = None
+    while True:
+        result = minio_client._list_parts(
+            settings.MINIO_BUCKET_NAME,
+            object_name,
+            upload_id,
+            part_number_marker=marker
+        )
+        parts.extend(result.parts)
+        if not result.is_truncated:
+            return parts
+        marker = result.next_part_number_marker
+
+
+def complete_multipart_upload(object_name: str, upload_id: str, parts: List[Part]):
+    """
+    Assemble the uploaded parts into the final object.
+
+    Args:
+        object_name: The name of the object being uploaded
+        upload_id: The upload ID
+        parts: Parts as returned by list_uploaded_parts
+    """
+    minio_client._complete_multipart_upload(
+        settings.MINIO_BUCKET_NAME,
+        object_name,
+        upload_id,
+        [Part(part.part_number, part.etag) for part in parts]
+    )
+
+
+def abort_multipart_upload(object_name: str, upload_id: str) -> bool:
+    """
+    Abort a multipart upload and discard its parts.
+
+    Args:
+        object_name: The name of the object being uploaded
+        upload_id: The upload ID
+
+    Returns:
+        True if successful, False otherwise
+    """
+    try:
+        minio_client._abort_multipart_upload(settings.MINIO_BUCKET_NAME, object_name, upload_id)
+        return True
+    except S3Error as err:
+        print(f"Error aborting multipart upload: {err}")
+        return False
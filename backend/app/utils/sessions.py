@@ -44,10 +44,39 @@ async def validate_session(request: Request) -> bool:
     Returns:
         True if the session is valid, False otherwise
     """
+    return load_session(request) is not None
+
+
+def get_session_license_hash(request: Request) -> Optional[str]:
+    """
+    Get the license hash of the request's session.
+
+    Args:
+        request: The FastAPI request object
+
+    Returns:
+        The hashed license key, or None without a valid session
+    """
+    session_data = load_session(request)
+    if session_data is None:
+        return None
+    return session_data.get("hash")
+
+
+def load_session(request: Request) -> Optional[Dict[str, Any]]:
+    """
+    Load and verify the session data of a request.
+
+    Args:
+        request: The FastAPI request object
+
+    Returns:
+        The session data if the session is valid, None otherwise
+    """
     # Get the signed session cookie
     session_cookie = request.cookies.get(LICENSE_COOKIE_NAME)
     if not session_cookie:
-        return False
+        return None
 
     try:
         # Unsign the cookie and check if it's expired
@@ -63,11 +92,11 @@ async def validate_session(request: Request) -> bool:
         if "expires" in session_data:
             expiry = datetime.fromisoformat(session_data["expires"])
             if datetime.now() > expiry:
-                return False
+                return None
 
-        return True
+        return session_data
     except (SignatureExpired, BadSignature, json.JSONDecodeError, ValueError):
-        return False
+        return None
 
 
 def create_session_cookie(
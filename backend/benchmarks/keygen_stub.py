@@ -0,0 +1,73 @@
+"""
+Local stand-in for the Keygen.sh validate-key endpoint.
+
+Keys starting with "valid" are valid, every other key is not. Each response
+is delayed by --latency seconds, and GET /stats returns the number of
+validations served, so tests and benchmarks can count Keygen round-trips.
+
+Usage (from the backend directory):
+    python -m benchmarks.keygen_stub --port 8787 --latency 0.2
+
+Then run the backend with:
+    KEYGEN_API_URL=http://localhost:8787/v1 KEYGEN_ACCOUNT_ID=stub
+"""
+import argparse
+import asyncio
+
+import uvicorn
+from fastapi import FastAPI, Request
+
+
+def create_app(latency=0.0):
+    """
+    Create the stub application.
+
+    Args:
+        latency: Seconds to wait before answering a validation
+
+    Returns:
+        FastAPI application
+    """
+    app = FastAPI(title="Keygen stub")
+    app.state.latency = latency
+    app.state.validations = 0
+
+    @app.post("/v1/accounts/{account_id}/licenses/actions/validate-key")
+    async def validate_key(account_id: str, request: Request):
+        app.state.validations += 1
+        payload = await request.json()
+        key = payload.get("meta", {}).get("key", "")
+
+        await asyncio.sleep(app.state.latency)
+
+        if not key:
+            return {"errors": [{"title": "Bad request", "detail": "key is missing"}]}
+
+        valid = key.startswith("valid")
+        return {
+            "meta": {
+                "valid": valid,
+                "code": "VALID" if valid else "NOT_FOUND",
+                "detail": "is valid" if valid else "does not exist"
+            }
+        }
+
+    @app.get("/stats")
+    async def stats():
+        return {"validations": app.state.validations}
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8787)
+    parser.add_argument("--latency", type=float, default=0.2)
+    args = parser.parse_args()
+
+    uvicorn.run(create_app(args.latency), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
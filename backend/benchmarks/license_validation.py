@@ -0,0 +1,80 @@
+"""
+Keygen round-trips and latency of license validation.
+
+Starts the Keygen stub in-process and fires bursts of concurrent validations
+through LicenseValidator: a cold burst (coalescing), a warm burst (cache)
+and a burst against a stub slower than KEYGEN_TIMEOUT.
+
+Usage (from the backend directory):
+    python -m benchmarks.license_validation --requests 500 --keys 20 --latency 0.2
+"""
+import argparse
+import asyncio
+import threading
+import time
+
+import uvicorn
+
+from app.config import settings
+from app.utils.license_client import LicenseValidator
+from benchmarks.keygen_stub import create_app
+
+
+def start_stub(app, port):
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.05)
+    return server
+
+
+async def burst(validator, keys, requests):
+    start = time.perf_counter()
+    before = validator.keygen_requests
+    results = await asyncio.gather(*(validator.validate(keys[i % len(keys)]) for i in range(requests)))
+    return time.perf_counter() - start, validator.keygen_requests - before, sum(results)
+
+
+async def run(args, app):
+    validator = LicenseValidator()
+    keys = [f"valid-{i}" if i % 2 == 0 else f"bogus-{i}" for i in range(args.keys)]
+
+    for name in ("cold (coalesced)", "warm (cached)"):
+        wall, calls, valid = await burst(validator, keys, args.requests)
+        print(f"{name:<18} {args.requests} validations  wall {wall:6.3f}s  "
+              f"keygen requests {calls:4d}  valid {valid}")
+
+    # Keygen slower than the timeout: callers get an answer after KEYGEN_TIMEOUT
+    app.state.latency = settings.KEYGEN_TIMEOUT * 4
+    validator.clear()
+    wall, calls, valid = await burst(validator, keys, args.requests)
+    print(f"{'keygen too slow':<18} {args.requests} validations  wall {wall:6.3f}s  "
+          f"keygen requests {calls:4d}  valid {valid}")
+
+    await validator.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--keys", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.2)
+    parser.add_argument("--port", type=int, default=8787)
+    args = parser.parse_args()
+
+    app = create_app(args.latency)
+    server = start_stub(app, args.port)
+
+    settings.KEYGEN_API_URL = f"http://127.0.0.1:{args.port}/v1"
+    settings.KEYGEN_ACCOUNT_ID = "stub"
+    settings.KEYGEN_TIMEOUT = 1.0
+
+    try:
+        asyncio.run(run(args, app))
+    finally:
+        server.should_exit = True
+
+
+if __name__ == "__main__":
+    main()
@@ -34,11 +34,110 @@ export async function uploadAudio(file, onProgress) {
   }
 }
 
+// Direct uploads: parts go from the browser straight to storage through
+// presigned URLs, interrupted uploads resume from localStorage
+const UPLOAD_CONCURRENCY = 4
+const PART_RETRIES = 3
+
+function uploadStateKey(file) {
+  return `upload:${file.name}:${file.size}:${file.lastModified}`
+}
+
+async function startOrResumeUpload(file) {
+  const key = uploadStateKey(file)
+  const saved = JSON.parse(localStorage.getItem(key) || 'null')
+
+  if (saved) {
+    try {
+      const response = await api.get(`/api/uploads/${encodeURIComponent(saved.upload_id)}`, {
+        params: { object_name: saved.object_name, part_count: saved.part_count }
+      })
+      return { ...saved, ...response.data }
+    } catch (error) {
+      // Expired or aborted, start over
+      localStorage.removeItem(key)
+    }
+  }
+
+  const response = await api.post('/api/uploads', { filename: file.name, size: file.size })
+  const { upload_id, object_name, part_size, part_count } = response.data
+  localStorage.setItem(key, JSON.stringify({ upload_id, object_name, part_size, part_count }))
+  return { ...response.data, uploaded: [] }
+}
+
+async function uploadPart(file, upload, part, onPartProgress) {
+  const start = (part.part_number - 1) * upload.part_size
+  const blob = file.slice(start, Math.min(start + upload.part_size, file.size))
+
+  for (let attempt = 1; ; attempt++) {
+    try {
+      // Plain axios: presigned URLs must not get our credentials or headers
+      await axios.put(part.url, blob, {
+        headers: { 'Content-Type': 'application/octet-stream' },
+        onUploadProgress: progressEvent => onPartProgress(progressEvent.loaded)
+      })
+      onPartProgress(blob.size)
+      return
+    } catch (error) {
+      onPartProgress(0)
+      if (attempt >= PART_RETRIES) {
+        throw error
+      }
+      await new Promise(resolve => setTimeout(resolve, 1000 * 2 ** (attempt - 1)))
+    }
+  }
+}
+
+export async function uploadAudioDirect(file, onProgress) {
+  const upload = await startOrResumeUpload(file)
+
+  // Count parts uploaded before an interruption as done
+  const uploadedBefore = upload.uploaded.reduce((total, part) => total + part.size, 0)
+  const partLoaded = {}
+  const reportProgress = () => {
+    if (onProgress) {
+      const loaded = uploadedBefore + Object.values(partLoaded).reduce((a, b) => a + b, 0)
+      onProgress(Math.min(100, Math.round((loaded * 100) / file.size)))
+    }
+  }
+  reportProgress()
+
+  // Upload the missing parts, UPLOAD_CONCURRENCY at a time
+  const queue = [...upload.parts]
+  const worker = async () => {
+    while (queue.length) {
+      const part = queue.shift()
+      await uploadPart(file, upload, part, loaded => {
+        partLoaded[part.part_number] = loaded
+        reportProgress()
+      })
+    }
+  }
+  await Promise.all(Array.from({ length: Math.min(UPLOAD_CONCURRENCY, queue.length) }, worker))
+
+  try {
+    const response = await api.post(`/api/uploads/${encodeURIComponent(upload.upload_id)}/complete`, {
+      object_name: upload.object_name,
+      size: file.size
+    })
+    localStorage.removeItem(uploadStateKey(file))
+    return response.data
+  } catch (error) {
+    // Keep the upload resumable if parts are only missing
+    if (error.response?.status !== 409) {
+      localStorage.removeItem(uploadStateKey(file))
+    }
+    throw error
+  }
+}
+
 // Split related functions
-export async function requestSplit(objectName) {
+export async function requestSplit(objectName, formats = null, quality = null) {
   try {
     const response = await api.post('/api/split', {
-      object_name: objectName
+      object_name: objectName,
+      ...(formats && formats.length ? { formats } : {}),
+      ...(quality ? { quality } : {})
     })
 
     return response.data
@@ -48,6 +147,25 @@ export async function requestSplit(objectName) {
   }
 }
 
+// Split several tracks as one batch, whose job reports aggregate progress
+// and, with albumArchive, a single ZIP of all stems
+export async function requestBatchSplit(objectNames, { formats = null, quality = null, albumArchive = false, albumName = null } = {}) {
+  try {
+    const response = await api.post('/api/split/batch', {
+      object_names: objectNames,
+      album_archive: albumArchive,
+      ...(albumName ? { album_name: albumName } : {}),
+      ...(formats && formats.length ? { formats } : {}),
+      ...(quality ? { quality } : {})
+    })
+
+    return response.data
+  } catch (error) {
+    console.error('Batch split request error:', error)
+    throw error
+  }
+}
+
 export async function checkSplitStatus(jobId) {
   try {
     const response = await api.get(`/api/split/${jobId}/status`)
@@ -92,4 +210,42 @@ export function pollJobStatus(jobId, onUpdate, interval = 5000) {
   }
 }
 
+// Follow split job status over Server-Sent Events, falling back to polling
+// if the event stream is unavailable
+export function watchJobStatus(jobId, onUpdate, pollInterval = 5000) {
+  if (typeof EventSource === 'undefined') {
+    return pollJobStatus(jobId, onUpdate, pollInterval)
+  }
+
+  let stopFallback = null
+  const source = new EventSource(`${api.defaults.baseURL}/api/split/${jobId}/events`, {
+    withCredentials: true
+  })
+
+  source.addEventListener('status', event => {
+    const status = JSON.parse(event.data)
+    onUpdate(status)
+
+    // The stream ends with the job, don't let EventSource reconnect
+    if (status.status === 'completed' || status.status === 'failed' || status.status === 'not_found') {
+      source.close()
+    }
+  })
+
+  source.onerror = () => {
+    source.close()
+    if (!stopFallback) {
+      stopFallback = pollJobStatus(jobId, onUpdate, pollInterval)
+    }
+  }
+
+  // Return a function to stop watching
+  return () => {
+    source.close()
+    if (stopFallback) {
+      stopFallback()
+    }
+  }
+}
+
 export default api
\ No newline at end of file
@@ -9,6 +9,11 @@ from fastapi.middleware.cors import CORSMiddleware
 
 from app.routes import split
 from app.utils.audio import setup_processing_dirs
+from app.models.separation_engine import start_engine, stop_engine
+from app.utils.job_executor import start_executor, stop_executor
+from app.utils.job_store import get_job_store, close_job_store
+from app.utils.encoders import stop_encoder_pool
+from app.utils.minio_client import clear_minio_clients
 
 # Configure logging
 logging.basicConfig(
@@ -46,6 +51,11 @@ async def startup_event():
     # Set up processing directories
     setup_processing_dirs()
 
+    # Open the job store, fail jobs cut off by a restart and start expiring old ones
+    job_store = get_job_store()
+    job_store.fail_interrupted()
+    job_store.start_sweeper()
+
     # Log GPU availability for debugging
     try:
         import torch
@@ -61,6 +71,24 @@ async def startup_event():
     except Exception as e:
         logger.error(f"Error checking GPU status: {str(e)}")
 
+    # Start the resident separation engine so models are loaded once
+    start_engine(device="cuda" if os.environ.get("CUDA_VISIBLE_DEVICES") is not None else "cpu")
+
+    # Start the pipeline workers
+    start_executor(position_listener=split.publish_queue_positions)
+
+
+# Shutdown event
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Execute actions on application shutdown."""
+    logger.info("Stopping Splitter Service")
+    stop_executor()
+    stop_encoder_pool()
+    stop_engine()
+    clear_minio_clients()
+    close_job_store()
+
 
 # Health check endpoint
 @app.get("/ping")
@@ -3,14 +3,83 @@ HTDemucs runner for audio source separation.
 """
 import os
 import logging
+import shutil
 import subprocess
+import random
 import tempfile
+import threading
+from concurrent.futures import as_completed
 from pathlib import Path
 
+import numpy as np
+import soundfile as sf
+
 from app.utils.audio import PROCESSED_DIR, convert_to_44100hz, adjust_volume
+from app.models.separation_engine import get_engine, EngineError, SEPARATION_TIMEOUT
 
 logger = logging.getLogger("splitter.demucs")
 
+# Segment-parallel separation: a track is cut into up to this many
+# overlapping windows that engine workers separate side by side (1 = off)
+SEPARATION_PARALLEL_WINDOWS = int(os.environ.get("SEPARATION_PARALLEL_WINDOWS", "1"))
+# Shortest window worth a worker of its own
+SEPARATION_MIN_WINDOW_SECONDS = float(os.environ.get("SEPARATION_MIN_WINDOW_SECONDS", "30"))
+# Run the random-shift passes of a track on different workers and average them
+SEPARATION_PARALLEL_SHIFTS = os.environ.get("SEPARATION_PARALLEL_SHIFTS", "true").lower() == "true"
+
+# Sample rate and segment length of HTDemucs; windows overlap by `overlap`
+# of a segment, like the segments inside a window do
+MODEL_SAMPLERATE = 44100
+MODEL_SEGMENT_SECONDS = 7.8
+
+
+def plan_windows(length, max_windows, min_window, overlap_frames):
+    """
+    Cut a track into overlapping windows of about equal length.
+
+    Args:
+        length: Track length in frames
+        max_windows: Maximum number of windows
+        min_window: Minimum window length in frames
+        overlap_frames: Frames shared by neighbouring windows
+
+    Returns:
+        List of (start, end) frame ranges covering the track
+    """
+    count = max(1, min(max_windows, length // max(min_window, 1)))
+    if count == 1 or length <= overlap_frames:
+        return [(0, length)]
+
+    stride = -(-(length - overlap_frames) // count)
+    return [(index * stride, min(index * stride + stride + overlap_frames, length)) for index in range(count)]
+
+
+def crossfade_weights(start, end, length, overlap_frames):
+    """
+    Overlap-add weights of a window: linear ramps over the frames shared
+    with its neighbours, so the weights of overlapping windows sum to one.
+
+    Args:
+        start: First frame of the window
+        end: End frame of the window
+        length: Track length in frames
+        overlap_frames: Frames shared by neighbouring windows
+
+    Returns:
+        float32 array of end - start weights
+    """
+    weights = np.ones(end - start, dtype=np.float32)
+    ramp_length = min(overlap_frames, end - start)
+    if ramp_length <= 0:
+        # Windows that only touch need no crossfade
+        return weights
+    ramp = np.arange(1, ramp_length + 1, dtype=np.float32) / (ramp_length + 1)
+    if start > 0:
+        weights[:ramp_length] = ramp
+    if end < length:
+        weights[-ramp_length:] = np.minimum(weights[-ramp_length:], ramp[::-1])
+    return weights
+
 
 class HTDemucsRunner:
     """
@@ -26,7 +95,10 @@ class HTDemucsRunner:
             shifts=1,
             split=True,
             overlap=0.25,
-            float32=True
+            float32=True,
+            use_engine=True,
+            parallel_windows=None,
+            parallel_shifts=None
     ):
         """
         Initialize HTDemucs runner.
@@ -40,6 +112,12 @@ class HTDemucsRunner:
             split: Whether to split audio in chunks
             overlap: Overlap between chunks
             float32: Whether to use 32-bit float output
+            use_engine: Use the resident separation engine when it is running
+            parallel_windows: Maximum windows a track is cut into to separate
+                it on several engine workers at once (default:
+                SEPARATION_PARALLEL_WINDOWS, 1 = off)
+            parallel_shifts: Run the shift passes as separate tasks on several
+                engine workers (default: SEPARATION_PARALLEL_SHIFTS)
         """
         self.model_name = model_name
         self.device = device
@@ -49,8 +127,29 @@ class HTDemucsRunner:
         self.split = split
         self.overlap = overlap
         self.float32 = float32
+        self.use_engine = use_engine
+        self.parallel_windows = SEPARATION_PARALLEL_WINDOWS if parallel_windows is None else parallel_windows
+        self.parallel_shifts = SEPARATION_PARALLEL_SHIFTS if parallel_shifts is None else parallel_shifts
 
-    def separate(self, input_file, output_dir=None, filename_prefix=None):
+    def settings(self):
+        """
+        Get the runner settings as a plain dictionary.
+
+        Returns:
+            Dictionary of model and separation parameters
+        """
+        return {
+            "model_name": self.model_name,
+            "device": self.device,
+            "model_dir": self.model_dir,
+            "stems": self.stems,
+            "shifts": self.shifts,
+            "split": self.split,
+            "overlap": self.overlap,
+            "float32": self.float32
+        }
+
+    def separate(self, input_file, output_dir=None, filename_prefix=None, progress_callback=None):
         """
         Separate audio sources using HTDemucs.
 
@@ -58,6 +157,8 @@ class HTDemucsRunner:
             input_file: Path to input audio file
             output_dir: Directory to save separated stems (default: PROCESSED_DIR)
             filename_prefix: Prefix for output filenames
+            progress_callback: Optional callable receiving the completed fraction
+                (0-1) per segment; only called when the engine is running
 
         Returns:
             Dictionary with paths to separated stems
@@ -83,39 +184,18 @@ class HTDemucsRunner:
             temp_input_file = os.path.join(output_dir, f"{filename_prefix}_temp.wav")
             adjust_volume(converted_input, temp_input_file, -10)
 
-            # Build command for Demucs
-            cmd = [
-                "python", "-m", "demucs.separate",
-                "--out", str(output_dir),
-                "--name", self.model_name,
-                "-d", self.device,
-                "--shifts", str(self.shifts)
-            ]
-
-            # Add optional arguments
-            if self.float32:
-                cmd.append("--float32")
-
-            if not self.split:
-                cmd.append("--no-split")
+            engine = get_engine() if self.use_engine else None
+            if engine is not None:
+                # Run on the resident engine, models are already loaded
+                logger.info(f"Running HTDemucs on resident engine for {temp_input_file}")
+                engine.separate(
+                    temp_input_file,
+                    output_dir,
+                    self.settings(),
+                    progress_callback=progress_callback
+                )
             else:
-                cmd.append(f"--overlap={self.overlap}")
-
-            if self.stems:
-                cmd.append("--stems")
-                cmd.append(",".join(self.stems))
-
-            # Add input file
-            cmd.append(str(temp_input_file))
-
-            # Run Demucs
-            logger.info(f"Running HTDemucs with command: {' '.join(cmd)}")
-            process = subprocess.run(
-                cmd,
-                check=True,
-                capture_output=True,
-                text=True
-            )
+                self._run_subprocess(temp_input_file, output_dir)
 
             # Get paths to separated stems
             model_output_dir = os.path.join(output_dir, self.model_name)
@@ -150,4 +230,190 @@ class HTDemucsRunner:
 
         except Exception as e:
             logger.error(f"Error during source separation: {str(e)}")
-            return None
\ No newline at end of file
+            return None
+
+    def separate_array(self, audio, samplerate, progress_callback=None):
+        """
+        Separate audio held in memory using HTDemucs.
+
+        Args:
+            audio: (frames, channels) float32 array
+            samplerate: Sample rate of the audio
+            progress_callback: Optional callable receiving the completed fraction
+                (0-1) per segment; only called when the engine is running
+
+        Returns:
+            Dictionary mapping stem names to (frames, channels) float32 arrays
+        """
+        engine = get_engine() if self.use_engine else None
+        if engine is not None:
+            # Spread one track over several workers: windows need the model's
+            # sample rate, shift passes only more than one worker
+            windows = min(self.parallel_windows, engine.num_workers) if samplerate == MODEL_SAMPLERATE else 1
+            shift_passes = self.parallel_shifts and self.shifts > 1 and engine.num_workers > 1
+            if windows > 1 or shift_passes:
+                stems = self.separate_parallel(
+                    engine,
+                    np.ascontiguousarray(audio.T, dtype=np.float32),
+                    samplerate,
+                    max_windows=windows,
+                    shift_passes=shift_passes,
+                    progress_callback=progress_callback
+                )
+            else:
+                stems = engine.separate_array(
+                    np.ascontiguousarray(audio.T, dtype=np.float32),
+                    samplerate,
+                    self.settings(),
+                    progress_callback=progress_callback
+                )
+            return {stem_name: np.ascontiguousarray(data.T) for stem_name, data in stems.items()}
+
+        # Without the engine, go through the command line in a scratch directory
+        os.makedirs(PROCESSED_DIR, exist_ok=True)
+        work_dir = tempfile.mkdtemp(prefix="demucs_", dir=PROCESSED_DIR)
+        try:
+            input_file = os.path.join(work_dir, "mix.wav")
+            sf.write(input_file, audio, samplerate, subtype='FLOAT')
+            self._run_subprocess(input_file, work_dir)
+
+            track_output_dir = os.path.join(work_dir, self.model_name, "mix")
+            stems = {}
+            for stem_file in os.listdir(track_output_dir):
+                if stem_file.endswith(".wav"):
+                    data, _ = sf.read(os.path.join(track_output_dir, stem_file), dtype='float32', always_2d=True)
+                    stems[stem_file.split(".")[-2]] = data
+            return stems
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    def separate_parallel(self, engine, audio, samplerate, max_windows=1, shift_passes=False, progress_callback=None):
+        """
+        Separate a track as several engine tasks that run on different workers.
+
+        With max_windows > 1 the track is cut into overlapping windows, which
+        overlap by `overlap` of a model segment and are normalized with the
+        statistics of the whole track. With shift_passes every random-shift
+        pass is a task of its own. The passes of a window are averaged and
+        the windows crossfaded back together with overlap-add weights.
+
+        Args:
+            engine: SeparationEngine (or any object with its `submit` and `cancel`)
+            audio: (channels, frames) float32 array
+            samplerate: Sample rate of the audio (MODEL_SAMPLERATE for windows)
+            max_windows: Maximum number of windows
+            shift_passes: Run each of the `shifts` passes as its own task
+            progress_callback: Optional callable receiving the completed fraction
+
+        Returns:
+            Dictionary mapping stem names to (channels, frames) float32 arrays
+        """
+        length = audio.shape[-1]
+        overlap_frames = int(self.overlap * MODEL_SEGMENT_SECONDS * samplerate)
+        windows = plan_windows(
+            length,
+            max_windows,
+            int(SEPARATION_MIN_WINDOW_SECONDS * samplerate),
+            overlap_frames
+        )
+
+        # Offsets drawn like apply_model draws them; None runs all shifts in one task
+        offsets = [None]
+        if shift_passes and self.shifts > 1:
+            max_shift = int(0.5 * MODEL_SAMPLERATE)
+            offsets = [random.randint(0, max_shift) for _ in range(self.shifts)]
+
+        settings = {**self.settings(), "kind": "array", "samplerate": samplerate}
+        if len(windows) > 1:
+            mono = audio.mean(axis=0)
+            settings["norm"] = (float(mono.mean()), float(mono.std()))
+
+        parts = [(start, end, offset) for start, end in windows for offset in offsets]
+        fractions = [0.0] * len(parts)
+        fractions_lock = threading.Lock()
+
+        def part_progress(index):
+            def report(fraction):
+                with fractions_lock:
+                    fractions[index] = fraction
+                    done = sum(f * (end - start) for f, (start, end, _) in zip(fractions, parts))
+                progress_callback(done / (length * len(offsets)))
+            return report if progress_callback is not None else None
+
+        logger.info(
+            f"Separating {length / samplerate:.1f}s of audio as {len(windows)} window(s) "
+            f"x {len(offsets)} pass(es) in parallel"
+        )
+        futures = {}
+        for index, (start, end, offset) in enumerate(parts):
+            task = {**settings, "audio": np.ascontiguousarray(audio[:, start:end])}
+            if offset is not None:
+                task["shift_offset"] = offset
+            futures[engine.submit(task, progress_callback=part_progress(index))] = (start, end)
+
+        # Add results up as they arrive, so finished parts are not held
+        stems = {}
+        total_weights = np.zeros(length, dtype=np.float32)
+        try:
+            for future in as_completed(futures, timeout=SEPARATION_TIMEOUT):
+                start, end = futures.pop(future)
+                part_stems = future.result()
+                weights = crossfade_weights(start, end, length, overlap_frames) / len(offsets)
+                for stem_name, data in part_stems.items():
+                    if data.shape[-1] != end - start:
+                        raise EngineError(f"Part of {end - start} frames came back with {data.shape[-1]}")
+                    if stem_name not in stems:
+                        stems[stem_name] = np.zeros((data.shape[0], length), dtype=np.float32)
+                    stems[stem_name][:, start:end] += data * weights
+                total_weights[start:end] += weights
+        except BaseException:
+            # The track has failed, so the other parts would only hold workers
+            for future in futures:
+                engine.cancel(future)
+            raise
+
+        for data in stems.values():
+            data /= total_weights
+        return stems
+
+    def _run_subprocess(self, input_file, output_dir):
+        """
+        Run HTDemucs through the Demucs command line in a fresh process.
+
+        Args:
+            input_file: Path to the (volume adjusted) input file
+            output_dir: Directory to save separated stems
+        """
+        # Build command for Demucs
+        cmd = [
+            "python", "-m", "demucs.separate",
+            "--out", str(output_dir),
+            "--name", self.model_name,
+            "-d", self.device,
+            "--shifts", str(self.shifts)
+        ]
+
+        # Add optional arguments
+        if self.float32:
+            cmd.append("--float32")
+
+        if not self.split:
+            cmd.append("--no-split")
+        else:
+            cmd.append(f"--overlap={self.overlap}")
+
+        if self.stems:
+            cmd.append("--stems")
+            cmd.append(",".join(self.stems))
+
+        # Add input file
+        cmd.append(str(input_file))
+
+        # Run Demucs
+        logger.info(f"Running HTDemucs with command: {' '.join(cmd)}")
+        subprocess.run(
+            cmd,
+            check=True,
+            capture_output=True,
+            text=True
+        )
@@ -0,0 +1,251 @@
+"""
+Resident models of a separation engine worker.
+
+A worker keeps every model it has loaded in a ModelRegistry. When the
+models would exceed SEPARATION_MODEL_MEMORY_MB, the least recently used
+models that no task is running are evicted before another one is loaded.
+Hits, misses, evictions and load times are counted per model, so nodes can
+be sized for the quality presets they serve. A lookup that waited for
+another thread to load the model is counted as coalesced, not as a hit.
+"""
+import os
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+logger = logging.getLogger("splitter.models")
+
+# Memory budget for the models of one worker in MB (0 = no limit)
+SEPARATION_MODEL_MEMORY_MB = float(os.environ.get("SEPARATION_MODEL_MEMORY_MB", "0"))
+
+
+def model_bytes(model):
+    """
+    Estimate the memory held by a model from its parameters and buffers.
+
+    Args:
+        model: torch module or Demucs bag of models
+
+    Returns:
+        Size in bytes
+    """
+    tensors = list(model.parameters()) + list(model.buffers())
+    return sum(tensor.numel() * tensor.element_size() for tensor in tensors)
+
+
+class _Entry:
+    """
+    A resident model.
+    """
+    __slots__ = ("model", "size", "users")
+
+    def __init__(self, model, size):
+        self.model = model
+        self.size = size
+        self.users = 0
+
+
+class ModelRegistry:
+    """
+    LRU cache of loaded models under a memory budget.
+    """
+
+    def __init__(self, budget_mb=SEPARATION_MODEL_MEMORY_MB, on_change=None):
+        """
+        Initialize the registry.
+
+        Args:
+            budget_mb: Memory budget in MB (0 = no limit)
+            on_change: Optional callable receiving the registry's snapshot
+                after every lookup
+        """
+        self.budget = int(budget_mb * 1024 * 1024)
+        self.on_change = on_change
+
+        self._entries = OrderedDict()  # key -> _Entry, least recently used first
+        self._sizes = {}  # key -> size of the model when it was last loaded
+        self._load_locks = {}  # key -> lock held while the model loads
+        self._stats = {}  # model name -> counters
+        self._lock = threading.Lock()
+
+    def acquire(self, key, load):
+        """
+        Get a model, loading it on a miss. The model is not evicted until it
+        is released.
+
+        Args:
+            key: (model_name, device, model_dir) tuple
+            load: Callable loading the model on a miss
+
+        Returns:
+            The loaded model
+        """
+        started = time.perf_counter()
+        model = self._use(key)
+        if model is not None:
+            self._record(key, "hit", time.perf_counter() - started)
+            return model
+
+        # One load per key at a time; the others wait for it
+        with self._lock:
+            load_lock = self._load_locks.setdefault(key, threading.Lock())
+        with load_lock:
+            model = self._use(key)
+            if model is not None:
+                self._record(key, "coalesced", time.perf_counter() - started)
+                return model
+
+            # Make room for the size seen the last time this model was loaded
+            self._evict(self._sizes.get(key, 0))
+            model = load()
+            size = model_bytes(model)
+
+            with self._lock:
+                self._sizes[key] = size
+                entry = self._entries[key] = _Entry(model, size)
+                entry.users += 1
+            self._evict(0)
+
+        self._record(key, "miss", time.perf_counter() - started)
+        logger.info(f"Model {key[0]} resident ({size / 1024 / 1024:.0f} MB, {self.resident_bytes() / 1024 / 1024:.0f} MB in total)")
+        return model
+
+    def release(self, key):
+        """
+        Mark one use of a model as finished.
+
+        Args:
+            key: Key the model was acquired with
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                entry.users = max(0, entry.users - 1)
+
+    def put(self, key, model):
+        """
+        Add an already loaded model, evicting idle models to make room.
+
+        Args:
+            key: (model_name, device, model_dir) tuple
+            model: The loaded model
+        """
+        size = model_bytes(model)
+        with self._lock:
+            self._entries.pop(key, None)
+        self._evict(size)
+        with self._lock:
+            self._sizes[key] = size
+            self._entries[key] = _Entry(model, size)
+
+    def resident_bytes(self):
+        """
+        Get the estimated memory of all resident models in bytes.
+        """
+        with self._lock:
+            return sum(entry.size for entry in self._entries.values())
+
+    def snapshot(self):
+        """
+        Get the registry's metrics.
+
+        Returns:
+            Dictionary with the budget, resident memory and per-model
+            counters (hits, lookups coalesced into another thread's load,
+            misses, evictions, total seconds of hit lookups, of coalesced
+            lookups and of loads, slowest load, size and whether it is
+            resident)
+        """
+        with self._lock:
+            resident = {key[0] for key in self._entries}
+            models = {
+                name: {
+                    **stats,
+                    "resident": name in resident,
+                    "bytes": max((size for key, size in self._sizes.items() if key[0] == name), default=0)
+                }
+                for name, stats in self._stats.items()
+            }
+            return {
+                "budget_bytes": self.budget,
+                "resident_bytes": sum(entry.size for entry in self._entries.values()),
+                "models": models
+            }
+
+    def _use(self, key):
+        """
+        Look up a resident model and count one more user of it.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            entry.users += 1
+            return entry.model
+
+    def _evict(self, incoming):
+        """
+        Evict least recently used idle models until `incoming` more bytes fit
+        in the budget.
+        """
+        if not self.budget:
+            return
+
+        evicted = []
+        with self._lock:
+            resident = sum(entry.size for entry in self._entries.values())
+            for key in list(self._entries):
+                if resident + incoming <= self.budget:
+                    break
+                entry = self._entries[key]
+                if entry.users:
+                    continue
+                del self._entries[key]
+                resident -= entry.size
+                evicted.append(key)
+                self._counters(key[0])["evictions"] += 1
+
+        for key in evicted:
+            logger.info(f"Evicted model {key[0]} to stay within {self.budget / 1024 / 1024:.0f} MB")
+        if resident + incoming > self.budget:
+            logger.warning(
+                f"Models in use need {(resident + incoming) / 1024 / 1024:.0f} MB, "
+                f"over the budget of {self.budget / 1024 / 1024:.0f} MB"
+            )
+
+    def _counters(self, name):
+        """
+        Get the counters of a model. Must be called with the lock held.
+        """
+        return self._stats.setdefault(name, {
+            "hits": 0,
+            "coalesced": 0,
+            "misses": 0,
+            "evictions": 0,
+            "hit_seconds": 0.0,
+            "coalesced_seconds": 0.0,
+            "load_seconds": 0.0,
+            "max_load_seconds": 0.0
+        })
+
+    def _record(self, key, outcome, seconds):
+        """
+        Count a hit, coalesced lookup or miss and its time, then report the
+        new snapshot.
+        """
+        with self._lock:
+            stats = self._counters(key[0])
+            if outcome == "hit":
+                stats["hits"] += 1
+                stats["hit_seconds"] += seconds
+            elif outcome == "coalesced":
+                stats["coalesced"] += 1
+                stats["coalesced_seconds"] += seconds
+            else:
+                stats["misses"] += 1
+                stats["load_seconds"] += seconds
+                stats["max_load_seconds"] = max(stats["max_load_seconds"], seconds)
+        if self.on_change is not None:
+            self.on_change(self.snapshot())
@@ -0,0 +1,59 @@
+"""
+Quality presets for stem separation.
+
+A split request picks a quality ("quality"), which maps to a model and the
+HTDemucsRunner parameters it is run with. This is independent of the
+scheduling tier ("tier"), which only sets a job's share of the workers.
+"""
+import os
+
+from app.models.demucs_runner import HTDemucsRunner
+
+# Model and runner parameters per quality
+QUALITY_PRESETS = {
+    # Fast preview: single pass, minimal segment overlap
+    "preview": {"model_name": "htdemucs", "shifts": 0, "overlap": 0.1},
+    "standard": {"model_name": "htdemucs", "shifts": 1, "overlap": 0.25},
+    # Fine-tuned bag of models averaged over more random shifts
+    "mastering": {"model_name": "htdemucs_ft", "shifts": 5, "overlap": 0.25},
+}
+
+DEFAULT_QUALITY = os.environ.get("DEFAULT_QUALITY", "standard")
+
+
+def validate_quality(quality):
+    """
+    Validate a requested quality.
+
+    Args:
+        quality: Quality name, or None for DEFAULT_QUALITY
+
+    Returns:
+        The quality name
+
+    Raises:
+        ValueError: If the quality is unknown
+    """
+    quality = quality or DEFAULT_QUALITY
+    if quality not in QUALITY_PRESETS:
+        raise ValueError(f"Unknown quality '{quality}', expected one of: {', '.join(QUALITY_PRESETS)}")
+    return quality
+
+
+def runner_for_quality(quality, device):
+    """
+    Create the HTDemucsRunner of a quality preset.
+
+    Args:
+        quality: Quality name, or None for DEFAULT_QUALITY
+        device: Device to run on (cuda, cpu)
+
+    Returns:
+        Configured HTDemucsRunner
+    """
+    return HTDemucsRunner(
+        device=device,
+        split=True,
+        float32=True,
+        **QUALITY_PRESETS[validate_quality(quality)]
+    )
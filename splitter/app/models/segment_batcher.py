@@ -0,0 +1,208 @@
+"""
+Cross-task micro-batching of Demucs segments.
+
+`apply_model` splits a track into fixed-length segments and hands each one to
+a pool. Inside an engine worker that pool is a SegmentBatcher: segments of
+every task running on the worker are queued together and a single inference
+thread runs them through the model in batches of up to SEPARATION_MAX_BATCH,
+waiting at most SEPARATION_BATCH_WAIT_MS for a batch to fill. Each output
+segment goes back to the `apply_model` call that submitted it, which does the
+overlap-add for its own track as before.
+"""
+import os
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+
+logger = logging.getLogger("splitter.batcher")
+
+# Batching settings
+SEPARATION_MAX_BATCH = int(os.environ.get("SEPARATION_MAX_BATCH", "1"))
+SEPARATION_BATCH_WAIT_MS = float(os.environ.get("SEPARATION_BATCH_WAIT_MS", "20"))
+
+
+class _Segment:
+    """
+    A segment waiting for its forward pass.
+    """
+    __slots__ = ("model", "chunk", "length", "valid_length", "device", "key", "future", "queued_at")
+
+    def __init__(self, model, chunk, length, valid_length, device):
+        self.model = model
+        self.chunk = chunk
+        self.length = length
+        self.valid_length = valid_length
+        self.device = device
+        # Only segments of the same model and padded shape can share a batch
+        self.key = (id(model), valid_length, str(device))
+        self.future = Future()
+        self.queued_at = time.monotonic()
+
+
+class SegmentBatcher:
+    """
+    Runs segments submitted by concurrent `apply_model` calls in batches.
+    """
+
+    def __init__(self, max_batch=SEPARATION_MAX_BATCH, max_wait_ms=SEPARATION_BATCH_WAIT_MS, on_batch=None):
+        """
+        Initialize the batcher.
+
+        Args:
+            max_batch: Maximum number of segments per forward pass
+            max_wait_ms: Milliseconds the oldest queued segment waits for a
+                batch to fill before it is run anyway
+            on_batch: Optional callable receiving (batch size, seconds) after
+                every forward pass
+        """
+        self.max_batch = max(1, max_batch)
+        self.max_wait = max(0.0, max_wait_ms) / 1000.0
+        self.on_batch = on_batch
+
+        self._queue = deque()
+        self._cond = threading.Condition()
+        self._thread = None
+        self._stopping = False
+
+        self.segments = 0
+        self.batches = 0
+        self.busy_seconds = 0.0
+
+    def start(self):
+        """
+        Start the inference thread.
+        """
+        self._thread = threading.Thread(target=self._run, name="segment-batcher", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self, timeout=10.0):
+        """
+        Run the segments still queued, then stop the inference thread.
+        """
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def submit(self, func, model, mix, **kwargs):
+        """
+        Queue a segment, with the signature of a pool used by `apply_model`.
+
+        Calls that are not a plain forward pass of one segment (shifts or
+        nested splitting) run inline.
+
+        Args:
+            func: Function `apply_model` wants to run (apply_model itself)
+            model: Model the segment is run through
+            mix: TensorChunk of shape (1, channels, frames)
+            **kwargs: Arguments `apply_model` passes on
+
+        Returns:
+            Future resolved with the (1, sources, channels, frames) output
+        """
+        from demucs.apply import tensor_chunk
+        from demucs.htdemucs import HTDemucs
+
+        if kwargs.get("shifts") or kwargs.get("split") or mix.shape[0] != 1:
+            future = Future()
+            future.set_result(func(model, mix, **kwargs))
+            return future
+
+        # Same padding as the forward pass at the end of apply_model
+        length = mix.shape[-1]
+        segment = kwargs.get("segment")
+        if isinstance(model, HTDemucs) and segment is not None:
+            valid_length = int(segment * model.samplerate)
+        elif hasattr(model, "valid_length"):
+            valid_length = model.valid_length(length)
+        else:
+            valid_length = length
+
+        item = _Segment(model, tensor_chunk(mix), length, valid_length, kwargs.get("device"))
+        with self._cond:
+            if self._stopping:
+                raise RuntimeError("Segment batcher is stopped")
+            self._queue.append(item)
+            self._cond.notify_all()
+        return item.future
+
+    def _run(self):
+        """
+        Inference thread loop.
+        """
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+            self._forward(batch)
+
+    def _next_batch(self):
+        """
+        Wait for a batch: max_batch segments sharing the oldest segment's
+        key, or whatever is queued once that segment has waited max_wait.
+
+        Returns:
+            List of segments, or None once stopped and drained
+        """
+        with self._cond:
+            while not self._queue:
+                if self._stopping:
+                    return None
+                self._cond.wait()
+
+            key = self._queue[0].key
+            deadline = self._queue[0].queued_at + self.max_wait
+            while not self._stopping:
+                ready = sum(1 for item in self._queue if item.key == key)
+                remaining = deadline - time.monotonic()
+                if ready >= self.max_batch or remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+
+            batch = []
+            rest = deque()
+            for item in self._queue:
+                if item.key == key and len(batch) < self.max_batch:
+                    batch.append(item)
+                else:
+                    rest.append(item)
+            self._queue = rest
+            return batch
+
+    def _forward(self, batch):
+        """
+        Run one batch through its model and hand each output to its caller.
+        """
+        import torch
+        from demucs.utils import center_trim
+
+        started = time.perf_counter()
+        try:
+            model = batch[0].model
+            inputs = torch.cat([item.chunk.padded(item.valid_length) for item in batch])
+            if batch[0].device is not None:
+                inputs = inputs.to(batch[0].device)
+
+            with torch.no_grad():
+                outputs = model(inputs)
+
+            for index, item in enumerate(batch):
+                item.future.set_result(center_trim(outputs[index:index + 1], item.length))
+        except Exception as e:
+            logger.error(f"Batched forward pass of {len(batch)} segment(s) failed: {str(e)}")
+            for item in batch:
+                if not item.future.done():
+                    item.future.set_exception(e)
+            return
+
+        seconds = time.perf_counter() - started
+        self.segments += len(batch)
+        self.batches += 1
+        self.busy_seconds += seconds
+        if self.on_batch is not None:
+            self.on_batch(len(batch), seconds)
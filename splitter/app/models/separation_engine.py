@@ -0,0 +1,948 @@
+"""
+Resident separation engine for HTDemucs.
+
+Keeps a small pool of long-lived worker processes that import torch and load
+the Demucs models once, then accept separation tasks over multiprocessing
+queues. A supervisor thread in the parent process routes results back to the
+callers and restarts workers that die, so a crash in the model code still only
+takes down the task that was running on that worker.
+"""
+import os
+import logging
+import threading
+import time
+import uuid
+import queue
+import math
+import random
+import multiprocessing as mp
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from pathlib import Path
+
+from app.models.model_registry import ModelRegistry, SEPARATION_MODEL_MEMORY_MB
+from app.models.segment_batcher import SegmentBatcher, SEPARATION_MAX_BATCH, SEPARATION_BATCH_WAIT_MS
+
+logger = logging.getLogger("splitter.engine")
+
+# Engine settings
+SEPARATION_WORKERS = int(os.environ.get("SEPARATION_WORKERS", "1"))
+SEPARATION_TIMEOUT = float(os.environ.get("SEPARATION_TIMEOUT", "3600"))
+PRELOAD_MODELS = [m for m in os.environ.get("PRELOAD_MODELS", "htdemucs").split(",") if m]
+# Tasks each worker runs at once; their segments are batched together. Opt-in
+# like batching: every extra task adds its own audio and activations to the
+# worker's memory
+SEPARATION_WORKER_TASKS = int(os.environ.get("SEPARATION_WORKER_TASKS", "1"))
+# Intra-op torch threads per worker (0 = the cores divided among the workers)
+SEPARATION_TORCH_THREADS = int(os.environ.get("SEPARATION_TORCH_THREADS", "0"))
+
+# Minimum seconds between progress messages sent by a worker
+ENGINE_PROGRESS_INTERVAL = 0.25
+
+
+class EngineError(Exception):
+    """Raised when a separation task fails inside the engine."""
+
+
+def _load_model(model_name, device, model_dir=None):
+    """
+    Load a pretrained Demucs model onto the given device.
+
+    Args:
+        model_name: Name of the pretrained model
+        device: Device to load the model on (cuda, cpu)
+        model_dir: Optional local model repository
+
+    Returns:
+        The loaded model in eval mode
+    """
+    from demucs.pretrained import get_model
+
+    started = time.time()
+    model = get_model(name=model_name, repo=Path(model_dir) if model_dir else None)
+    model.to(device)
+    model.eval()
+    logger.info(f"Loaded model {model_name} on {device} in {time.time() - started:.1f}s")
+    return model
+
+
+class _SegmentPool:
+    """
+    Pool for `apply_model` that counts finished segments.
+
+    Demucs submits every segment of every shift and sub-model to the pool,
+    so counting completed submissions gives per-segment progress. Segments
+    run on the worker's SegmentBatcher when there is one, inline otherwise.
+    """
+
+    class _Result:
+        def __init__(self, pool, func, args, kwargs):
+            self.pool = pool
+            self.func = func
+            self.args = args
+            self.kwargs = kwargs
+            self.future = None
+            if pool.batcher is not None:
+                self.future = pool.batcher.submit(func, *args, **kwargs)
+
+        def result(self):
+            if self.future is not None:
+                out = self.future.result()
+            else:
+                out = self.func(*self.args, **self.kwargs)
+            self.pool.done += 1
+            if self.pool.report is not None:
+                self.pool.report(self.pool.done, self.pool.total)
+            return out
+
+    def __init__(self, total, report=None, batcher=None):
+        """
+        Initialize the pool.
+
+        Args:
+            total: Expected number of segments
+            report: Optional callable taking (segments done, segments expected)
+            batcher: Optional SegmentBatcher running the segments
+        """
+        self.total = max(1, total)
+        self.done = 0
+        self.report = report
+        self.batcher = batcher
+
+    def submit(self, func, *args, **kwargs):
+        return _SegmentPool._Result(self, func, args, kwargs)
+
+
+def _count_segments(model, length, shifts, split, overlap):
+    """
+    Estimate how many segments `apply_model` will run for an input.
+
+    With shifts, each pass covers a randomly shifted input of between
+    `length` and `length + max_shift` frames, so the middle is used.
+
+    Args:
+        model: Loaded model or bag of models
+        length: Input length in frames at the model's sample rate
+        shifts: Number of random shifts
+        split: Whether the input is split into segments
+        overlap: Overlap between segments
+
+    Returns:
+        Expected number of segments
+    """
+    from demucs.apply import BagOfModels
+
+    if not split:
+        return 1
+
+    total = 0
+    for sub_model in (model.models if isinstance(model, BagOfModels) else [model]):
+        segment_length = int(sub_model.samplerate * float(sub_model.segment))
+        stride = max(1, int((1 - overlap) * segment_length))
+        if shifts:
+            max_shift = int(0.5 * sub_model.samplerate)
+            total += shifts * math.ceil((length + max_shift / 2) / stride)
+        else:
+            total += math.ceil(length / stride)
+    return total
+
+
+def _run_model(models, task, wav, samplerate, report=None, batcher=None):
+    """
+    Run a resident model on a (channels, frames) float tensor.
+
+    Args:
+        models: ModelRegistry of the worker, keyed by (model_name, device, model_dir)
+        task: Task payload with the runner settings
+        wav: Input audio tensor
+        samplerate: Sample rate of the input
+        report: Optional callable taking (segments done, segments expected)
+        batcher: Optional SegmentBatcher shared by the worker's tasks
+
+    Returns:
+        Tuple of (model, sources tensor of shape (sources, channels, frames))
+    """
+    model_name = task["model_name"]
+    device = task["device"]
+    key = (model_name, device, task.get("model_dir"))
+    model = models.acquire(key, lambda: _load_model(model_name, device, task.get("model_dir")))
+    try:
+        return model, _apply(model, task, wav, samplerate, report, batcher)
+    finally:
+        models.release(key)
+
+
+def _apply(model, task, wav, samplerate, report=None, batcher=None):
+    """
+    Normalize the input, run `apply_model` and undo the normalization.
+
+    Random shifts are run here rather than inside `apply_model`: a task
+    either runs `shifts` passes at random offsets, or the single pass at
+    "shift_offset" when the parent spreads the passes of a track over
+    several workers. When segments are batched, the passes run concurrently
+    so segments of different passes share forward passes.
+
+    Returns:
+        Sources tensor of shape (sources, channels, frames)
+    """
+    import torch
+    from demucs.apply import apply_model
+    from demucs.audio import convert_audio
+
+    device = task["device"]
+    max_shift = int(0.5 * model.samplerate)
+
+    # Match the model's sample rate and channel layout
+    wav = convert_audio(wav, samplerate, model.samplerate, model.audio_channels)
+
+    # Normalize the same way the Demucs CLI does. Windows of a longer track
+    # carry the statistics of the whole track, so they are scaled alike
+    if task.get("norm") is not None:
+        ref_mean, ref_std = task["norm"]
+    else:
+        ref = wav.mean(0)
+        ref_mean, ref_std = ref.mean().item(), ref.std().item()
+    wav = (wav - ref_mean) / ref_std
+
+    if task.get("shift_offset") is not None:
+        offsets = [min(max(int(task["shift_offset"]), 0), max_shift)]
+    else:
+        offsets = [random.randint(0, max_shift) for _ in range(task["shifts"])]
+
+    pool = None
+    if report is not None or batcher is not None:
+        lengths = [wav.shape[-1] + max_shift - offset for offset in offsets] or [wav.shape[-1]]
+        total = sum(_count_segments(model, length, 0, task["split"], task["overlap"]) for length in lengths)
+        pool = _SegmentPool(total, report, batcher)
+
+    def run(mix):
+        with torch.no_grad():
+            return apply_model(
+                model,
+                mix,
+                device=device,
+                shifts=0,
+                split=task["split"],
+                overlap=task["overlap"],
+                progress=False,
+                pool=pool
+            )
+
+    if not offsets:
+        sources = run(wav[None])[0]
+    elif len(offsets) > 1 and batcher is not None and batcher.max_batch > 1:
+        with ThreadPoolExecutor(len(offsets), thread_name_prefix="shift-pass") as passes:
+            sources = sum(passes.map(lambda offset: _shifted_pass(run, wav, offset, max_shift), offsets))
+        sources /= len(offsets)
+    else:
+        sources = sum(_shifted_pass(run, wav, offset, max_shift) for offset in offsets) / len(offsets)
+
+    return sources * ref_std + ref_mean
+
+
+def _shifted_pass(run, wav, offset, max_shift):
+    """
+    Run one random-shift pass the way `apply_model` does: on the input
+    padded by `max_shift` on both sides, starting `offset` frames in.
+
+    Args:
+        run: Callable running `apply_model` without shifts on a mix
+        wav: (channels, frames) input tensor
+        offset: Shift in frames, between 0 and max_shift
+        max_shift: Largest shift in frames
+
+    Returns:
+        Sources tensor of shape (sources, channels, frames)
+    """
+    from demucs.apply import TensorChunk, tensor_chunk
+
+    length = wav.shape[-1]
+    padded = tensor_chunk(wav[None]).padded(length + 2 * max_shift)
+    shifted = TensorChunk(padded, offset, length + max_shift - offset)
+    return run(shifted)[0, ..., max_shift - offset:]
+
+
+def _separate_file(models, task, report=None, batcher=None):
+    """
+    Separate a single audio file with a resident model.
+
+    Writes one WAV per source using the same layout as `demucs.separate`:
+    <output_dir>/<model_name>/<track_name>/<source>.wav
+
+    Args:
+        models: ModelRegistry of the worker
+        task: Task payload sent by the parent process
+        report: Optional segment progress callable
+        batcher: Optional SegmentBatcher shared by the worker's tasks
+
+    Returns:
+        Dictionary mapping stem names to file paths
+    """
+    import torch
+    import soundfile as sf
+    from demucs.audio import save_audio
+
+    data, samplerate = sf.read(task["input_file"], dtype="float32", always_2d=True)
+    model, sources = _run_model(models, task, torch.from_numpy(data.T.copy()), samplerate, report, batcher)
+
+    track_name = Path(task["input_file"]).stem
+    track_output_dir = os.path.join(task["output_dir"], task["model_name"], track_name)
+    os.makedirs(track_output_dir, exist_ok=True)
+
+    stem_files = {}
+    for source, stem_name in zip(sources, model.sources):
+        if task.get("stems") and stem_name not in task["stems"]:
+            continue
+        stem_path = os.path.join(track_output_dir, f"{stem_name}.wav")
+        save_audio(source.cpu(), stem_path, samplerate=model.samplerate, as_float=task["float32"])
+        stem_files[stem_name] = stem_path
+
+    return stem_files
+
+
+def _separate_array(models, task, report=None, batcher=None):
+    """
+    Separate audio passed in memory with a resident model.
+
+    Args:
+        models: ModelRegistry of the worker
+        task: Task payload with a (channels, frames) float32 "audio" array
+        report: Optional segment progress callable
+        batcher: Optional SegmentBatcher shared by the worker's tasks
+
+    Returns:
+        Dictionary mapping stem names to (channels, frames) float32 arrays
+    """
+    import torch
+
+    model, sources = _run_model(models, task, torch.from_numpy(task["audio"]), task["samplerate"], report, batcher)
+
+    stems = {}
+    for source, stem_name in zip(sources, model.sources):
+        if task.get("stems") and stem_name not in task["stems"]:
+            continue
+        stems[stem_name] = source.cpu().numpy()
+
+    return stems
+
+
+def _run_task(models, task, result_queue, batcher):
+    """
+    Run one task on an engine worker and report its result.
+
+    Args:
+        models: ModelRegistry of the worker
+        task: Task payload
+        result_queue: Queue for messages back to the supervisor
+        batcher: SegmentBatcher shared by the worker's tasks
+    """
+    task_id = task["task_id"]
+    last_report = [0.0]
+
+    def report(done, total):
+        # Throttle so fast devices do not flood the result queue
+        now = time.time()
+        if done != total and now - last_report[0] < ENGINE_PROGRESS_INTERVAL:
+            return
+        last_report[0] = now
+        result_queue.put(("progress", task_id, min(done / total, 1.0)))
+
+    try:
+        if task.get("kind") == "array":
+            result = _separate_array(models, task, report, batcher)
+        else:
+            result = _separate_file(models, task, report, batcher)
+        result_queue.put(("done", task_id, result))
+    except Exception as e:
+        result_queue.put(("error", task_id, f"{type(e).__name__}: {str(e)}"))
+
+
+def _worker_main(worker_id, task_queue, result_queue, preload_models, device, torch_threads=0,
+                 max_batch=SEPARATION_MAX_BATCH, batch_wait_ms=SEPARATION_BATCH_WAIT_MS,
+                 model_memory_mb=SEPARATION_MODEL_MEMORY_MB):
+    """
+    Entry point of an engine worker process.
+
+    Runs every task it is sent on its own thread; the supervisor never sends
+    more than SEPARATION_WORKER_TASKS at once. Their segments share one
+    SegmentBatcher, so concurrent tasks are separated in batched forward
+    passes.
+
+    Args:
+        worker_id: Index of this worker in the pool
+        task_queue: This worker's queue of task payloads (None to shut down)
+        result_queue: Queue for messages back to the supervisor
+        preload_models: Model names to load before accepting work
+        device: Device used for preloading
+        torch_threads: Intra-op threads torch may use (0 = torch default)
+        max_batch: Maximum segments per forward pass
+        batch_wait_ms: Milliseconds a segment waits for a batch to fill
+        model_memory_mb: Memory budget of the worker's resident models (0 = no limit)
+    """
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s | %(levelname)-7s | %(name)s | %(message)s'
+    )
+
+    if torch_threads:
+        # Pin the worker to its share of the cores so workers do not
+        # oversubscribe the CPU
+        import torch
+        torch.set_num_threads(torch_threads)
+
+    models = ModelRegistry(
+        budget_mb=model_memory_mb,
+        on_change=lambda snapshot: result_queue.put(("models", None, (worker_id, snapshot)))
+    )
+    for model_name in preload_models:
+        key = (model_name, device, None)
+        try:
+            models.acquire(key, lambda: _load_model(model_name, device))
+            models.release(key)
+        except Exception as e:
+            logger.error(f"Worker {worker_id} failed to preload {model_name}: {str(e)}")
+
+    batcher = SegmentBatcher(
+        max_batch=max_batch,
+        max_wait_ms=batch_wait_ms,
+        on_batch=lambda size, seconds: result_queue.put(("batch", None, (worker_id, size, seconds)))
+    ).start()
+
+    result_queue.put(("ready", None, worker_id))
+
+    threads = []
+    while True:
+        task = task_queue.get()
+        if task is None:
+            break
+
+        thread = threading.Thread(
+            target=_run_task,
+            args=(models, task, result_queue, batcher),
+            name=f"separation-task-{task['task_id'][:8]}",
+            daemon=True
+        )
+        thread.start()
+        threads = [t for t in threads if t.is_alive()] + [thread]
+
+    for thread in threads:
+        thread.join()
+    batcher.stop()
+
+
+class SeparationEngine:
+    """
+    Pool of resident worker processes running HTDemucs.
+    """
+
+    def __init__(self, num_workers=None, device="cpu", preload_models=None, worker_tasks=None,
+                 max_batch=None, batch_wait_ms=None, torch_threads=None, model_memory_mb=None):
+        """
+        Initialize the separation engine.
+
+        Args:
+            num_workers: Number of worker processes (default: SEPARATION_WORKERS)
+            device: Device the workers preload models on
+            preload_models: Model names loaded when a worker starts
+            worker_tasks: Tasks each worker runs at once (default: SEPARATION_WORKER_TASKS)
+            max_batch: Maximum segments per forward pass (default: SEPARATION_MAX_BATCH)
+            batch_wait_ms: Milliseconds a segment waits for a batch to fill
+                (default: SEPARATION_BATCH_WAIT_MS)
+            torch_threads: Intra-op torch threads per worker (default:
+                SEPARATION_TORCH_THREADS, or the cores divided among the workers)
+            model_memory_mb: Memory budget for the resident models of each
+                worker (default: SEPARATION_MODEL_MEMORY_MB, 0 = no limit)
+        """
+        self.num_workers = max(1, num_workers or SEPARATION_WORKERS)
+        self.device = device
+        self.preload_models = PRELOAD_MODELS if preload_models is None else list(preload_models)
+        self.worker_tasks = max(1, worker_tasks or SEPARATION_WORKER_TASKS)
+        self.max_batch = max(1, max_batch or SEPARATION_MAX_BATCH)
+        self.batch_wait_ms = SEPARATION_BATCH_WAIT_MS if batch_wait_ms is None else batch_wait_ms
+        self.torch_threads = torch_threads or SEPARATION_TORCH_THREADS
+        if not self.torch_threads and device == "cpu":
+            self.torch_threads = max(1, (os.cpu_count() or 1) // self.num_workers)
+        self.model_memory_mb = SEPARATION_MODEL_MEMORY_MB if model_memory_mb is None else model_memory_mb
+
+        self._ctx = mp.get_context("spawn")
+        self._result_queue = self._ctx.Queue()
+        self._workers = {}
+        self._task_queues = {}  # worker_id -> the worker's own task queue
+        self._backlog = deque()  # tasks waiting for a free worker slot
+        self._running_tasks = {}  # worker_id -> {task_id: task} sent to it
+        self._pending = {}  # task_id -> Future
+        self._progress_callbacks = {}  # task_id -> callable(fraction)
+        self._model_stats = {}  # worker_id -> latest ModelRegistry snapshot
+        self._lock = threading.Lock()
+        self._supervisor = None
+        self._stopping = False
+
+        self.stats = {
+            "tasks_completed": 0,
+            "tasks_failed": 0,
+            "tasks_cancelled": 0,
+            "worker_restarts": 0,
+            "segments": 0,
+            "batches": 0,
+            "batch_seconds": 0.0,
+        }
+        self._started_at = None
+
+    def start(self):
+        """
+        Start the worker processes and the supervisor thread.
+        """
+        for worker_id in range(self.num_workers):
+            self._spawn_worker(worker_id)
+
+        self._supervisor = threading.Thread(
+            target=self._supervise,
+            name="separation-supervisor",
+            daemon=True
+        )
+        self._supervisor.start()
+        self._started_at = time.time()
+        logger.info(
+            f"Separation engine started with {self.num_workers} worker(s) on {self.device}, "
+            f"{self.worker_tasks} task(s) per worker, batches of up to {self.max_batch} segments"
+        )
+
+    def stop(self, timeout=10.0):
+        """
+        Stop all workers and fail any task still pending.
+
+        Args:
+            timeout: Seconds to wait for each worker to exit
+        """
+        self._stopping = True
+
+        for task_queue in self._task_queues.values():
+            task_queue.put(None)
+
+        for process in self._workers.values():
+            process.join(timeout)
+            if process.is_alive():
+                process.terminate()
+
+        with self._lock:
+            for future in self._pending.values():
+                if not future.done():
+                    future.set_exception(EngineError("Separation engine stopped"))
+            self._pending.clear()
+            self._progress_callbacks.clear()
+
+        logger.info("Separation engine stopped")
+
+    def submit(self, task, progress_callback=None):
+        """
+        Queue a task for the workers.
+
+        Args:
+            task: Task payload (a task_id is added)
+            progress_callback: Optional callable receiving the completed
+                fraction (0-1) as segments finish, on the supervisor thread
+
+        Returns:
+            Future resolved with the task result
+        """
+        if self._stopping:
+            raise EngineError("Separation engine is not running")
+
+        task = dict(task)
+        task["task_id"] = uuid.uuid4().hex
+        future = Future()
+
+        with self._lock:
+            self._pending[task["task_id"]] = future
+            if progress_callback is not None:
+                self._progress_callbacks[task["task_id"]] = progress_callback
+            self._backlog.append(task)
+            self._dispatch()
+
+        return future
+
+    def separate(self, input_file, output_dir, settings, timeout=None, progress_callback=None):
+        """
+        Separate an audio file and wait for the result.
+
+        Args:
+            input_file: Path to the input audio file
+            output_dir: Directory Demucs-style outputs are written to
+            settings: Runner settings (model_name, device, shifts, ...)
+            timeout: Seconds to wait (default: SEPARATION_TIMEOUT)
+            progress_callback: Optional callable receiving the completed fraction
+
+        Returns:
+            Dictionary mapping stem names to file paths
+        """
+        task = dict(settings)
+        task["input_file"] = str(input_file)
+        task["output_dir"] = str(output_dir)
+
+        started = time.time()
+        future = self.submit(task, progress_callback)
+        try:
+            stem_files = future.result(timeout or SEPARATION_TIMEOUT)
+        except FutureTimeoutError:
+            self.cancel(future)
+            raise
+        logger.info(f"Engine separated {input_file} in {time.time() - started:.1f}s")
+        return stem_files
+
+    def separate_array(self, audio, samplerate, settings, timeout=None, progress_callback=None):
+        """
+        Separate audio held in memory and wait for the result.
+
+        Args:
+            audio: (channels, frames) float32 array
+            samplerate: Sample rate of the audio
+            settings: Runner settings (model_name, device, shifts, ...)
+            timeout: Seconds to wait (default: SEPARATION_TIMEOUT)
+            progress_callback: Optional callable receiving the completed fraction
+
+        Returns:
+            Dictionary mapping stem names to (channels, frames) float32 arrays
+        """
+        task = dict(settings)
+        task["kind"] = "array"
+        task["audio"] = audio
+        task["samplerate"] = samplerate
+
+        started = time.time()
+        future = self.submit(task, progress_callback)
+        try:
+            stems = future.result(timeout or SEPARATION_TIMEOUT)
+        except FutureTimeoutError:
+            self.cancel(future)
+            raise
+        logger.info(f"Engine separated {audio.shape[-1] / samplerate:.1f}s of audio in {time.time() - started:.1f}s")
+        return stems
+
+    def cancel(self, future):
+        """
+        Cancel a task, so it stops holding a worker slot.
+
+        A queued task is dropped from the backlog. A running task cannot be
+        interrupted inside the model code, so its worker is terminated and
+        then restarted by the supervisor; the other tasks that worker was
+        running go back to the front of the backlog.
+
+        Args:
+            future: Future returned by submit
+
+        Returns:
+            True if the task was cancelled, False if it had already finished
+        """
+        process = None
+        with self._lock:
+            task_id = next((task_id for task_id, pending in self._pending.items() if pending is future), None)
+            if task_id is None:
+                return False
+            del self._pending[task_id]
+            self._progress_callbacks.pop(task_id, None)
+
+            if not self._drop_from_backlog(task_id):
+                for worker_id, tasks in self._running_tasks.items():
+                    if task_id in tasks:
+                        break
+                else:
+                    worker_id = None
+
+                if worker_id is not None:
+                    # Nothing more is sent to the worker; _check_workers
+                    # restarts it once it has exited
+                    self._task_queues.pop(worker_id, None)
+                    tasks = self._running_tasks.pop(worker_id)
+                    del tasks[task_id]
+                    self._backlog.extendleft(reversed(list(tasks.values())))
+                    process = self._workers[worker_id]
+            self.stats["tasks_cancelled"] += 1
+
+        if process is not None:
+            logger.warning(f"Terminating separation worker {process.name} to cancel task {task_id[:8]}")
+            process.terminate()
+        future.cancel()
+        return True
+
+    def snapshot(self):
+        """
+        Get engine load and batching figures.
+
+        Returns:
+            Dictionary with task counters, running tasks and segment
+            throughput
+        """
+        with self._lock:
+            running = sum(len(tasks) for tasks in self._running_tasks.values())
+            queued = len(self._backlog)
+            stats = dict(self.stats)
+            model_stats = list(self._model_stats.values())
+
+        uptime = time.time() - self._started_at if self._started_at else 0.0
+        return {
+            **stats,
+            "batch_seconds": round(stats["batch_seconds"], 1),
+            "workers": self.num_workers,
+            "worker_tasks": self.worker_tasks,
+            "torch_threads": self.torch_threads,
+            "max_batch": self.max_batch,
+            "batch_wait_ms": self.batch_wait_ms,
+            "running_tasks": running,
+            "queued_tasks": queued,
+            "avg_batch_size": round(stats["segments"] / stats["batches"], 2) if stats["batches"] else None,
+            # Segments per second of forward passes, and over the engine's lifetime
+            "segments_per_batch_second": (
+                round(stats["segments"] / stats["batch_seconds"], 2) if stats["batch_seconds"] else None
+            ),
+            "segments_per_second": round(stats["segments"] / uptime, 3) if uptime else None,
+            "model_memory_mb": self.model_memory_mb,
+            "resident_model_mb": round(sum(s["resident_bytes"] for s in model_stats) / 1024 / 1024, 1),
+            "models": merge_model_stats(model_stats)
+        }
+
+    def _dispatch(self):
+        """
+        Send backlog tasks to the least busy workers with a free slot.
+        Must be called with the lock held.
+
+        Spreading tasks over idle workers first lets the windows of one
+        track run on different workers, and so on different cores.
+        """
+        while self._backlog:
+            free = [
+                (len(self._running_tasks.get(worker_id, ())), worker_id)
+                for worker_id in self._task_queues
+                if len(self._running_tasks.get(worker_id, ())) < self.worker_tasks
+            ]
+            if not free:
+                return
+
+            _, worker_id = min(free)
+            task = self._backlog.popleft()
+            self._running_tasks.setdefault(worker_id, {})[task["task_id"]] = task
+            self._task_queues[worker_id].put(task)
+
+    def _drop_from_backlog(self, task_id):
+        """
+        Remove a task from the backlog. Must be called with the lock held.
+
+        Returns:
+            True if the task was queued
+        """
+        for task in self._backlog:
+            if task["task_id"] == task_id:
+                self._backlog.remove(task)
+                return True
+        return False
+
+    def _spawn_worker(self, worker_id):
+        """
+        Start (or restart) the worker process with the given id.
+
+        A restarted worker gets a fresh task queue, so tasks sent to the
+        dead process are not run twice.
+        """
+        task_queue = self._ctx.Queue()
+        process = self._ctx.Process(
+            target=_worker_main,
+            args=(
+                worker_id,
+                task_queue,
+                self._result_queue,
+                self.preload_models,
+                self.device,
+                self.torch_threads,
+                self.max_batch,
+                self.batch_wait_ms,
+                self.model_memory_mb
+            ),
+            name=f"separation-worker-{worker_id}",
+            daemon=True
+        )
+        process.start()
+        self._workers[worker_id] = process
+        with self._lock:
+            self._task_queues[worker_id] = task_queue
+            self._dispatch()
+
+    def _supervise(self):
+        """
+        Route worker messages to futures and restart crashed workers.
+        """
+        while not self._stopping:
+            try:
+                kind, task_id, payload = self._result_queue.get(timeout=1.0)
+                self._handle_message(kind, task_id, payload)
+            except queue.Empty:
+                pass
+            except Exception as e:
+                logger.error(f"Error in separation supervisor: {str(e)}")
+
+            self._check_workers()
+
+    def _handle_message(self, kind, task_id, payload):
+        """
+        Handle a single message from a worker.
+        """
+        if kind == "ready":
+            logger.info(f"Separation worker {payload} ready")
+            return
+
+        if kind == "batch":
+            _, size, seconds = payload
+            with self._lock:
+                self.stats["segments"] += size
+                self.stats["batches"] += 1
+                self.stats["batch_seconds"] += seconds
+            return
+
+        if kind == "models":
+            worker_id, snapshot = payload
+            with self._lock:
+                self._model_stats[worker_id] = snapshot
+            return
+
+        if kind == "progress":
+            with self._lock:
+                callback = self._progress_callbacks.get(task_id)
+            if callback is not None:
+                try:
+                    callback(payload)
+                except Exception as e:
+                    logger.error(f"Error in progress callback: {str(e)}")
+            return
+
+        with self._lock:
+            future = self._pending.pop(task_id, None)
+            self._progress_callbacks.pop(task_id, None)
+            for tasks in self._running_tasks.values():
+                tasks.pop(task_id, None)
+            # A task requeued by cancel() may still have finished on the
+            # terminated worker
+            self._drop_from_backlog(task_id)
+            # The worker has a free slot again
+            self._dispatch()
+
+        if future is None or future.done():
+            return
+
+        if kind == "done":
+            self.stats["tasks_completed"] += 1
+            future.set_result(payload)
+        else:
+            self.stats["tasks_failed"] += 1
+            future.set_exception(EngineError(payload))
+
+    def _check_workers(self):
+        """
+        Restart dead workers and fail the tasks they were running.
+        """
+        if self._stopping:
+            return
+
+        for worker_id, process in list(self._workers.items()):
+            if process.is_alive():
+                continue
+
+            logger.error(f"Separation worker {worker_id} died with exit code {process.exitcode}, restarting")
+
+            with self._lock:
+                self._task_queues.pop(worker_id, None)
+                self._model_stats.pop(worker_id, None)
+                task_ids = list(self._running_tasks.pop(worker_id, {}))
+                futures = [self._pending.pop(task_id, None) for task_id in task_ids]
+                for task_id in task_ids:
+                    self._progress_callbacks.pop(task_id, None)
+
+            # Every task running on the worker is lost
+            for future in futures:
+                if future is not None and not future.done():
+                    self.stats["tasks_failed"] += 1
+                    future.set_exception(
+                        EngineError(f"Separation worker crashed with exit code {process.exitcode}")
+                    )
+
+            self.stats["worker_restarts"] += 1
+            self._spawn_worker(worker_id)
+
+
+# Process-wide engine instance
+_engine = None
+
+
+def merge_model_stats(snapshots):
+    """
+    Combine the ModelRegistry snapshots of all workers per model.
+
+    Args:
+        snapshots: ModelRegistry snapshots, one per worker
+
+    Returns:
+        Dictionary mapping model names to hits, coalesced lookups, misses,
+        evictions, mean hit lookup milliseconds, mean seconds a coalesced
+        lookup waited, mean and slowest load seconds, size in MB and the
+        number of workers holding the model
+    """
+    merged = {}
+    for snapshot in snapshots:
+        for name, stats in snapshot["models"].items():
+            totals = merged.setdefault(name, {
+                "hits": 0, "coalesced": 0, "misses": 0, "evictions": 0, "hit_seconds": 0.0,
+                "coalesced_seconds": 0.0, "load_seconds": 0.0, "max_load_seconds": 0.0, "bytes": 0,
+                "resident_workers": 0
+            })
+            for counter in ("hits", "coalesced", "misses", "evictions", "hit_seconds", "coalesced_seconds",
+                            "load_seconds"):
+                totals[counter] += stats[counter]
+            totals["max_load_seconds"] = max(totals["max_load_seconds"], stats["max_load_seconds"])
+            totals["bytes"] = max(totals["bytes"], stats["bytes"])
+            totals["resident_workers"] += 1 if stats["resident"] else 0
+
+    return {
+        name: {
+            "hits": totals["hits"],
+            "coalesced": totals["coalesced"],
+            "misses": totals["misses"],
+            "evictions": totals["evictions"],
+            "mean_hit_ms": round(totals["hit_seconds"] / totals["hits"] * 1000, 3) if totals["hits"] else None,
+            "mean_coalesced_seconds": (
+                round(totals["coalesced_seconds"] / totals["coalesced"], 2) if totals["coalesced"] else None
+            ),
+            "mean_load_seconds": round(totals["load_seconds"] / totals["misses"], 2) if totals["misses"] else None,
+            "max_load_seconds": round(totals["max_load_seconds"], 2),
+            "size_mb": round(totals["bytes"] / 1024 / 1024, 1),
+            "resident_workers": totals["resident_workers"]
+        }
+        for name, totals in merged.items()
+    }
+
+
+def start_engine(**kwargs):
+    """
+    Create and start the process-wide separation engine.
+
+    Returns:
+        The running SeparationEngine
+    """
+    global _engine
+    if _engine is None:
+        _engine = SeparationEngine(**kwargs)
+        _engine.start()
+    return _engine
+
+
+def get_engine():
+    """
+    Get the process-wide separation engine, or None if it is not running.
+    """
+    return _engine
+
+
+def stop_engine():
+    """
+    Stop the process-wide separation engine if it is running.
+    """
+    global _engine
+    if _engine is not None:
+        _engine.stop()
+        _engine = None
@@ -11,11 +11,27 @@ import numpy as np
 from app.utils.audio import (
     adjust_volume,
     invert_phase_and_mix,
+    read_audio_44100,
+    iter_audio_44100,
+    overlapping_blocks,
+    db_to_gain,
     PROCESSED_DIR
 )
+from app.utils.archive import write_zip
+from app.utils.encoders import encode_file
 
 logger = logging.getLogger("splitter.stems")
 
+# Gain applied before separation and undone on the stems
+SEPARATION_HEADROOM_DB = 10
+
+# Stems subtracted from the original to build the EE (everything else) track
+EE_SOURCE_STEMS = ['drums', 'bass', 'vocals']
+
+# Block and overlap length used by the streaming pipeline
+STREAM_BLOCK_SECONDS = float(os.environ.get("STREAM_BLOCK_SECONDS", "60"))
+STREAM_OVERLAP_SECONDS = float(os.environ.get("STREAM_OVERLAP_SECONDS", "5"))
+
 
 class StemsProcessor:
     """
@@ -70,13 +86,13 @@ class StemsProcessor:
                 output_path = os.path.join(outputs_dir, output_filename)
 
                 # Adjust volume (increase by 10dB to compensate for earlier reduction)
-                adjust_volume(stem_file, output_path, 10)
+                adjust_volume(stem_file, output_path, SEPARATION_HEADROOM_DB)
 
                 # Track output files
                 output_files[stem_name] = output_path
 
                 # Add to selected files for EE processing if it's drums, bass, or vocals
-                if stem_name.lower() in ['drums', 'bass', 'vocals']:
+                if stem_name.lower() in EE_SOURCE_STEMS:
                     selected_files.append(output_path)
 
             # Create "EE" (everything else) track if we have the necessary stems
@@ -105,6 +121,224 @@ class StemsProcessor:
             logger.error(f"Error processing stems: {str(e)}")
             return None
 
+    def process_in_memory(self, input_file, demucs_runner, output_prefix=None, progress_callback=None):
+        """
+        Separate and post-process a track in a single in-memory pass.
+
+        The input is decoded once, gain staging and the EE residual are applied
+        on float32 arrays, and every output file is written exactly once.
+
+        Args:
+            input_file: Original input file
+            demucs_runner: HTDemucsRunner used for separation
+            output_prefix: Prefix for output filenames
+            progress_callback: Optional callable receiving the separated fraction (0-1)
+
+        Returns:
+            Dictionary mapping stem types to output file paths
+        """
+        try:
+            # Set up output prefix
+            if output_prefix is None:
+                output_prefix = Path(input_file).stem
+
+            outputs_dir = os.path.join(self.output_dir, f"{output_prefix}_stems")
+            os.makedirs(outputs_dir, exist_ok=True)
+
+            # Decode once, separate and build the EE track
+            mix, samplerate = read_audio_44100(input_file)
+            outputs = self._separate_block(mix, samplerate, demucs_runner, progress_callback)
+
+            # Write each output once
+            output_files = {}
+            for stem_name, data in outputs.items():
+                output_path = self._output_path(outputs_dir, output_prefix, stem_name)
+                sf.write(output_path, data, samplerate, subtype='FLOAT')
+                output_files[stem_name] = output_path
+
+            logger.info(f"Processed stems in memory: {', '.join(output_files.keys())}")
+            return {
+                'output_dir': outputs_dir,
+                'stems': output_files
+            }
+
+        except Exception as e:
+            logger.error(f"Error processing stems in memory: {str(e)}")
+            return None
+
+    def process_streaming(
+            self,
+            input_file,
+            demucs_runner,
+            output_prefix=None,
+            block_seconds=STREAM_BLOCK_SECONDS,
+            overlap_seconds=STREAM_OVERLAP_SECONDS,
+            progress_callback=None,
+            open_input=None
+    ):
+        """
+        Separate and post-process a track in fixed-size overlapping blocks.
+
+        Each block goes through gain staging, separation and EE mixing on its
+        own. Consecutive blocks overlap and are joined with a linear crossfade,
+        so peak memory depends on the block size, not on the track length.
+
+        Args:
+            input_file: Original input file
+            demucs_runner: HTDemucsRunner used for separation
+            output_prefix: Prefix for output filenames
+            block_seconds: Length of each block, excluding the overlap
+            overlap_seconds: Overlap crossfaded between consecutive blocks
+            progress_callback: Optional callable receiving the separated fraction (0-1)
+            open_input: Optional callable returning a new readable file object
+                for the input, used instead of opening input_file (e.g. a
+                reader over a download still in progress)
+
+        Returns:
+            Dictionary mapping stem types to output file paths
+        """
+        writers = {}
+        readers = []
+
+        def source():
+            if open_input is None:
+                return input_file
+            reader = open_input()
+            readers.append(reader)
+            return reader
+
+        try:
+            # Set up output prefix
+            if output_prefix is None:
+                output_prefix = Path(input_file).stem
+
+            outputs_dir = os.path.join(self.output_dir, f"{output_prefix}_stems")
+            os.makedirs(outputs_dir, exist_ok=True)
+
+            output_files = {}
+            pending = {}  # Tail of the previous block, crossfaded into the next
+
+            samplerate = 44100
+            block_frames = int(block_seconds * samplerate)
+            overlap_frames = int(overlap_seconds * samplerate)
+
+            blocks = overlapping_blocks(
+                iter_audio_44100(source()),
+                block_frames + overlap_frames,
+                overlap_frames
+            )
+
+            # Track length at 44.1kHz, to turn block progress into track progress
+            info = sf.info(source())
+            total_frames = max(1, int(info.frames * samplerate / info.samplerate))
+            frames_done = 0
+
+            for block in blocks:
+                if progress_callback is not None:
+                    new_frames = len(block) - (overlap_frames if frames_done else 0)
+
+                    def block_callback(fraction, start=frames_done, length=new_frames):
+                        progress_callback(min(1.0, (start + fraction * length) / total_frames))
+
+                    frames_done += new_frames
+                else:
+                    block_callback = None
+
+                outputs = self._separate_block(block, samplerate, demucs_runner, block_callback)
+
+                for stem_name, data in outputs.items():
+                    if stem_name not in writers:
+                        output_path = self._output_path(outputs_dir, output_prefix, stem_name)
+                        writers[stem_name] = sf.SoundFile(
+                            output_path, 'w',
+                            samplerate=samplerate,
+                            channels=data.shape[1],
+                            subtype='FLOAT'
+                        )
+                        output_files[stem_name] = output_path
+
+                    # Crossfade the overlap with the previous block
+                    tail = pending.get(stem_name)
+                    if tail is not None and len(tail):
+                        ramp = np.linspace(0.0, 1.0, len(tail), dtype=np.float32)[:, None]
+                        data[:len(tail)] = tail * (1.0 - ramp) + data[:len(tail)] * ramp
+
+                    # Hold back the part that overlaps with the next block
+                    split_at = max(0, data.shape[0] - overlap_frames)
+                    writers[stem_name].write(data[:split_at])
+                    pending[stem_name] = data[split_at:].copy()
+
+            # The last block has no successor, flush what was held back
+            for stem_name, tail in pending.items():
+                writers[stem_name].write(tail)
+
+            logger.info(f"Processed stems in streaming mode: {', '.join(output_files.keys())}")
+            return {
+                'output_dir': outputs_dir,
+                'stems': output_files
+            }
+
+        except Exception as e:
+            logger.error(f"Error processing stems in streaming mode: {str(e)}")
+            return None
+
+        finally:
+            for writer in writers.values():
+                writer.close()
+            for reader in readers:
+                reader.close()
+
+    def _separate_block(self, mix, samplerate, demucs_runner, progress_callback=None):
+        """
+        Separate a block of audio and derive the EE track from it.
+
+        Args:
+            mix: (frames, channels) float32 array
+            samplerate: Sample rate of the block
+            demucs_runner: HTDemucsRunner used for separation
+            progress_callback: Optional callable receiving the separated fraction (0-1)
+
+        Returns:
+            Dictionary mapping output names to (frames, channels) arrays, with
+            "other" replaced by "ee" when the EE track could be built
+        """
+        # Separate with headroom, then undo it on the stems
+        stems = demucs_runner.separate_array(
+            mix * db_to_gain(-SEPARATION_HEADROOM_DB),
+            samplerate,
+            progress_callback=progress_callback
+        )
+        if not stems:
+            raise Exception("Separation returned no stems")
+
+        output_gain = db_to_gain(SEPARATION_HEADROOM_DB)
+        for data in stems.values():
+            data *= output_gain
+
+        # Build the EE track: original minus drums, bass and vocals
+        selected = [data for stem_name, data in stems.items() if stem_name.lower() in EE_SOURCE_STEMS]
+        if not selected:
+            return stems
+
+        length = min([mix.shape[0]] + [data.shape[0] for data in selected])
+        if length != mix.shape[0]:
+            logger.warning(f"Length mismatch: original={mix.shape[0]}, stems={length}")
+
+        ee_data = mix[:length]
+        for data in selected:
+            ee_data = ee_data - data[:length]
+
+        outputs = {stem_name: data for stem_name, data in stems.items() if stem_name != 'other'}
+        outputs['ee'] = ee_data
+        return outputs
+
+    def _output_path(self, outputs_dir, output_prefix, stem_name):
+        """
+        Get the output path for a stem, e.g. "<prefix> Drums.wav" or "<prefix> EE.wav".
+        """
+        label = "EE" if stem_name == 'ee' else stem_name.capitalize()
+        return os.path.join(outputs_dir, f"{output_prefix} {label}.wav")
+
     def create_track_preview(self, stem_file, duration=30.0):
         """
         Create a preview clip from a stem file.
@@ -117,21 +351,25 @@ class StemsProcessor:
             Path to the preview file
         """
         try:
-            # Read the stem file
-            data, samplerate = sf.read(stem_file)
+            info = sf.info(stem_file)
 
             # Calculate sample count for the preview
-            preview_samples = int(duration * samplerate)
+            preview_samples = int(duration * info.samplerate)
 
             # If file is shorter than requested duration, use the whole file
-            if data.shape[0] <= preview_samples:
+            if info.frames <= preview_samples:
                 return stem_file
 
             # Find a good starting point (1/4 into the file)
-            start_sample = min(int(data.shape[0] * 0.25), data.shape[0] - preview_samples)
+            start_sample = min(int(info.frames * 0.25), info.frames - preview_samples)
 
-            # Extract the preview segment
-            preview_data = data[start_sample:start_sample + preview_samples]
+            # Read only the preview segment
+            preview_data, samplerate = sf.read(
+                stem_file,
+                start=start_sample,
+                frames=preview_samples,
+                dtype='float32'
+            )
 
             # Create a preview filename
             preview_path = f"{os.path.splitext(stem_file)[0]}_preview.wav"
@@ -150,6 +388,9 @@ class StemsProcessor:
         """
         Create an MP3 version of a WAV file.
 
+        The encoder is fed in chunks, so the full signal is never converted
+        to 16-bit PCM at once.
+
         Args:
             wav_file: Path to the WAV file
             bitrate: MP3 bitrate in kbps
@@ -158,41 +399,7 @@ class StemsProcessor:
             Path to the MP3 file
         """
         try:
-            # Import lameenc for MP3 encoding
-            import lameenc
-
-            # Read the WAV file
-            data, samplerate = sf.read(wav_file)
-
-            # Create an MP3 filename
-            mp3_path = f"{os.path.splitext(wav_file)[0]}.mp3"
-
-            # Set up the encoder
-            encoder = lameenc.Encoder()
-            encoder.set_bit_rate(bitrate)
-            encoder.set_in_sample_rate(samplerate)
-            encoder.set_channels(data.shape[1] if len(data.shape) > 1 else 1)
-            encoder.set_quality(2)  # High quality
-
-            # Convert data to the format expected by lameenc
-            if len(data.shape) > 1:
-                # Stereo
-                data = data.T  # lameenc expects channels-first format
-            else:
-                # Mono
-                data = data.reshape(1, -1)
-
-            # Ensure data is in the correct format (16-bit PCM)
-            if data.dtype.kind == 'f':
-                data = (data * 32767).astype(np.int16)
-
-            # Encode to MP3
-            mp3_data = encoder.encode(data.tobytes())
-            mp3_data += encoder.flush()
-
-            # Write the MP3 file
-            with open(mp3_path, 'wb') as f:
-                f.write(mp3_data)
+            mp3_path = encode_file(wav_file, "mp3", mp3_bitrate=bitrate)
 
             logger.info(f"Created MP3 version: {mp3_path}")
             return mp3_path
@@ -216,33 +423,83 @@ class StemsProcessor:
             Path to the ZIP file
         """
         try:
-            import zipfile
-
             # Create ZIP filename
             zip_path = f"{output_dir}.zip"
 
             # Create ZIP file
-            with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
-                # Add files to ZIP
-                for file in os.listdir(output_dir):
-                    # Check if the file is in the requested format or needs conversion
-                    file_path = os.path.join(output_dir, file)
-                    _, ext = os.path.splitext(file)
-
-                    # If MP3 is requested but file is WAV, convert it
-                    if format == "mp3" and ext.lower() == ".wav":
-                        mp3_path = self.create_mp3_version(file_path)
-                        if mp3_path:
-                            # Add MP3 file to ZIP using the original filename but with .mp3 extension
-                            mp3_filename = os.path.basename(mp3_path)
-                            zipf.write(mp3_path, mp3_filename)
-                    else:
-                        # Add file to ZIP as is
-                        zipf.write(file_path, file)
+            with open(zip_path, "wb") as zip_file:
+                write_zip(zip_file, self._zip_entries(output_dir, format))
 
             logger.info(f"Created ZIP package: {zip_path}")
             return zip_path
 
         except Exception as e:
             logger.error(f"Error creating ZIP package: {str(e)}")
-            return None
\ No newline at end of file
+            return None
+
+    def upload_zip_package(self, output_dir, minio_client, object_name, format="wav", files=None, progress=None):
+        """
+        Stream a ZIP package of all stems straight into a MinIO upload.
+
+        Nothing is staged on disk: entries are written into a multipart
+        upload as they are packed. Audio entries are stored uncompressed.
+
+        Args:
+            output_dir: Directory containing the stems
+            minio_client: MinioClient to upload with
+            object_name: Name of the ZIP object
+            format: Output format ("wav" or "mp3")
+            files: Optional explicit list of files to package instead of output_dir
+            progress: Optional TransferProgress to report bytes to
+
+        Returns:
+            Tuple of (object name, size in bytes), or (None, 0) if it failed
+        """
+        try:
+            if files is not None:
+                entries = [(path, os.path.basename(path)) for path in files]
+            else:
+                entries = self._zip_entries(output_dir, format)
+            object_name, size = minio_client.upload_stream(
+                lambda zip_file: write_zip(zip_file, entries),
+                object_name,
+                content_type="application/zip",
+                progress=progress
+            )
+
+            if object_name:
+                logger.info(f"Streamed ZIP package with {len(entries)} entries: {object_name}")
+            return object_name, size
+
+        except Exception as e:
+            logger.error(f"Error streaming ZIP package: {str(e)}")
+            return None, 0
+
+    def _zip_entries(self, output_dir, format="wav"):
+        """
+        List the files to package, converting WAV to MP3 if requested.
+
+        Args:
+            output_dir: Directory containing the stems
+            format: Output format ("wav" or "mp3")
+
+        Returns:
+            List of (file_path, arcname) tuples
+        """
+        entries = []
+        for file in sorted(os.listdir(output_dir)):
+            # Check if the file is in the requested format or needs conversion
+            file_path = os.path.join(output_dir, file)
+            _, ext = os.path.splitext(file)
+
+            # If MP3 is requested but file is WAV, convert it
+            if format == "mp3" and ext.lower() == ".wav":
+                mp3_path = self.create_mp3_version(file_path)
+                if mp3_path:
+                    # Add MP3 file to ZIP using the original filename but with .mp3 extension
+                    entries.append((mp3_path, os.path.basename(mp3_path)))
+            else:
+                # Add file to ZIP as is
+                entries.append((file_path, file))
+
+        return entries
@@ -6,32 +6,55 @@ import logging
 import json
 import shutil
 import asyncio
+import threading
 import time
 from typing import Dict, Any
 import uuid
-from fastapi import APIRouter, BackgroundTasks, HTTPException, Body
+from concurrent.futures import ThreadPoolExecutor
+from fastapi import APIRouter, HTTPException, Body
+from fastapi.responses import StreamingResponse
 
-from app.models.demucs_runner import HTDemucsRunner
+from app.models.quality import QUALITY_PRESETS, runner_for_quality, validate_quality
+from app.models.separation_engine import get_engine
 from app.models.stems_processor import StemsProcessor
-from app.utils.minio_client import MinioClient
-from app.utils.audio import cleanup_temp_files
+from app.utils.minio_client import get_minio_client, TransferProgress
+from app.utils.audio import cleanup_temp_files, convert_to_44100hz, PROCESSED_DIR
+from app.utils.job_executor import get_executor, QueueFullError
+from app.utils.job_store import get_job_store, TERMINAL_STATUSES
+from app.utils.batches import BatchTracker, BATCH_MAX_TRACKS
+from app.utils.result_cache import get_result_cache, compute_cache_key
+from app.utils.encoders import get_encoder_pool, validate_formats
+from app.utils.progress import JobProgress, is_stalled
 
 router = APIRouter(tags=["split"])
 
 # Configure logging
 logger = logging.getLogger("splitter.routes")
 
-# In-memory job store for tracking splitting jobs
-jobs = {}
+# "memory" keeps audio as float32 arrays from download to final encode,
+# "streaming" does the same in fixed-size blocks with bounded memory,
+# "files" runs the original file-based pipeline
+PIPELINE_MODE = os.environ.get("PIPELINE_MODE", "memory")
 
+# In streaming mode without the result cache, start decoding the input while
+# it is still downloading
+PIPELINE_EARLY_DECODE = os.environ.get("PIPELINE_EARLY_DECODE", "false").lower() == "true"
+
+# Seconds between keep-alive comments on idle event streams
+SSE_KEEPALIVE_SECONDS = float(os.environ.get("SSE_KEEPALIVE_SECONDS", "15"))
 
 @router.post("/split")
-async def split_audio(background_tasks: BackgroundTasks, data: Dict[str, Any] = Body(...)):
+async def split_audio(data: Dict[str, Any] = Body(...)):
     """
     Split audio into stems using HTDemucs.
 
+    The job is handed to the bounded pipeline executor, which shares workers
+    fairly between tenants (the "tenant" field, a license hash) and weighs
+    them by priority tier ("tier"). If the queue is full the request is
+    rejected with 429 and a Retry-After header. "quality" picks the model
+    and separation parameters (preview, standard, mastering).
+
     Args:
-        background_tasks: FastAPI background tasks for async processing
         data: Request data containing file details and MinIO connection info
 
     Returns:
@@ -39,52 +62,195 @@ async def split_audio(background_tasks: BackgroundTasks, data: Dict[str, Any] =
     """
     try:
         # Extract MinIO configuration from request
-        minio_config = {
-            "endpoint": data.get("minio_endpoint"),
-            "access_key": data.get("minio_access_key"),
-            "secret_key": data.get("minio_secret_key"),
-            "bucket_name": data.get("bucket_name", "stems"),
-            "secure": data.get("minio_secure", False)
-        }
+        minio_config = request_minio_config(data)
 
         # Extract file details
         object_name = data.get("object_name")
         if not object_name:
             raise HTTPException(status_code=400, detail="No file specified for splitting")
 
+        # Deliverable formats (wav, wav24, flac, mp3, opus) and quality preset
+        try:
+            formats = validate_formats(data.get("formats"))
+            quality = validate_quality(data.get("quality"))
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+        # Tenant (license hash) and priority tier for fair scheduling
+        tenant = data.get("tenant")
+        tier = data.get("tier")
+
         # Generate job ID
         job_id = str(uuid.uuid4())
 
         # Initialize job status
-        jobs[job_id] = {
-            "status": "queued",
-            "object_name": object_name,
-            "created_at": time.time(),
-            "updated_at": time.time(),
-            "minio_config": minio_config,
-            "progress": 0,
-            "stems": []
-        }
+        job_store = get_job_store()
+        job_store.create(job_id, new_job_record(object_name, minio_config, formats, tenant, tier, quality))
 
-        # Start background process
-        background_tasks.add_task(
-            process_audio_splitting,
-            job_id,
-            object_name,
-            minio_config
-        )
+        # Hand the job to the pipeline executor
+        try:
+            get_executor().submit(
+                process_audio_splitting,
+                job_id,
+                object_name,
+                minio_config,
+                formats,
+                quality=quality,
+                tenant=tenant,
+                tier=tier,
+                job_id=job_id
+            )
+        except QueueFullError as e:
+            job_store.delete(job_id)
+            raise HTTPException(
+                status_code=429,
+                detail="Splitter is at capacity, please retry later",
+                headers={"Retry-After": str(e.retry_after)}
+            )
+        except ValueError as e:
+            job_store.delete(job_id)
+            raise HTTPException(status_code=400, detail=str(e))
 
         return {
             "job_id": job_id,
             "status": "queued",
+            "queue_position": get_executor().queue_positions().get(job_id),
             "message": "Audio splitting job queued successfully"
         }
 
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error initiating split: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error initiating split: {str(e)}")
 
 
+@router.post("/split/batch")
+async def split_batch(data: Dict[str, Any] = Body(...)):
+    """
+    Split several tracks (e.g. an album) as one batch.
+
+    Creates a parent job and one child job per track. The children are
+    queued together for the tenant, all or none of them, and run like single
+    split jobs. The parent job reports their aggregate progress and, with
+    "album_archive", packs all stems into one ZIP with a folder per track
+    instead of one ZIP per track.
+
+    Args:
+        data: Request data containing "object_names", optional "formats",
+            "quality", "tenant", "tier", "album_archive", "album_name" and
+            MinIO connection info
+
+    Returns:
+        JSON response with the batch ID and the child jobs
+    """
+    try:
+        minio_config = request_minio_config(data)
+
+        object_names = data.get("object_names")
+        if not isinstance(object_names, list) or not object_names:
+            raise HTTPException(status_code=400, detail="No files specified for splitting")
+        if not all(isinstance(name, str) and name for name in object_names):
+            raise HTTPException(status_code=400, detail="Object names must be non-empty strings")
+
+        executor = get_executor()
+        max_tracks = min(BATCH_MAX_TRACKS, executor.max_queue)
+        if len(object_names) > max_tracks:
+            raise HTTPException(status_code=400, detail=f"A batch can contain at most {max_tracks} tracks")
+
+        try:
+            formats = validate_formats(data.get("formats"))
+            quality = validate_quality(data.get("quality"))
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+        tenant = data.get("tenant")
+        tier = data.get("tier")
+
+        batch_id = str(uuid.uuid4())
+        child_ids = [str(uuid.uuid4()) for _ in object_names]
+
+        # Base name of the combined archive, None for per-track ZIPs only
+        album_name = None
+        if data.get("album_archive"):
+            album_name = os.path.basename(str(data.get("album_name") or "")).strip() or f"album-{batch_id[:8]}"
+
+        job_store = get_job_store()
+        job_store.create(batch_id, {
+            **new_job_record(None, minio_config, formats, tenant, tier, quality),
+            "type": "batch",
+            "object_names": object_names,
+            "children": child_ids,
+            "album_name": album_name,
+            "total_tracks": len(object_names),
+            "completed_tracks": 0,
+            "failed_tracks": 0,
+            "tracks": []
+        })
+        for child_id, object_name in zip(child_ids, object_names):
+            job_store.create(child_id, {
+                **new_job_record(object_name, minio_config, formats, tenant, tier, quality),
+                "batch_id": batch_id
+            })
+
+        # Follow the children before any of them can start
+        tracker = BatchTracker(
+            job_store,
+            batch_id,
+            child_ids,
+            minio_config,
+            album_name=album_name,
+            tenant=tenant,
+            tier=tier
+        )
+        tracker.start()
+
+        # With an album archive the per-track ZIPs are not needed
+        try:
+            executor.submit_many(
+                [
+                    (
+                        process_audio_splitting,
+                        (child_id, object_name, minio_config, formats),
+                        {"package_zip": album_name is None, "quality": quality},
+                        child_id
+                    )
+                    for child_id, object_name in zip(child_ids, object_names)
+                ],
+                tenant=tenant,
+                tier=tier
+            )
+        except (QueueFullError, ValueError) as e:
+            tracker.stop()
+            for job_id in [batch_id, *child_ids]:
+                job_store.delete(job_id)
+            if isinstance(e, ValueError):
+                raise HTTPException(status_code=400, detail=str(e))
+            raise HTTPException(
+                status_code=429,
+                detail="Splitter is at capacity, please retry later",
+                headers={"Retry-After": str(e.retry_after)}
+            )
+
+        positions = executor.queue_positions()
+        return {
+            "batch_id": batch_id,
+            "job_id": batch_id,
+            "status": "queued",
+            "jobs": [
+                {"job_id": child_id, "object_name": object_name, "queue_position": positions.get(child_id)}
+                for child_id, object_name in zip(child_ids, object_names)
+            ],
+            "message": f"Batch of {len(object_names)} tracks queued successfully"
+        }
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error initiating batch split: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error initiating batch split: {str(e)}")
+
+
 @router.get("/split/{job_id}/status")
 async def get_split_status(job_id: str):
     """
@@ -96,32 +262,255 @@ async def get_split_status(job_id: str):
     Returns:
         JSON response with job status and details
     """
-    if job_id not in jobs:
+    job = get_job_store().get(job_id)
+    if job is None:
         raise HTTPException(status_code=404, detail=f"Job with ID {job_id} not found")
 
+    # Flag jobs that have stopped making progress
+    job["stalled"] = is_stalled(job)
+    job["queue_position"] = current_queue_position(job_id, job)
+
     # Return job status
-    return jobs[job_id]
+    return job
+
+
+@router.get("/split/{job_id}/events")
+async def stream_split_events(job_id: str):
+    """
+    Stream status changes of a splitting job as Server-Sent Events.
+
+    Sends the current record first, then one `status` event per change to
+    the job record, and closes the stream once the job has completed or
+    failed. Idle streams get a keep-alive comment every SSE_KEEPALIVE_SECONDS.
+
+    Args:
+        job_id: The ID of the splitting job
+
+    Returns:
+        text/event-stream response
+    """
+    job_store = get_job_store()
+    loop = asyncio.get_running_loop()
+    changes = asyncio.Queue()
+
+    def on_change(changed_job_id, record):
+        # Called on pipeline threads, hand the record over to the event loop
+        if record.get("status") in TERMINAL_STATUSES:
+            job_store.remove_listener(job_id, on_change)
+        loop.call_soon_threadsafe(changes.put_nowait, record)
+
+    job_store.add_listener(job_id, on_change)
+
+    job = job_store.get(job_id)
+    if job is None:
+        job_store.remove_listener(job_id, on_change)
+        raise HTTPException(status_code=404, detail=f"Job with ID {job_id} not found")
+
+    async def events():
+        try:
+            record = job
+            while True:
+                record["stalled"] = is_stalled(record)
+                record["queue_position"] = current_queue_position(job_id, record)
+                yield f"event: status\ndata: {json.dumps(record)}\n\n"
+                if record.get("status") in TERMINAL_STATUSES:
+                    return
+
+                try:
+                    record = await asyncio.wait_for(changes.get(), SSE_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    # No change, re-send only if the job just became stalled
+                    current = job_store.get(job_id)
+                    if current is not None and is_stalled(current) != record["stalled"]:
+                        record = current
+                        continue
+                    yield ": keep-alive\n\n"
+                    continue
+
+                # Skip intermediate records the client never needs to see
+                while not changes.empty():
+                    record = changes.get_nowait()
+        finally:
+            job_store.remove_listener(job_id, on_change)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.get("/queue/stats")
+async def get_queue_stats():
+    """
+    Get worker, queue and tenant figures of the pipeline executor.
+
+    Returns:
+        JSON response with executor statistics
+    """
+    return get_executor().stats()
+
+
+@router.get("/engine/stats")
+async def get_engine_stats():
+    """
+    Get task, batching, segment throughput and resident model figures of
+    the separation engine, with the model each quality preset uses.
+
+    Returns:
+        JSON response with engine statistics
+    """
+    engine = get_engine()
+    if engine is None:
+        return {"enabled": False}
+
+    return {"enabled": True, **engine.snapshot(), "quality_presets": QUALITY_PRESETS}
+
+
+@router.get("/cache/stats")
+async def get_cache_stats():
+    """
+    Get hit ratio and bytes saved by the separation result cache.
+
+    Returns:
+        JSON response with cache statistics
+    """
+    cache = get_result_cache()
+    if cache is None:
+        return {"enabled": False}
+
+    return {"enabled": True, **cache.stats()}
+
+
+def request_minio_config(data):
+    """
+    Extract the MinIO configuration of a split request.
+
+    Args:
+        data: Request data
+
+    Returns:
+        MinIO configuration including credentials
+    """
+    return {
+        "endpoint": data.get("minio_endpoint"),
+        "access_key": data.get("minio_access_key"),
+        "secret_key": data.get("minio_secret_key"),
+        "bucket_name": data.get("bucket_name", "stems"),
+        "secure": data.get("minio_secure", False)
+    }
+
 
+def new_job_record(object_name, minio_config, formats, tenant, tier, quality=None):
+    """
+    Build the initial record of a queued job. Credentials are never persisted.
+
+    Args:
+        object_name: Name of the input object in MinIO
+        minio_config: MinIO configuration
+        formats: Deliverable formats
+        tenant: Tenant the job is scheduled for
+        tier: Priority tier of the job
+        quality: Quality preset the job is separated with
 
-async def process_audio_splitting(job_id: str, object_name: str, minio_config: Dict[str, Any]):
+    Returns:
+        Job record
+    """
+    now = time.time()
+    return {
+        "status": "queued",
+        "object_name": object_name,
+        "created_at": now,
+        "updated_at": now,
+        "minio_config": {
+            "endpoint": minio_config["endpoint"],
+            "bucket_name": minio_config["bucket_name"],
+            "secure": minio_config["secure"]
+        },
+        "formats": formats,
+        "tenant": tenant,
+        "tier": tier,
+        "quality": quality,
+        "stage": "queued",
+        "progress": 0,
+        "stems": []
+    }
+
+
+# Queue positions last written to the job store
+_published_positions = {}
+_published_positions_lock = threading.Lock()
+
+
+def current_queue_position(job_id, job):
     """
-    Process audio splitting in the background.
+    Get the live queue position of a job.
+
+    Args:
+        job_id: The ID of the job
+        job: Job record
+
+    Returns:
+        1-based position for queued jobs (for batches, of their first
+        queued track), None otherwise
+    """
+    if job.get("status") != "queued":
+        return None
+    positions = get_executor().queue_positions()
+    if job.get("type") == "batch":
+        # A batch moves with its first queued track
+        return min((positions[child] for child in job.get("children", []) if child in positions), default=None)
+    return positions.get(job_id)
+
+
+def publish_queue_positions(positions):
+    """
+    Store the queue position of every queued job whose position changed.
+
+    Called by the executor whenever jobs are queued or dispatched, so status
+    polls and event streams see positions move.
+
+    Args:
+        positions: Dictionary mapping job IDs to 1-based queue positions
+    """
+    job_store = get_job_store()
+    with _published_positions_lock:
+        changed = {
+            job_id: position for job_id, position in positions.items()
+            if _published_positions.get(job_id) != position
+        }
+        _published_positions.clear()
+        _published_positions.update(positions)
+
+    for job_id, position in changed.items():
+        job_store.update(job_id, queue_position=position)
+
+
+def process_audio_splitting(job_id: str, object_name: str, minio_config: Dict[str, Any], formats=None,
+                            package_zip=True, quality=None):
+    """
+    Process audio splitting on a pipeline worker thread.
 
     Args:
         job_id: The ID of the splitting job
         object_name: Name of the object in MinIO
         minio_config: MinIO configuration
+        formats: Deliverable formats (default: float WAV only)
+        package_zip: Also upload a ZIP package of the stems
+        quality: Quality preset (default: DEFAULT_QUALITY)
     """
+    formats = validate_formats(formats)
     temp_files = []
+    download = None
+    job_store = get_job_store()
+    progress = JobProgress(job_store, job_id)
 
     try:
         # Update job status
-        jobs[job_id]["status"] = "processing"
-        jobs[job_id]["progress"] = 5
-        jobs[job_id]["updated_at"] = time.time()
+        progress.set(2, status="processing", queue_position=None)
 
         # Connect to MinIO
-        minio_client = MinioClient(
+        minio_client = get_minio_client(
             endpoint=minio_config["endpoint"],
             access_key=minio_config["access_key"],
             secret_key=minio_config["secret_key"],
@@ -130,132 +519,230 @@ async def process_audio_splitting(job_id: str, object_name: str, minio_config: D
         )
 
         # Download the file from MinIO
-        jobs[job_id]["progress"] = 10
-        jobs[job_id]["updated_at"] = time.time()
-
-        local_file_path = minio_client.download_file(object_name)
+        download_progress = TransferProgress(progress.stage("downloading", 2, 10))
+        if PIPELINE_EARLY_DECODE and PIPELINE_MODE == "streaming" and get_result_cache() is None:
+            # Start separating the first blocks while the rest is arriving
+            download = minio_client.start_download(object_name, progress=download_progress)
+            local_file_path = download.path
+        else:
+            local_file_path = minio_client.download_file(object_name, progress=download_progress)
         if not local_file_path:
             raise Exception(f"Failed to download file {object_name} from MinIO")
 
         temp_files.append(local_file_path)
 
-        # Update job status
-        jobs[job_id]["progress"] = 20
-        jobs[job_id]["updated_at"] = time.time()
-
-        # Initialize HTDemucs runner
-        demucs_runner = HTDemucsRunner(
-            model_name="htdemucs",
-            device="cuda" if os.environ.get("CUDA_VISIBLE_DEVICES") is not None else "cpu",
-            shifts=1,
-            split=True,
-            overlap=0.25,
-            float32=True
+        # Initialize HTDemucs runner with the model and parameters of the quality
+        demucs_runner = runner_for_quality(
+            quality,
+            "cuda" if os.environ.get("CUDA_VISIBLE_DEVICES") is not None else "cpu"
         )
 
-        # Separate stems
-        jobs[job_id]["progress"] = 30
-        jobs[job_id]["updated_at"] = time.time()
-
         # Get original filename without extension for output naming
         original_filename = os.path.splitext(os.path.basename(object_name))[0]
 
-        # Run HTDemucs
-        logger.info(f"Starting HTDemucs processing for job {job_id}")
-        stem_files = demucs_runner.separate(local_file_path, filename_prefix=original_filename)
-
-        if not stem_files:
-            raise Exception("Stem separation failed")
+        def run_separation(output_prefix):
+            return separate_and_upload(
+                job_id,
+                local_file_path,
+                original_filename,
+                demucs_runner,
+                minio_client,
+                formats,
+                progress,
+                open_input=download.open_reader if download is not None else None,
+                package_zip=package_zip,
+                output_prefix=output_prefix
+            )
+
+        cache = get_result_cache()
+        if cache is not None:
+            # Reuse stems of an identical earlier separation when possible
+            progress.stage("hashing", 10, 12)
+            cache_key = compute_cache_key(
+                local_file_path,
+                {**demucs_runner.settings(), "formats": formats, "package_zip": package_zip},
+                scope=f"{minio_config['endpoint']}/{minio_config['bucket_name']}"
+            )
+            # Outputs live under the key, so a different track with the same
+            # file name never overwrites the objects a cache entry points at
+            stem_outputs, cached = cache.get_or_compute(
+                cache_key,
+                lambda: run_separation(cache_key[:16]),
+                validate=lambda stems: all(minio_client.object_exists(s["object_name"]) for s in stems)
+            )
+        else:
+            stem_outputs, _ = run_separation(job_id)
+            cached = False
 
         # Update job status
-        jobs[job_id]["progress"] = 70
-        jobs[job_id]["updated_at"] = time.time()
-
-        # Process stems (adjust volume, create EE track, etc.)
-        logger.info(f"Processing stems for job {job_id}")
-        stems_processor = StemsProcessor()
-        processed_result = stems_processor.process_stems(
-            local_file_path,
-            stem_files,
-            output_prefix=original_filename
-        )
+        progress.set(100, status="completed", stage="done", stems=stem_outputs, cached=cached)
 
-        if not processed_result:
-            raise Exception("Stem processing failed")
+        logger.info(f"Audio splitting completed for job {job_id}{' (cached)' if cached else ''}")
 
-        # Update job status
-        jobs[job_id]["progress"] = 80
-        jobs[job_id]["updated_at"] = time.time()
+    except Exception as e:
+        logger.error(f"Error processing audio splitting for job {job_id}: {str(e)}")
 
-        # Upload processed stems to MinIO
-        logger.info(f"Uploading processed stems for job {job_id}")
-        stem_outputs = []
+        # Update job status
+        job_store.update(job_id, status="failed", error=str(e))
 
-        for stem_name, stem_path in processed_result["stems"].items():
-            # Upload to MinIO
-            stem_object_name = f"{original_filename}/{os.path.basename(stem_path)}"
-            uploaded_object = minio_client.upload_file(stem_path, stem_object_name)
+    finally:
+        # Stop a download still running after a failure
+        if download is not None:
+            download.cancel()
 
-            if uploaded_object:
-                stem_outputs.append({
-                    "stem_name": stem_name,
-                    "object_name": uploaded_object,
-                    "filename": os.path.basename(stem_path)
-                })
+        # Clean up temporary files
+        cleanup_temp_files(temp_files)
 
-        # Create and upload ZIP package
-        zip_path = stems_processor.create_zip_package(processed_result["output_dir"])
-        if zip_path:
-            zip_object_name = f"{original_filename}_stems.zip"
-            uploaded_zip = minio_client.upload_file(zip_path, zip_object_name)
 
-            if uploaded_zip:
-                # Add ZIP to stems list
-                stem_outputs.append({
-                    "stem_name": "zip",
-                    "object_name": uploaded_zip,
-                    "filename": os.path.basename(zip_path)
-                })
+def separate_and_upload(job_id, local_file_path, original_filename, demucs_runner, minio_client, formats, progress,
+                        open_input=None, package_zip=True, output_prefix=None):
+    """
+    Separate a downloaded file, post-process and encode the stems and upload them.
 
-        # Update job status
-        jobs[job_id]["status"] = "completed"
-        jobs[job_id]["progress"] = 100
-        jobs[job_id]["updated_at"] = time.time()
-        jobs[job_id]["stems"] = stem_outputs
+    Args:
+        job_id: The ID of the splitting job
+        local_file_path: Path to the downloaded input file
+        original_filename: Base name used for output files and objects
+        demucs_runner: Configured HTDemucsRunner
+        minio_client: MinioClient to upload results with
+        formats: Deliverable formats to encode the stems to
+        progress: JobProgress of the job
+        open_input: Optional callable opening the input while it is still
+            downloading (streaming mode only)
+        package_zip: Also upload a ZIP package of the stems
+        output_prefix: Prefix keeping the objects of different inputs with
+            the same file name apart (default: the job ID)
 
-        logger.info(f"Audio splitting completed for job {job_id}")
+    Returns:
+        Tuple of (stem outputs, total uploaded bytes)
+    """
+    # Separate stems, in a directory of their own for the same reason
+    output_prefix = output_prefix or job_id
+    stems_processor = StemsProcessor(os.path.join(PROCESSED_DIR, output_prefix))
 
-    except Exception as e:
-        logger.error(f"Error processing audio splitting for job {job_id}: {str(e)}")
+    try:
+        if PIPELINE_MODE == "memory":
+            # Separate and post-process in one pass without intermediate files
+            logger.info(f"Starting in-memory HTDemucs processing for job {job_id}")
+            processed_result = stems_processor.process_in_memory(
+                local_file_path,
+                demucs_runner,
+                output_prefix=original_filename,
+                progress_callback=progress.stage("separating", 12, 80)
+            )
+        elif PIPELINE_MODE == "streaming":
+            # Separate and post-process block by block with bounded memory
+            logger.info(f"Starting streaming HTDemucs processing for job {job_id}")
+            processed_result = stems_processor.process_streaming(
+                local_file_path,
+                demucs_runner,
+                output_prefix=original_filename,
+                progress_callback=progress.stage("separating", 12, 80),
+                open_input=open_input
+            )
+        else:
+            # Resample once so the EE mix lines up with the stems
+            converted_file_path = convert_to_44100hz(local_file_path)
+
+            # Run HTDemucs
+            logger.info(f"Starting HTDemucs processing for job {job_id}")
+            stem_files = demucs_runner.separate(
+                converted_file_path,
+                filename_prefix=original_filename,
+                progress_callback=progress.stage("separating", 12, 72)
+            )
+
+            if not stem_files:
+                raise Exception("Stem separation failed")
+
+            # Update job status
+            progress.stage("processing", 72, 80)
+
+            # Process stems (adjust volume, create EE track, etc.)
+            logger.info(f"Processing stems for job {job_id}")
+            processed_result = stems_processor.process_stems(
+                converted_file_path,
+                stem_files,
+                output_prefix=original_filename
+            )
+
+            if converted_file_path != local_file_path:
+                cleanup_temp_files([converted_file_path])
 
-        # Update job status
-        jobs[job_id]["status"] = "failed"
-        jobs[job_id]["error"] = str(e)
-        jobs[job_id]["updated_at"] = time.time()
+        if not processed_result:
+            raise Exception("Stem processing failed")
 
-    finally:
-        # Clean up temporary files
-        cleanup_temp_files(temp_files)
+        # Encode all stems to all requested formats in parallel
+        logger.info(f"Encoding stems to {', '.join(formats)} for job {job_id}")
+        encoded = get_encoder_pool().encode(
+            processed_result["stems"],
+            formats,
+            progress_callback=progress.stage("encoding", 80, 85)
+        )
 
-        # Clean up jobs older than 24 hours
-        clean_old_jobs()
+        uploads = [
+            (stem_name, fmt, path, f"{output_prefix}/{original_filename}/{os.path.basename(path)}")
+            for (stem_name, fmt), path in encoded.items()
+        ]
+        zip_object_name = f"{output_prefix}/{original_filename}_stems.zip"
+
+        # The ZIP stores the same files, so about twice their size goes up
+        stem_bytes = sum(os.path.getsize(path) for _, _, path, _ in uploads)
+        upload_progress = TransferProgress(
+            progress.stage("uploading", 85, 99),
+            total_bytes=2 * stem_bytes if package_zip else stem_bytes
+        )
 
+        # Upload stems to MinIO concurrently while the ZIP package is streamed
+        # into its own multipart upload
+        logger.info(f"Uploading {len(uploads)} stems{' and ZIP package' if package_zip else ''} for job {job_id}")
+        with ThreadPoolExecutor(max_workers=1, thread_name_prefix="zip-upload") as zip_pool:
+            zip_future = None
+            if package_zip:
+                zip_future = zip_pool.submit(
+                    stems_processor.upload_zip_package,
+                    processed_result["output_dir"],
+                    minio_client,
+                    zip_object_name,
+                    files=[path for _, _, path, _ in uploads],
+                    progress=upload_progress
+                )
+            uploaded_objects = minio_client.upload_files(
+                [(path, object_name) for _, _, path, object_name in uploads],
+                progress=upload_progress
+            )
+            uploaded_zip, zip_size = zip_future.result() if zip_future is not None else (None, 0)
 
-def clean_old_jobs():
-    """
-    Clean up jobs older than 24 hours.
-    """
-    current_time = time.time()
-    job_ids_to_remove = []
+        stem_outputs = []
+        uploaded_bytes = 0
 
-    for job_id, job_info in jobs.items():
-        # Keep jobs for 24 hours
-        if current_time - job_info.get("created_at", current_time) > 86400:
-            job_ids_to_remove.append(job_id)
+        for (stem_name, fmt, path, _), uploaded_object in zip(uploads, uploaded_objects):
+            if uploaded_object:
+                uploaded_bytes += os.path.getsize(path)
+                stem_outputs.append({
+                    "stem_name": stem_name,
+                    "format": fmt,
+                    "object_name": uploaded_object,
+                    "filename": os.path.basename(path)
+                })
 
-    for job_id in job_ids_to_remove:
-        try:
-            del jobs[job_id]
-            logger.info(f"Cleaned up old job {job_id}")
-        except KeyError:
-            pass
\ No newline at end of file
+        # A partial result must fail the job, so it is never cached
+        if len(stem_outputs) < len(uploads):
+            raise Exception(f"Uploaded {len(stem_outputs)} of {len(uploads)} stems")
+        if package_zip and not uploaded_zip:
+            raise Exception("ZIP package upload failed")
+
+        if uploaded_zip:
+            uploaded_bytes += zip_size
+            # Add ZIP to stems list
+            stem_outputs.append({
+                "stem_name": "zip",
+                "object_name": uploaded_zip,
+                "filename": os.path.basename(f"{processed_result['output_dir']}.zip")
+            })
+
+        return stem_outputs, uploaded_bytes
+    finally:
+        # Every output has been uploaded (or failed) and the ZIP future has
+        # finished, so the local stems and encodings are no longer needed
+        shutil.rmtree(os.path.join(PROCESSED_DIR, output_prefix), ignore_errors=True)
@@ -0,0 +1,187 @@
+"""
+Streaming ZIP packaging for the splitter service.
+
+Archives are written into a bounded in-memory pipe that an uploader reads
+from, so a package can go straight into a MinIO multipart upload without
+being staged on disk. Each entry gets a compression method suited to its
+format: audio is stored as-is, small metadata files are deflated.
+"""
+import os
+import queue
+import shutil
+import time
+import zipfile
+
+# Audio formats that are either PCM (incompressible noise to deflate) or
+# already compressed
+STORED_EXTENSIONS = {".wav", ".aif", ".aiff", ".flac", ".mp3", ".ogg", ".opus", ".m4a", ".zip"}
+
+# Bytes buffered before a chunk is handed to the reader
+PIPE_CHUNK_SIZE = 1024 * 1024
+# Chunks buffered between writer and reader
+PIPE_MAX_CHUNKS = 16
+
+
+def compression_for(filename):
+    """
+    Pick the ZIP compression method for an archive entry.
+
+    Args:
+        filename: Name of the entry
+
+    Returns:
+        zipfile.ZIP_STORED for audio, zipfile.ZIP_DEFLATED otherwise
+    """
+    ext = os.path.splitext(filename)[1].lower()
+    return zipfile.ZIP_STORED if ext in STORED_EXTENSIONS else zipfile.ZIP_DEFLATED
+
+
+def write_zip(fileobj, entries):
+    """
+    Write a ZIP archive of files to a (possibly unseekable) file object.
+
+    Args:
+        fileobj: Writable file object
+        entries: List of (file_path, arcname) tuples
+    """
+    with zipfile.ZipFile(fileobj, "w") as zipf:
+        for file_path, arcname in entries:
+            zipf.write(file_path, arcname, compress_type=compression_for(arcname))
+
+
+def write_zip_streams(fileobj, entries, progress_callback=None):
+    """
+    Write a ZIP archive of streamed entries to a (possibly unseekable) file object.
+
+    Args:
+        fileobj: Writable file object
+        entries: List of (open_entry, arcname) tuples, where open_entry is a
+            callable returning (readable file object, size in bytes or None)
+        progress_callback: Optional callable receiving the number of entries
+            written so far
+    """
+    with zipfile.ZipFile(fileobj, "w") as zipf:
+        for index, (open_entry, arcname) in enumerate(entries):
+            source, size = open_entry()
+            try:
+                info = zipfile.ZipInfo(arcname, date_time=time.localtime()[:6])
+                info.compress_type = compression_for(arcname)
+                if size is not None:
+                    # Lets zipfile decide whether the entry needs ZIP64
+                    info.file_size = size
+                with zipf.open(info, "w", force_zip64=size is None) as dest:
+                    shutil.copyfileobj(source, dest, PIPE_CHUNK_SIZE)
+            finally:
+                source.close()
+
+            if progress_callback is not None:
+                progress_callback(index + 1)
+
+
+class PipeClosedError(IOError):
+    """Raised when writing to a pipe whose reader has gone away."""
+
+
+class StreamPipe:
+    """
+    Bounded one-way byte pipe between a writer thread and a reader thread.
+
+    The writer side is a minimal unseekable file object (enough for
+    zipfile), the reader side returns exactly the requested number of bytes
+    until EOF, as expected by MinIO's part reader.
+    """
+
+    def __init__(self, chunk_size=PIPE_CHUNK_SIZE, max_chunks=PIPE_MAX_CHUNKS):
+        """
+        Initialize the pipe.
+
+        Args:
+            chunk_size: Bytes buffered before a chunk is queued
+            max_chunks: Chunks queued before the writer blocks
+        """
+        self.chunk_size = chunk_size
+        self._chunks = queue.Queue(maxsize=max_chunks)
+        self._write_buffer = bytearray()
+        self._read_buffer = b""
+        self._eof = False
+        self._error = None
+        self._reader_closed = False
+        self.bytes_written = 0
+
+    # Writer side
+
+    def write(self, data):
+        if self._reader_closed:
+            raise PipeClosedError("Pipe reader is closed")
+
+        self._write_buffer += data
+        self.bytes_written += len(data)
+        while len(self._write_buffer) >= self.chunk_size:
+            self._put(bytes(self._write_buffer[:self.chunk_size]))
+            del self._write_buffer[:self.chunk_size]
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def close(self, error=None):
+        """
+        Signal end of data to the reader.
+
+        Args:
+            error: Optional exception re-raised on the reader side
+        """
+        if error is None and self._write_buffer:
+            self._put(bytes(self._write_buffer))
+        self._write_buffer = bytearray()
+        self._error = error
+        self._put(None)
+
+    def _put(self, chunk):
+        while True:
+            if self._reader_closed:
+                raise PipeClosedError("Pipe reader is closed")
+            try:
+                self._chunks.put(chunk, timeout=1.0)
+                return
+            except queue.Full:
+                continue
+
+    # Reader side
+
+    def read(self, size=-1):
+        """
+        Read up to `size` bytes, blocking until they are available or EOF.
+
+        Args:
+            size: Number of bytes to read (-1 for everything)
+
+        Returns:
+            bytes object, empty at EOF
+        """
+        parts = [self._read_buffer]
+        available = len(self._read_buffer)
+
+        while (size < 0 or available < size) and not self._eof:
+            chunk = self._chunks.get()
+            if chunk is None:
+                self._eof = True
+                if self._error is not None:
+                    raise IOError(f"Archive writer failed: {self._error}")
+                break
+            parts.append(chunk)
+            available += len(chunk)
+
+        data = b"".join(parts)
+        if size < 0 or len(data) <= size:
+            self._read_buffer = b""
+            return data
+
+        self._read_buffer = data[size:]
+        return data[:size]
+
+    def close_reader(self):
+        """
+        Stop reading; a blocked or later writer gets PipeClosedError.
+        """
+        self._reader_closed = True
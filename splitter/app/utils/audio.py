@@ -10,6 +10,8 @@ import uuid
 import numpy as np
 import soundfile as sf
 
+from app.utils.resample import PolyphaseResampler, resample
+
 logger = logging.getLogger("splitter.audio")
 
 # Define directories
@@ -18,6 +20,9 @@ OUTPUT_DIR = os.environ.get("OUTPUT_DIR", "/tmp/splitter_output")
 UPLOADS_DIR = os.path.join(TEMP_DIR, "uploads")
 PROCESSED_DIR = os.path.join(TEMP_DIR, "processed")
 
+# Frames processed per block by the streaming helpers
+BLOCK_FRAMES = int(os.environ.get("AUDIO_BLOCK_FRAMES", "262144"))
+
 
 def setup_processing_dirs():
     """
@@ -53,6 +58,8 @@ def convert_to_44100hz(input_file, output_file=None):
     """
     Convert any audio file to 44.1kHz sample rate.
 
+    The file is streamed through a polyphase resampler block by block.
+
     Args:
         input_file: Path to input audio file
         output_file: Path to output file (optional)
@@ -75,11 +82,15 @@ def convert_to_44100hz(input_file, output_file=None):
 
         logger.info(f"Converting {input_file} from {info.samplerate}Hz to 44.1kHz")
 
-        # Read the audio data
-        data, samplerate = sf.read(input_file)
-
-        # Write with new samplerate
-        sf.write(output_file, data, 44100, subtype='PCM_24')
+        # Resample block by block (float output, resampling can overshoot 0 dBFS)
+        with sf.SoundFile(
+                output_file, 'w',
+                samplerate=44100,
+                channels=info.channels,
+                subtype='FLOAT'
+        ) as outfile:
+            for block in iter_audio_44100(input_file):
+                outfile.write(block)
 
         logger.info(f"Successfully converted to {output_file}")
         return output_file
@@ -90,10 +101,98 @@ def convert_to_44100hz(input_file, output_file=None):
         return input_file
 
 
+def iter_audio_44100(input_file, block_frames=BLOCK_FRAMES):
+    """
+    Decode an audio file block by block, resampled to 44.1kHz.
+
+    Args:
+        input_file: Path to input audio file
+        block_frames: Input frames decoded per block
+
+    Yields:
+        (frames, channels) float32 arrays at 44.1kHz
+    """
+    with sf.SoundFile(input_file) as infile:
+        blocks = infile.blocks(blocksize=block_frames, dtype='float32', always_2d=True)
+
+        if abs(infile.samplerate - 44100) < 100:
+            yield from blocks
+            return
+
+        resampler = PolyphaseResampler(infile.samplerate, 44100, infile.channels)
+        for block in blocks:
+            yield resampler.process(block)
+        yield resampler.flush()
+
+
+def overlapping_blocks(chunks, blocksize, overlap):
+    """
+    Regroup a stream of chunks into fixed-size overlapping blocks.
+
+    Consecutive blocks share `overlap` frames, like soundfile.blocks. The last
+    block may be shorter but always contains new frames.
+
+    Args:
+        chunks: Iterable of (frames, channels) arrays
+        blocksize: Frames per block, including the overlap
+        overlap: Frames shared by consecutive blocks
+
+    Yields:
+        (frames, channels) arrays
+    """
+    buffer = None
+    emitted = False
+
+    for chunk in chunks:
+        buffer = chunk if buffer is None else np.concatenate([buffer, chunk])
+        while len(buffer) >= blocksize:
+            yield buffer[:blocksize]
+            emitted = True
+            buffer = buffer[blocksize - overlap:]
+
+    if buffer is not None and (len(buffer) > overlap or not emitted):
+        yield buffer
+
+
+def read_audio_44100(input_file):
+    """
+    Read an audio file into memory as float32 at 44.1kHz.
+
+    Args:
+        input_file: Path to input audio file
+
+    Returns:
+        Tuple of ((frames, channels) float32 array, sample rate)
+    """
+    data, samplerate = sf.read(input_file, dtype='float32', always_2d=True)
+
+    if abs(samplerate - 44100) >= 100:
+        logger.info(f"Resampling {input_file} from {samplerate}Hz to 44.1kHz")
+        data = resample(data, samplerate, 44100)
+
+    return data, 44100
+
+
+def db_to_gain(db_change):
+    """
+    Convert a dB change to a linear amplitude factor.
+
+    Args:
+        db_change: dB change (positive=louder, negative=quieter)
+
+    Returns:
+        Amplitude factor
+    """
+    return float(np.power(10, db_change / 20))
+
+
 def adjust_volume(input_file, output_file, db_change):
     """
     Adjust the volume of an audio file by a certain number of decibels.
 
+    The file is processed block by block, so memory use does not depend on
+    the length of the file.
+
     Args:
         input_file: Path to input audio file
         output_file: Path to output file
@@ -103,16 +202,19 @@ def adjust_volume(input_file, output_file, db_change):
         True if successful, False otherwise
     """
     try:
-        data, samplerate = sf.read(input_file)
-
         # Convert dB to amplitude factor
-        factor = np.power(10, db_change / 20)
-
-        # Adjust volume
-        adjusted_data = data * factor
-
-        # Write output
-        sf.write(output_file, adjusted_data, samplerate, subtype='FLOAT')
+        factor = db_to_gain(db_change)
+
+        with sf.SoundFile(input_file) as infile, sf.SoundFile(
+                output_file, 'w',
+                samplerate=infile.samplerate,
+                channels=infile.channels,
+                subtype='FLOAT'
+        ) as outfile:
+            for block in infile.blocks(blocksize=BLOCK_FRAMES, dtype='float32', always_2d=True):
+                # Adjust volume
+                block *= factor
+                outfile.write(block)
 
         logger.info(f"Audio volume adjusted by {db_change}dB and saved to {output_file}")
         return True
@@ -126,6 +228,9 @@ def invert_phase_and_mix(original_file, stems_files, output_file):
     """
     Invert phase of stems and mix with original for EE stems.
 
+    The original and the stems are read in lockstep, block by block, so
+    memory use does not depend on the length of the track.
+
     Args:
         original_file: Path to original audio file
         stems_files: List of paths to stems files to invert
@@ -134,38 +239,39 @@ def invert_phase_and_mix(original_file, stems_files, output_file):
     Returns:
         True if successful, False otherwise
     """
-    try:
-        # Read the original input file
-        original_data, samplerate = sf.read(original_file)
-
-        # Initialize a numpy array for the sum of selected stems
-        summed_stems_data = None
+    original = None
+    stems = []
 
-        # Sum the selected stems
-        for stem_file in stems_files:
-            data, _ = sf.read(stem_file)
-            if summed_stems_data is None:
-                summed_stems_data = np.zeros_like(data)
-            summed_stems_data += data
-
-        # Invert phase of the summed stems
-        inverted_stems_data = summed_stems_data * -1
-
-        # Check for shape mismatch and handle it
-        if original_data.shape != inverted_stems_data.shape:
-            logger.warning(f"Shape mismatch: original={original_data.shape}, stems={inverted_stems_data.shape}")
-
-            # Resize to the smaller of the two lengths
-            min_length = min(original_data.shape[0], inverted_stems_data.shape[0])
-            original_data = original_data[:min_length]
-            inverted_stems_data = inverted_stems_data[:min_length]
-            logger.info(f"Resized both arrays to length {min_length}")
-
-        # Mix inverted phase stems with the original track
-        mixed_data = original_data + inverted_stems_data
-
-        # Write the result to the output file
-        sf.write(output_file, mixed_data, samplerate, subtype='FLOAT')
+    try:
+        original = sf.SoundFile(original_file)
+        stems = [sf.SoundFile(stem_file) for stem_file in stems_files]
+
+        # Check for length mismatch and handle it
+        length = min([original.frames] + [stem.frames for stem in stems])
+        if any(f.frames != length for f in [original] + stems):
+            logger.warning(f"Length mismatch: original={original.frames}, stems={[s.frames for s in stems]}")
+            logger.info(f"Mixing the first {length} frames")
+
+        # A mono original is broadcast against stereo stems
+        channels = max(f.channels for f in [original] + stems)
+
+        with sf.SoundFile(
+                output_file, 'w',
+                samplerate=original.samplerate,
+                channels=channels,
+                subtype='FLOAT'
+        ) as outfile:
+            remaining = length
+            while remaining > 0:
+                frames = min(BLOCK_FRAMES, remaining)
+
+                # Mix inverted phase stems with the original track
+                mixed = original.read(frames, dtype='float32', always_2d=True)
+                for stem in stems:
+                    mixed = mixed - stem.read(frames, dtype='float32', always_2d=True)
+
+                outfile.write(mixed)
+                remaining -= frames
 
         logger.info(f"Mixed and saved EE track to {output_file}")
         return True
@@ -174,6 +280,11 @@ def invert_phase_and_mix(original_file, stems_files, output_file):
         logger.error(f"Error creating EE mix: {str(e)}")
         return False
 
+    finally:
+        for f in [original] + stems:
+            if f is not None:
+                f.close()
+
 
 def normalize_audio(audio_data, target_db=-1.0):
     """
@@ -0,0 +1,237 @@
+"""
+Batch (album) jobs for the splitter service.
+
+A batch is a parent job record whose children are ordinary split jobs,
+queued together for one tenant. A BatchTracker follows the children through
+job store listeners, keeps the parent's aggregate progress and status up to
+date and, if requested, streams every track's stems into one album archive
+once the last child has finished.
+"""
+import os
+import logging
+import threading
+
+from app.utils.archive import write_zip_streams
+from app.utils.job_executor import get_executor, QueueFullError
+from app.utils.job_store import TERMINAL_STATUSES
+from app.utils.minio_client import get_minio_client
+from app.utils.progress import JobProgress
+
+logger = logging.getLogger("splitter.batches")
+
+# Largest number of tracks accepted in one batch
+BATCH_MAX_TRACKS = int(os.environ.get("BATCH_MAX_TRACKS", "50"))
+
+# Share of a batch's progress taken by building the album archive
+ALBUM_ARCHIVE_SHARE = 10
+
+
+class BatchTracker:
+    """
+    Aggregates the progress of a batch's child jobs into the parent record.
+    """
+
+    def __init__(self, job_store, batch_id, child_ids, minio_config, album_name=None, tenant=None, tier=None):
+        """
+        Initialize the tracker.
+
+        Args:
+            job_store: JobStore holding the parent and child records
+            batch_id: The ID of the parent job
+            child_ids: IDs of the child jobs, in track order
+            minio_config: MinIO configuration including credentials
+            album_name: Base name of the album archive, or None for no archive
+            tenant: Tenant the archive job is scheduled for
+            tier: Priority tier of the archive job
+        """
+        self.job_store = job_store
+        self.batch_id = batch_id
+        self.child_ids = list(child_ids)
+        self.minio_config = minio_config
+        self.album_name = album_name
+        self.tenant = tenant
+        self.tier = tier
+
+        self.progress = JobProgress(job_store, batch_id)
+        # Progress range covered by the children
+        self.children_share = 100 - ALBUM_ARCHIVE_SHARE if album_name else 100
+
+        self._children = {child_id: ("queued", 0.0) for child_id in self.child_ids}
+        self._started = False
+        self._finished = False
+        self._lock = threading.Lock()
+
+    def start(self):
+        """
+        Start following the child jobs. Call before they are queued.
+        """
+        for child_id in self.child_ids:
+            self.job_store.add_listener(child_id, self._on_child_change)
+
+    def stop(self):
+        """
+        Stop following the child jobs.
+        """
+        for child_id in self.child_ids:
+            self.job_store.remove_listener(child_id, self._on_child_change)
+
+    def _on_child_change(self, child_id, record):
+        """
+        Job store listener, called on the thread that changed a child.
+        """
+        status = record.get("status")
+        terminal = status in TERMINAL_STATUSES
+
+        with self._lock:
+            if self._finished:
+                return
+            self._children[child_id] = (status, 100.0 if terminal else float(record.get("progress") or 0))
+
+            statuses = [child_status for child_status, _ in self._children.values()]
+            done = sum(1 for child_status in statuses if child_status in TERMINAL_STATUSES)
+            failed = statuses.count("failed")
+            percent = sum(child_progress for _, child_progress in self._children.values()) / len(self._children)
+
+            first_start = status == "processing" and not self._started
+            self._started = self._started or first_start
+            finished = self._finished = done == len(self._children)
+
+        if terminal:
+            self.job_store.remove_listener(child_id, self._on_child_change)
+
+        percent = percent * self.children_share / 100
+        if first_start:
+            self.progress.set(percent, status="processing", stage="separating")
+        elif terminal:
+            self.progress.set(percent, completed_tracks=done - failed, failed_tracks=failed)
+        else:
+            self.progress.set(percent)
+
+        if finished:
+            self._finish()
+
+    def _finish(self):
+        """
+        Complete the batch once every child has completed or failed.
+        """
+        tracks = []
+        for child_id in self.child_ids:
+            child = self.job_store.get(child_id) or {}
+            tracks.append({
+                "job_id": child_id,
+                "object_name": child.get("object_name"),
+                "status": child.get("status", "failed"),
+                "stems": child.get("stems", []),
+                "error": child.get("error")
+            })
+
+        if not any(track["status"] == "completed" for track in tracks):
+            self.job_store.update(self.batch_id, status="failed", stage="done", tracks=tracks, error="All tracks failed")
+            logger.error(f"Batch {self.batch_id} failed, no track could be split")
+            return
+
+        if not self.album_name:
+            self.progress.set(100, status="completed", stage="done", tracks=tracks)
+            logger.info(f"Batch {self.batch_id} completed")
+            return
+
+        self._submit_archive(tracks)
+
+    def _submit_archive(self, tracks):
+        """
+        Queue the album archive as a job of the batch's tenant.
+
+        This runs in the listener of the last child's update, so the archive
+        is never built here; while the queue is full, the submit is retried
+        on a timer after the executor's suggested delay.
+        """
+        try:
+            get_executor().submit(self._build_archive, tracks, tenant=self.tenant, tier=self.tier)
+        except QueueFullError as e:
+            logger.info(f"Job queue is full, queueing the album archive of batch {self.batch_id} in {e.retry_after}s")
+            timer = threading.Timer(e.retry_after, self._submit_archive, args=(tracks,))
+            timer.daemon = True
+            timer.start()
+
+    def _build_archive(self, tracks):
+        """
+        Stream the stems of all completed tracks into one album ZIP.
+
+        Entries are read from MinIO and written into a multipart upload as
+        they are packed, each track in its own folder.
+        """
+        report = self.progress.stage("archiving", self.children_share, 99)
+        object_name = f"{self.batch_id}/{self.album_name}_stems.zip"
+
+        try:
+            minio_client = get_minio_client(**self.minio_config)
+            entries = album_entries(tracks, minio_client)
+
+            uploaded_zip, _ = minio_client.upload_stream(
+                lambda zip_file: write_zip_streams(
+                    zip_file,
+                    entries,
+                    progress_callback=lambda count: report(count / len(entries))
+                ),
+                object_name,
+                content_type="application/zip"
+            )
+        except Exception as e:
+            logger.error(f"Error building album archive for batch {self.batch_id}: {str(e)}")
+            uploaded_zip = None
+
+        if uploaded_zip:
+            stems = [{
+                "stem_name": "zip",
+                "object_name": uploaded_zip,
+                "filename": os.path.basename(uploaded_zip)
+            }]
+            self.progress.set(100, status="completed", stage="done", tracks=tracks, stems=stems)
+            logger.info(f"Batch {self.batch_id} completed with album archive {uploaded_zip}")
+        else:
+            # The tracks themselves are still usable
+            self.progress.set(
+                100,
+                status="completed",
+                stage="done",
+                tracks=tracks,
+                error="Album archive could not be created"
+            )
+
+
+def album_entries(tracks, minio_client):
+    """
+    List the archive entries of a batch's completed tracks.
+
+    Args:
+        tracks: Track summaries of the batch
+        minio_client: MinioClient the stems are read from
+
+    Returns:
+        List of (open_entry, arcname) tuples for write_zip_streams
+    """
+    entries = []
+    folders = set()
+
+    for track in tracks:
+        if track["status"] != "completed":
+            continue
+
+        # One folder per track, named after its input file
+        base = os.path.splitext(os.path.basename(track["object_name"] or track["job_id"]))[0]
+        folder = base
+        suffix = 2
+        while folder in folders:
+            folder = f"{base} ({suffix})"
+            suffix += 1
+        folders.add(folder)
+
+        for stem in track["stems"]:
+            if stem.get("stem_name") == "zip":
+                continue
+            entries.append((
+                lambda name=stem["object_name"]: minio_client.open_object(name),
+                f"{folder}/{stem['filename']}"
+            ))
+
+    return entries
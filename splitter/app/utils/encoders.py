@@ -0,0 +1,301 @@
+"""
+Multi-format encoder stage for stem deliverables.
+
+Encodes float stems to MP3, FLAC, Opus and 24-bit PCM WAV on a process pool,
+so all stems and formats of a job are encoded in parallel instead of one
+after another on the pipeline thread. Encoders are fed in fixed-size chunks,
+so the full signal is never converted to integer PCM at once.
+"""
+import os
+import logging
+import multiprocessing as mp
+import threading
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+
+import numpy as np
+import soundfile as sf
+
+from app.utils.resample import PolyphaseResampler
+
+logger = logging.getLogger("splitter.encoders")
+
+# Encoder settings
+ENCODER_WORKERS = int(os.environ.get("ENCODER_WORKERS", "0")) or os.cpu_count() or 1
+ENCODE_CHUNK_FRAMES = int(os.environ.get("ENCODE_CHUNK_FRAMES", "65536"))
+MP3_BITRATE = int(os.environ.get("MP3_BITRATE", "320"))
+OPUS_COMPRESSION_LEVEL = os.environ.get("OPUS_COMPRESSION_LEVEL")
+
+# Opus only supports a few rates, stems are resampled to this one
+OPUS_SAMPLE_RATE = 48000
+
+# Deliverable formats: name -> (file suffix, content type). "wav" is the
+# 32-bit float output of the separation pipeline and needs no encoding.
+SUPPORTED_FORMATS = {
+    "wav": (".wav", "audio/wav"),
+    "wav24": ("_24bit.wav", "audio/wav"),
+    "flac": (".flac", "audio/flac"),
+    "mp3": (".mp3", "audio/mpeg"),
+    "opus": (".opus", "audio/ogg"),
+}
+DEFAULT_FORMATS = ["wav"]
+
+
+def output_path_for(wav_file, fmt):
+    """
+    Get the path an encoded version of a stem is written to.
+
+    Args:
+        wav_file: Path to the float WAV stem
+        fmt: Format name from SUPPORTED_FORMATS
+
+    Returns:
+        Path of the encoded file
+    """
+    suffix, _ = SUPPORTED_FORMATS[fmt]
+    return f"{os.path.splitext(wav_file)[0]}{suffix}"
+
+
+def _to_int16(chunk):
+    """
+    Convert a float chunk to interleaved 16-bit PCM bytes.
+    """
+    return (np.clip(chunk, -1.0, 1.0) * 32767).astype(np.int16).tobytes()
+
+
+def _encode_mp3(wav_file, output_path, info, bitrate):
+    import lameenc
+
+    encoder = lameenc.Encoder()
+    encoder.set_bit_rate(bitrate)
+    encoder.set_in_sample_rate(info.samplerate)
+    encoder.set_channels(info.channels)
+    encoder.set_quality(2)  # High quality
+
+    with open(output_path, "wb") as f:
+        for chunk in sf.blocks(wav_file, blocksize=ENCODE_CHUNK_FRAMES, dtype="float32", always_2d=True):
+            f.write(encoder.encode(_to_int16(chunk)))
+        f.write(encoder.flush())
+
+
+def _encode_soundfile(wav_file, output_path, info, format, subtype, samplerate=None, compression_level=None):
+    resampler = None
+    if samplerate and samplerate != info.samplerate:
+        resampler = PolyphaseResampler(info.samplerate, samplerate, info.channels)
+
+    kwargs = {}
+    if compression_level is not None:
+        kwargs["compression_level"] = compression_level
+
+    with sf.SoundFile(
+            output_path, "w",
+            samplerate=samplerate or info.samplerate,
+            channels=info.channels,
+            format=format,
+            subtype=subtype,
+            **kwargs
+    ) as out:
+        for chunk in sf.blocks(wav_file, blocksize=ENCODE_CHUNK_FRAMES, dtype="float32", always_2d=True):
+            if resampler is not None:
+                chunk = resampler.process(chunk)
+            out.write(np.clip(chunk, -1.0, 1.0))
+        if resampler is not None:
+            out.write(np.clip(resampler.flush(), -1.0, 1.0))
+
+
+def encode_file(wav_file, fmt, mp3_bitrate=MP3_BITRATE):
+    """
+    Encode a float WAV stem to one deliverable format.
+
+    Runs in an encoder process.
+
+    Args:
+        wav_file: Path to the float WAV stem
+        fmt: Format name from SUPPORTED_FORMATS
+        mp3_bitrate: MP3 bitrate in kbps
+
+    Returns:
+        Path to the encoded file
+    """
+    if fmt == "wav":
+        return wav_file
+
+    info = sf.info(wav_file)
+    output_path = output_path_for(wav_file, fmt)
+
+    if fmt == "mp3":
+        _encode_mp3(wav_file, output_path, info, mp3_bitrate)
+    elif fmt == "flac":
+        _encode_soundfile(wav_file, output_path, info, "FLAC", "PCM_24")
+    elif fmt == "wav24":
+        _encode_soundfile(wav_file, output_path, info, "WAV", "PCM_24")
+    elif fmt == "opus":
+        compression_level = float(OPUS_COMPRESSION_LEVEL) if OPUS_COMPRESSION_LEVEL else None
+        _encode_soundfile(
+            wav_file, output_path, info, "OGG", "OPUS",
+            samplerate=OPUS_SAMPLE_RATE,
+            compression_level=compression_level
+        )
+    else:
+        raise ValueError(f"Unsupported format: {fmt}")
+
+    return output_path
+
+
+def validate_formats(formats):
+    """
+    Normalize a client's list of requested formats.
+
+    Args:
+        formats: List of format names, or None for the default
+
+    Returns:
+        De-duplicated list of format names
+
+    Raises:
+        ValueError: If a format is not supported
+    """
+    if not formats:
+        return list(DEFAULT_FORMATS)
+
+    if isinstance(formats, str):
+        formats = [formats]
+
+    normalized = []
+    for fmt in formats:
+        fmt = str(fmt).lower()
+        if fmt not in SUPPORTED_FORMATS:
+            raise ValueError(
+                f"Unsupported format '{fmt}', expected one of: {', '.join(SUPPORTED_FORMATS)}"
+            )
+        if fmt not in normalized:
+            normalized.append(fmt)
+    return normalized
+
+
+class EncodingError(Exception):
+    """Raised when a stem could not be encoded to a requested format."""
+
+
+class EncoderPool:
+    """
+    Process pool that encodes stems to deliverable formats.
+
+    If an encoder process dies (out of memory, a crash in a native encoder)
+    the pool is broken for good, so it is replaced with a fresh one.
+    """
+
+    def __init__(self, num_workers=None):
+        """
+        Initialize the encoder pool.
+
+        Args:
+            num_workers: Number of encoder processes (default: ENCODER_WORKERS)
+        """
+        self.num_workers = max(1, num_workers or ENCODER_WORKERS)
+        self._lock = threading.Lock()
+        self._pool = self._new_pool()
+        logger.info(f"Encoder pool started with {self.num_workers} process(es)")
+
+    def _new_pool(self):
+        return ProcessPoolExecutor(
+            max_workers=self.num_workers,
+            mp_context=mp.get_context("spawn")
+        )
+
+    def _replace_broken(self, pool):
+        """
+        Replace the process pool if it is still the broken one.
+        """
+        with self._lock:
+            if self._pool is pool:
+                logger.error("Encoder process died, restarting the encoder pool")
+                self._pool = self._new_pool()
+                pool.shutdown(wait=False, cancel_futures=True)
+
+    def encode(self, stem_files, formats, progress_callback=None):
+        """
+        Encode every stem to every requested format in parallel.
+
+        Args:
+            stem_files: Dictionary mapping stem names to float WAV paths
+            formats: List of format names
+            progress_callback: Optional callable receiving the completed fraction (0-1)
+
+        Returns:
+            Dictionary mapping (stem name, format) to the encoded file path
+
+        Raises:
+            EncodingError: If any stem could not be encoded to any format
+        """
+        with self._lock:
+            pool = self._pool
+
+        encoded = {}
+        futures = {}
+        key = None
+        try:
+            for stem_name, wav_file in stem_files.items():
+                for fmt in formats:
+                    if fmt == "wav":
+                        # The pipeline output already is the float WAV
+                        encoded[(stem_name, fmt)] = wav_file
+                    else:
+                        key = (stem_name, fmt)
+                        futures[key] = pool.submit(encode_file, wav_file, fmt)
+
+            keys = {future: key for key, future in futures.items()}
+            for done, future in enumerate(as_completed(keys), 1):
+                key = keys[future]
+                encoded[key] = future.result()
+                if progress_callback is not None:
+                    progress_callback(done / len(keys))
+        except Exception as e:
+            for future in futures.values():
+                future.cancel()
+            if isinstance(e, BrokenProcessPool):
+                self._replace_broken(pool)
+            logger.error(f"Error encoding {key[0]} to {key[1]}: {str(e)}")
+            raise EncodingError(f"Could not encode {key[0]} to {key[1]}: {str(e) or type(e).__name__}") from e
+
+        # Keep the stem/format order stable for the job record
+        return {
+            (stem_name, fmt): encoded[(stem_name, fmt)]
+            for stem_name in stem_files
+            for fmt in formats
+        }
+
+    def shutdown(self):
+        """
+        Stop the encoder processes.
+        """
+        with self._lock:
+            pool = self._pool
+        pool.shutdown(wait=True, cancel_futures=True)
+        logger.info("Encoder pool stopped")
+
+
+# Process-wide encoder pool
+_encoder_pool = None
+_encoder_pool_lock = threading.Lock()
+
+
+def get_encoder_pool():
+    """
+    Get the process-wide encoder pool, starting it on first use.
+    """
+    global _encoder_pool
+    with _encoder_pool_lock:
+        if _encoder_pool is None:
+            _encoder_pool = EncoderPool()
+        return _encoder_pool
+
+
+def stop_encoder_pool():
+    """
+    Stop the process-wide encoder pool if it was started.
+    """
+    global _encoder_pool
+    if _encoder_pool is not None:
+        _encoder_pool.shutdown()
+        _encoder_pool = None
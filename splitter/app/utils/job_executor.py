@@ -0,0 +1,466 @@
+"""
+Bounded job executor for the splitting pipeline.
+
+Runs pipeline jobs on a fixed number of worker threads fed by a bounded queue,
+so blocking MinIO, soundfile and separation calls never run on the event loop
+and the service can refuse work explicitly when it is saturated.
+
+The queue is shared fairly between tenants (licenses): jobs are dispatched by
+start-time fair queuing, so a tenant submitting a whole album gets its share
+of the workers without pushing everyone else's jobs behind the album.
+"""
+import os
+import logging
+import math
+import queue
+import threading
+import time
+from collections import deque
+
+logger = logging.getLogger("splitter.executor")
+
+# Executor settings
+PIPELINE_WORKERS = int(os.environ.get("PIPELINE_WORKERS", "2"))
+PIPELINE_QUEUE_SIZE = int(os.environ.get("PIPELINE_QUEUE_SIZE", "20"))
+# Jobs of one tenant running at the same time (0 = no cap)
+TENANT_MAX_RUNNING = int(os.environ.get("TENANT_MAX_RUNNING", "0"))
+# Jobs of one tenant waiting in the queue (0 = only the global limit)
+TENANT_MAX_QUEUED = int(os.environ.get("TENANT_MAX_QUEUED", "0"))
+# Priority tiers as "name:weight" pairs, a tier with weight 4 gets four
+# times the share of a tier with weight 1
+PIPELINE_TIER_WEIGHTS = os.environ.get("PIPELINE_TIER_WEIGHTS", "standard:1,priority:4")
+DEFAULT_TIER = "standard"
+
+# Tenant of jobs submitted without one
+DEFAULT_TENANT = "default"
+
+
+def parse_tier_weights(spec):
+    """
+    Parse priority tier weights.
+
+    Args:
+        spec: Comma-separated "name:weight" pairs
+
+    Returns:
+        Dictionary mapping tier names to weights
+    """
+    weights = {}
+    for pair in spec.split(","):
+        if not pair.strip():
+            continue
+        name, _, weight = pair.partition(":")
+        weights[name.strip()] = max(float(weight or 1), 0.01)
+    weights.setdefault(DEFAULT_TIER, 1.0)
+    return weights
+
+
+class QueueFullError(Exception):
+    """Raised when a job is submitted while the queue is full."""
+
+    def __init__(self, retry_after):
+        super().__init__("Job queue is full")
+        self.retry_after = retry_after
+
+
+class _QueuedJob:
+    """
+    A job waiting in the fair queue.
+    """
+    __slots__ = ("fn", "args", "kwargs", "tenant", "job_id", "start_tag", "seq")
+
+    def __init__(self, fn, args, kwargs, tenant, job_id, start_tag, seq):
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.tenant = tenant
+        self.job_id = job_id
+        self.start_tag = start_tag
+        self.seq = seq
+
+
+class _TenantState:
+    """
+    Queued jobs and accounting of one tenant.
+    """
+    __slots__ = ("jobs", "running", "finish_tag")
+
+    def __init__(self):
+        self.jobs = deque()
+        self.running = 0
+        self.finish_tag = 0.0
+
+
+class FairQueue:
+    """
+    Bounded multi-tenant queue with start-time fair queuing.
+
+    Every job is tagged on arrival with a virtual start time: the later of
+    the queue's virtual time and the finish tag of the tenant's previous job.
+    Each job advances its tenant's finish tag by 1 / weight of its tier.
+    Workers take the job with the lowest start tag among tenants below their
+    running cap, so a tenant that just arrived is served after at most one
+    job of every other active tenant, however many those have queued.
+    """
+
+    def __init__(self, max_size, tenant_max_running=0, tenant_max_queued=0, tier_weights=None):
+        """
+        Initialize the queue.
+
+        Args:
+            max_size: Maximum number of queued jobs
+            tenant_max_running: Maximum running jobs per tenant (0 = no cap)
+            tenant_max_queued: Maximum queued jobs per tenant (0 = no cap)
+            tier_weights: Dictionary mapping tier names to weights
+        """
+        self.max_size = max_size
+        self.tenant_max_running = tenant_max_running
+        self.tenant_max_queued = tenant_max_queued
+        self.tier_weights = tier_weights or parse_tier_weights(PIPELINE_TIER_WEIGHTS)
+
+        self._tenants = {}
+        self._size = 0
+        self._seq = 0
+        self._virtual_time = 0.0
+        self._closed = False
+        self._cond = threading.Condition()
+
+    def put(self, fn, args, kwargs, tenant=None, tier=None, job_id=None):
+        """
+        Queue a job without blocking.
+
+        Raises:
+            queue.Full: If the queue or the tenant's share of it is full
+            ValueError: If the tier is unknown
+        """
+        self.put_many([(fn, args, kwargs, job_id)], tenant=tenant, tier=tier)
+
+    def put_many(self, calls, tenant=None, tier=None):
+        """
+        Queue several jobs of one tenant at once, all or none of them.
+
+        The jobs get consecutive tags of the tenant, so they are dispatched
+        in order and interleave with other tenants like separate submissions.
+
+        Args:
+            calls: List of (fn, args, kwargs, job_id) tuples
+            tenant: Tenant the jobs are scheduled for
+            tier: Priority tier name
+
+        Raises:
+            queue.Full: If the queue or the tenant's share of it has no room
+                for all of the jobs
+            ValueError: If the tier is unknown
+        """
+        tier = tier or DEFAULT_TIER
+        if tier not in self.tier_weights:
+            raise ValueError(f"Unknown priority tier '{tier}', expected one of: {', '.join(self.tier_weights)}")
+        tenant = tenant or DEFAULT_TENANT
+
+        with self._cond:
+            state = self._tenants.get(tenant)
+            if self._size + len(calls) > self.max_size:
+                raise queue.Full
+            queued = len(state.jobs) if state is not None else 0
+            if self.tenant_max_queued and queued + len(calls) > self.tenant_max_queued:
+                raise queue.Full
+
+            if state is None:
+                state = self._tenants[tenant] = _TenantState()
+
+            for fn, args, kwargs, job_id in calls:
+                start_tag = max(self._virtual_time, state.finish_tag)
+                state.finish_tag = start_tag + 1.0 / self.tier_weights[tier]
+                self._seq += 1
+                state.jobs.append(_QueuedJob(fn, args, kwargs, tenant, job_id, start_tag, self._seq))
+                self._size += 1
+            self._cond.notify(len(calls))
+
+    def get(self):
+        """
+        Take the next job, blocking until one can run.
+
+        Returns:
+            The job, or None once the queue is closed
+        """
+        with self._cond:
+            while True:
+                if self._closed:
+                    return None
+                job = self._next_job()
+                if job is not None:
+                    break
+                self._cond.wait()
+
+            state = self._tenants[job.tenant]
+            state.jobs.popleft()
+            state.running += 1
+            self._size -= 1
+            self._virtual_time = max(self._virtual_time, job.start_tag)
+            return job
+
+    def task_done(self, job):
+        """
+        Mark a job returned by get() as finished.
+        """
+        with self._cond:
+            state = self._tenants[job.tenant]
+            state.running -= 1
+            if not state.jobs and not state.running:
+                del self._tenants[job.tenant]
+            # A tenant below its cap again may have a job ready
+            self._cond.notify_all()
+
+    def close(self):
+        """
+        Make get() return None for every waiting and future caller.
+        """
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    def qsize(self):
+        return self._size
+
+    def tenant_count(self):
+        return len(self._tenants)
+
+    def positions(self):
+        """
+        Get the dispatch order of queued jobs, ignoring running caps.
+
+        Returns:
+            Dictionary mapping job IDs to 1-based queue positions
+        """
+        with self._cond:
+            jobs = sorted(
+                (job for state in self._tenants.values() for job in state.jobs),
+                key=lambda job: (job.start_tag, job.seq)
+            )
+        return {job.job_id: position for position, job in enumerate(jobs, 1) if job.job_id is not None}
+
+    def _next_job(self):
+        best = None
+        for state in self._tenants.values():
+            if not state.jobs:
+                continue
+            if self.tenant_max_running and state.running >= self.tenant_max_running:
+                continue
+            head = state.jobs[0]
+            if best is None or (head.start_tag, head.seq) < (best.start_tag, best.seq):
+                best = head
+        return best
+
+
+class JobExecutor:
+    """
+    Fixed pool of pipeline worker threads with a bounded, tenant-fair queue.
+    """
+
+    def __init__(self, num_workers=None, max_queue=None, tenant_max_running=None,
+                 tenant_max_queued=None, position_listener=None):
+        """
+        Initialize the executor.
+
+        Args:
+            num_workers: Number of pipeline worker threads (default: PIPELINE_WORKERS)
+            max_queue: Maximum number of queued jobs (default: PIPELINE_QUEUE_SIZE)
+            tenant_max_running: Maximum running jobs per tenant (default: TENANT_MAX_RUNNING)
+            tenant_max_queued: Maximum queued jobs per tenant (default: TENANT_MAX_QUEUED)
+            position_listener: Optional callable receiving {job_id: position}
+                of the queued jobs whenever the queue changes
+        """
+        self.num_workers = max(1, num_workers or PIPELINE_WORKERS)
+        self.max_queue = max(1, max_queue or PIPELINE_QUEUE_SIZE)
+
+        self._queue = FairQueue(
+            self.max_queue,
+            tenant_max_running=TENANT_MAX_RUNNING if tenant_max_running is None else tenant_max_running,
+            tenant_max_queued=TENANT_MAX_QUEUED if tenant_max_queued is None else tenant_max_queued
+        )
+        self._position_listener = position_listener
+        self._threads = []
+        self._running = 0
+        self._lock = threading.Lock()
+
+        # Exponential moving average of job duration, used for Retry-After
+        self._avg_duration = None
+
+    def start(self):
+        """
+        Start the worker threads.
+        """
+        for index in range(self.num_workers):
+            thread = threading.Thread(
+                target=self._worker,
+                name=f"pipeline-worker-{index}",
+                daemon=True
+            )
+            thread.start()
+            self._threads.append(thread)
+
+        logger.info(f"Job executor started with {self.num_workers} worker(s), queue size {self.max_queue}")
+
+    def stop(self, timeout=5.0):
+        """
+        Ask the worker threads to exit after their current job.
+
+        Args:
+            timeout: Seconds to wait for each thread
+        """
+        self._queue.close()
+
+        for thread in self._threads:
+            thread.join(timeout)
+
+        self._threads = []
+        logger.info("Job executor stopped")
+
+    def submit(self, fn, *args, tenant=None, tier=None, job_id=None, **kwargs):
+        """
+        Queue a job for execution.
+
+        Args:
+            fn: Callable to run on a worker thread
+            *args: Positional arguments for fn
+            tenant: Tenant the job is scheduled for (e.g. a license hash)
+            tier: Priority tier name from PIPELINE_TIER_WEIGHTS
+            job_id: Job ID reported in queue positions
+            **kwargs: Keyword arguments for fn
+
+        Raises:
+            QueueFullError: If the queue, or the tenant's share of it, is full
+            ValueError: If the tier is unknown
+        """
+        try:
+            self._queue.put(fn, args, kwargs, tenant=tenant, tier=tier, job_id=job_id)
+        except queue.Full:
+            raise QueueFullError(self.retry_after())
+        self._publish_positions()
+
+    def submit_many(self, calls, tenant=None, tier=None):
+        """
+        Queue several jobs of one tenant at once, all or none of them.
+
+        Args:
+            calls: List of (fn, args, kwargs, job_id) tuples
+            tenant: Tenant the jobs are scheduled for (e.g. a license hash)
+            tier: Priority tier name from PIPELINE_TIER_WEIGHTS
+
+        Raises:
+            QueueFullError: If the queue, or the tenant's share of it, has no
+                room for all of the jobs
+            ValueError: If the tier is unknown
+        """
+        try:
+            self._queue.put_many(calls, tenant=tenant, tier=tier)
+        except queue.Full:
+            raise QueueFullError(self.retry_after())
+        self._publish_positions()
+
+    def queue_positions(self):
+        """
+        Get the position of every queued job.
+
+        Returns:
+            Dictionary mapping job IDs to 1-based queue positions
+        """
+        return self._queue.positions()
+
+    def retry_after(self):
+        """
+        Estimate how many seconds a client should wait before retrying.
+
+        Returns:
+            Suggested Retry-After value in seconds
+        """
+        # A queue slot frees up roughly every avg_duration / num_workers seconds
+        avg_duration = self._avg_duration or 60.0
+        return max(5, int(math.ceil(avg_duration / self.num_workers)))
+
+    def stats(self):
+        """
+        Get executor load information.
+
+        Returns:
+            Dictionary with worker, queue and timing figures
+        """
+        return {
+            "workers": self.num_workers,
+            "running": self._running,
+            "queued": self._queue.qsize(),
+            "max_queue": self.max_queue,
+            "tenants": self._queue.tenant_count(),
+            "avg_job_seconds": round(self._avg_duration, 1) if self._avg_duration else None
+        }
+
+    def _publish_positions(self):
+        if self._position_listener is None:
+            return
+        try:
+            self._position_listener(self._queue.positions())
+        except Exception as e:
+            logger.error(f"Error publishing queue positions: {str(e)}")
+
+    def _worker(self):
+        """
+        Worker thread loop.
+        """
+        while True:
+            job = self._queue.get()
+            if job is None:
+                break
+
+            self._publish_positions()
+            with self._lock:
+                self._running += 1
+
+            started = time.time()
+            try:
+                job.fn(*job.args, **job.kwargs)
+            except Exception as e:
+                logger.error(f"Unhandled error in pipeline job: {str(e)}")
+            finally:
+                self._queue.task_done(job)
+                duration = time.time() - started
+                with self._lock:
+                    self._running -= 1
+                    if self._avg_duration is None:
+                        self._avg_duration = duration
+                    else:
+                        self._avg_duration = 0.8 * self._avg_duration + 0.2 * duration
+
+
+# Process-wide executor instance
+_executor = None
+
+
+def start_executor(**kwargs):
+    """
+    Create and start the process-wide job executor.
+
+    Returns:
+        The running JobExecutor
+    """
+    global _executor
+    if _executor is None:
+        _executor = JobExecutor(**kwargs)
+        _executor.start()
+    return _executor
+
+
+def get_executor():
+    """
+    Get the process-wide job executor, starting it on first use.
+    """
+    return _executor or start_executor()
+
+
+def stop_executor():
+    """
+    Stop the process-wide job executor if it is running.
+    """
+    global _executor
+    if _executor is not None:
+        _executor.stop()
+        _executor = None
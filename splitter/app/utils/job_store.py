@@ -0,0 +1,370 @@
+"""
+Job store for tracking splitting jobs.
+
+Provides a small pluggable interface with an in-memory implementation and a
+SQLite-backed default that survives restarts. Expired jobs are removed by a
+timer-driven sweep instead of a scan at the end of every job.
+"""
+import os
+import json
+import heapq
+import logging
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+
+from app.utils.audio import OUTPUT_DIR
+
+logger = logging.getLogger("splitter.jobs")
+
+# Job store settings
+JOB_STORE = os.environ.get("JOB_STORE", "sqlite")
+JOB_DB_PATH = os.environ.get("JOB_DB_PATH", os.path.join(OUTPUT_DIR, "jobs.sqlite3"))
+JOB_TTL_SECONDS = int(os.environ.get("JOB_TTL_SECONDS", "86400"))
+JOB_SWEEP_INTERVAL = int(os.environ.get("JOB_SWEEP_INTERVAL", "300"))
+
+# Statuses of jobs that have not finished yet
+ACTIVE_STATUSES = ("queued", "processing")
+# Statuses after which a job no longer changes
+TERMINAL_STATUSES = ("completed", "failed")
+
+
+class JobStore(ABC):
+    """
+    Base class for job stores.
+
+    Records are plain dictionaries that always carry `status`, `created_at`
+    and `updated_at`. Listeners registered for a job are called with the new
+    record after every create and update, on the thread that made the change.
+    """
+
+    def __init__(self, ttl_seconds=JOB_TTL_SECONDS):
+        """
+        Initialize the job store.
+
+        Args:
+            ttl_seconds: Age after which jobs are removed by the sweeper
+        """
+        self.ttl_seconds = ttl_seconds
+        self._sweeper = None
+        self._sweeper_stop = threading.Event()
+        self._listeners = {}  # job_id -> set of callables
+        self._listeners_lock = threading.Lock()
+
+    @abstractmethod
+    def create(self, job_id, record):
+        """Store a new job record."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def get(self, job_id):
+        """Get a job record, or None if it does not exist."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def update(self, job_id, **fields):
+        """Merge fields into a job record and bump `updated_at`."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def delete(self, job_id):
+        """Remove a job record."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def expire(self, older_than):
+        """
+        Remove jobs created before a timestamp.
+
+        Args:
+            older_than: Unix timestamp
+
+        Returns:
+            Number of jobs removed
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def fail_interrupted(self, error="Interrupted by service restart"):
+        """
+        Mark jobs that were still active as failed (used at startup).
+
+        Returns:
+            Number of jobs marked as failed
+        """
+        raise NotImplementedError
+
+    def __contains__(self, job_id):
+        return self.get(job_id) is not None
+
+    def add_listener(self, job_id, callback):
+        """
+        Register a callable notified of every change to a job.
+
+        Args:
+            job_id: The ID of the job to watch
+            callback: Callable taking (job_id, record)
+        """
+        with self._listeners_lock:
+            self._listeners.setdefault(job_id, set()).add(callback)
+
+    def remove_listener(self, job_id, callback):
+        """
+        Unregister a callable added with add_listener.
+        """
+        with self._listeners_lock:
+            callbacks = self._listeners.get(job_id)
+            if callbacks is not None:
+                callbacks.discard(callback)
+                if not callbacks:
+                    del self._listeners[job_id]
+
+    def _notify(self, job_id, record):
+        """
+        Call the listeners of a job with its new record.
+        """
+        with self._listeners_lock:
+            callbacks = list(self._listeners.get(job_id, ()))
+
+        for callback in callbacks:
+            try:
+                callback(job_id, dict(record))
+            except Exception as e:
+                logger.error(f"Error in job listener for {job_id}: {str(e)}")
+
+    def sweep(self):
+        """
+        Remove jobs older than the configured TTL.
+        """
+        removed = self.expire(time.time() - self.ttl_seconds)
+        if removed:
+            logger.info(f"Cleaned up {removed} old job(s)")
+        return removed
+
+    def start_sweeper(self, interval=JOB_SWEEP_INTERVAL):
+        """
+        Start a background thread that sweeps expired jobs periodically.
+
+        Args:
+            interval: Seconds between sweeps
+        """
+        def run():
+            while not self._sweeper_stop.wait(interval):
+                try:
+                    self.sweep()
+                except Exception as e:
+                    logger.error(f"Error sweeping old jobs: {str(e)}")
+
+        self._sweeper_stop.clear()
+        self._sweeper = threading.Thread(target=run, name="job-sweeper", daemon=True)
+        self._sweeper.start()
+
+    def stop_sweeper(self):
+        """
+        Stop the sweeper thread.
+        """
+        self._sweeper_stop.set()
+        if self._sweeper is not None:
+            self._sweeper.join(5.0)
+            self._sweeper = None
+
+    def close(self):
+        """
+        Release resources held by the store.
+        """
+        self.stop_sweeper()
+
+
+class MemoryJobStore(JobStore):
+    """
+    Job store kept in process memory. Jobs are lost on restart.
+    """
+
+    def __init__(self, ttl_seconds=JOB_TTL_SECONDS):
+        super().__init__(ttl_seconds)
+        self._jobs = {}
+        self._expiry_heap = []  # (created_at, job_id)
+        self._lock = threading.Lock()
+
+    def create(self, job_id, record):
+        record = dict(record)
+        with self._lock:
+            self._jobs[job_id] = record
+            heapq.heappush(self._expiry_heap, (record["created_at"], job_id))
+        self._notify(job_id, record)
+        return record
+
+    def get(self, job_id):
+        with self._lock:
+            record = self._jobs.get(job_id)
+            return dict(record) if record is not None else None
+
+    def update(self, job_id, **fields):
+        with self._lock:
+            record = self._jobs.get(job_id)
+            if record is None:
+                return None
+            record.update(fields)
+            record["updated_at"] = time.time()
+            record = dict(record)
+        self._notify(job_id, record)
+        return record
+
+    def delete(self, job_id):
+        with self._lock:
+            self._jobs.pop(job_id, None)
+
+    def expire(self, older_than):
+        removed = 0
+        with self._lock:
+            while self._expiry_heap and self._expiry_heap[0][0] < older_than:
+                _, job_id = heapq.heappop(self._expiry_heap)
+                if self._jobs.pop(job_id, None) is not None:
+                    removed += 1
+        return removed
+
+    def fail_interrupted(self, error="Interrupted by service restart"):
+        # Nothing survives a restart in memory
+        return 0
+
+
+class SQLiteJobStore(JobStore):
+    """
+    Job store persisted in SQLite, indexed by job_id, status and created_at.
+    """
+
+    def __init__(self, db_path=JOB_DB_PATH, ttl_seconds=JOB_TTL_SECONDS):
+        """
+        Initialize the SQLite job store.
+
+        Args:
+            db_path: Path to the SQLite database file
+            ttl_seconds: Age after which jobs are removed by the sweeper
+        """
+        super().__init__(ttl_seconds)
+        self.db_path = db_path
+
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS jobs (
+                job_id TEXT PRIMARY KEY,
+                status TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL,
+                data TEXT NOT NULL
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_created_at ON jobs (created_at)")
+
+        logger.info(f"Using SQLite job store at {db_path}")
+
+    def create(self, job_id, record):
+        record = dict(record)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO jobs (job_id, status, created_at, updated_at, data) VALUES (?, ?, ?, ?, ?)",
+                (job_id, record["status"], record["created_at"], record["updated_at"], json.dumps(record))
+            )
+        self._notify(job_id, record)
+        return record
+
+    def get(self, job_id):
+        with self._lock:
+            row = self._conn.execute("SELECT data FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def update(self, job_id, **fields):
+        with self._lock:
+            row = self._conn.execute("SELECT data FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+            if row is None:
+                return None
+
+            record = json.loads(row[0])
+            record.update(fields)
+            record["updated_at"] = time.time()
+
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, updated_at = ?, data = ? WHERE job_id = ?",
+                (record["status"], record["updated_at"], json.dumps(record), job_id)
+            )
+        self._notify(job_id, record)
+        return record
+
+    def delete(self, job_id):
+        with self._lock:
+            self._conn.execute("DELETE FROM jobs WHERE job_id = ?", (job_id,))
+
+    def expire(self, older_than):
+        with self._lock:
+            cursor = self._conn.execute("DELETE FROM jobs WHERE created_at < ?", (older_than,))
+        return cursor.rowcount
+
+    def fail_interrupted(self, error="Interrupted by service restart"):
+        placeholders = ", ".join("?" for _ in ACTIVE_STATUSES)
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT job_id FROM jobs WHERE status IN ({placeholders})",
+                ACTIVE_STATUSES
+            ).fetchall()
+
+        for (job_id,) in rows:
+            self.update(job_id, status="failed", error=error)
+
+        if rows:
+            logger.warning(f"Marked {len(rows)} interrupted job(s) as failed")
+        return len(rows)
+
+    def close(self):
+        super().close()
+        with self._lock:
+            self._conn.close()
+
+
+def create_job_store(kind=JOB_STORE):
+    """
+    Create a job store by name.
+
+    Args:
+        kind: "sqlite" or "memory"
+
+    Returns:
+        A JobStore instance
+    """
+    if kind == "memory":
+        return MemoryJobStore()
+    if kind == "sqlite":
+        return SQLiteJobStore()
+    raise ValueError(f"Unknown job store: {kind}")
+
+
+# Process-wide job store instance
+_job_store = None
+
+
+def get_job_store():
+    """
+    Get the process-wide job store, creating it on first use.
+    """
+    global _job_store
+    if _job_store is None:
+        _job_store = create_job_store()
+    return _job_store
+
+
+def close_job_store():
+    """
+    Close the process-wide job store if it was created.
+    """
+    global _job_store
+    if _job_store is not None:
+        _job_store.close()
+        _job_store = None
@@ -5,12 +5,465 @@ import os
 import logging
 from io import BytesIO
 import tempfile
+import threading
+import time
 import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import certifi
+import urllib3
 from minio import Minio
 from minio.error import S3Error
 
+from app.utils.archive import StreamPipe, PipeClosedError
+from app.utils.audio import get_temp_filepath
+from app.utils.job_executor import PIPELINE_WORKERS
+
 logger = logging.getLogger("splitter.minio")
 
+# Upload settings
+MINIO_UPLOAD_WORKERS = int(os.environ.get("MINIO_UPLOAD_WORKERS", "4"))
+MINIO_PART_SIZE = int(os.environ.get("MINIO_PART_SIZE", str(16 * 1024 * 1024)))
+# Parts in flight per object. minio-py queues every part of an object before
+# uploading them in parallel, so values above 1 buffer the whole object in
+# memory and make byte progress track reads instead of sends.
+MINIO_PART_PARALLELISM = int(os.environ.get("MINIO_PART_PARALLELISM", "1"))
+MINIO_UPLOAD_RETRIES = int(os.environ.get("MINIO_UPLOAD_RETRIES", "3"))
+MINIO_RETRY_BACKOFF = float(os.environ.get("MINIO_RETRY_BACKOFF", "1.0"))
+
+# Download settings: objects of at least MINIO_RANGED_DOWNLOAD_MIN_SIZE bytes
+# are fetched as MINIO_DOWNLOAD_CHUNK_SIZE ranges on MINIO_DOWNLOAD_WORKERS
+# connections
+MINIO_DOWNLOAD_WORKERS = int(os.environ.get("MINIO_DOWNLOAD_WORKERS", "4"))
+MINIO_DOWNLOAD_CHUNK_SIZE = int(os.environ.get("MINIO_DOWNLOAD_CHUNK_SIZE", str(16 * 1024 * 1024)))
+MINIO_RANGED_DOWNLOAD_MIN_SIZE = int(os.environ.get("MINIO_RANGED_DOWNLOAD_MIN_SIZE", str(64 * 1024 * 1024)))
+
+# Pooled connections per MinIO host, shared by all jobs. Defaults to enough
+# for every pipeline worker transferring on all its connections at once.
+MINIO_POOL_MAXSIZE = int(os.environ.get("MINIO_POOL_MAXSIZE", "0")) or max(
+    10, PIPELINE_WORKERS * max(MINIO_UPLOAD_WORKERS * MINIO_PART_PARALLELISM, MINIO_DOWNLOAD_WORKERS)
+)
+
+# Bytes read from a range response at a time
+_DOWNLOAD_READ_SIZE = 1024 * 1024
+
+
+def _create_http_client(maxsize):
+    """
+    Create the HTTP connection pool used by the MinIO client.
+
+    Mirrors the MinIO default but with enough connections for every
+    concurrent object and part upload, so connections are reused instead of
+    being discarded when the pool is full.
+
+    Args:
+        maxsize: Maximum number of pooled connections per host
+
+    Returns:
+        urllib3.PoolManager instance
+    """
+    timeout = 300
+    return urllib3.PoolManager(
+        timeout=urllib3.util.Timeout(connect=timeout, read=timeout),
+        maxsize=maxsize,
+        cert_reqs="CERT_REQUIRED",
+        ca_certs=os.environ.get("SSL_CERT_FILE") or certifi.where(),
+        retries=urllib3.Retry(
+            total=5,
+            backoff_factor=0.2,
+            status_forcelist=[500, 502, 503, 504]
+        )
+    )
+
+
+# Connection pool shared by every MinIO client of the process
+_http_client = None
+# Minio instances by (endpoint, access key, secret key, secure)
+_minio_clients = {}
+# MinioClient instances by (endpoint, access key, secret key, bucket, secure)
+_client_registry = {}
+# (endpoint, secure, bucket) of buckets known to exist
+_known_buckets = set()
+_registry_lock = threading.Lock()
+
+
+def _shared_minio(endpoint, access_key, secret_key, secure):
+    """
+    Get the Minio instance for an endpoint and credentials, creating it on
+    first use on top of the shared connection pool.
+    """
+    global _http_client
+    key = (endpoint, access_key, secret_key, secure)
+    with _registry_lock:
+        client = _minio_clients.get(key)
+        if client is None:
+            if _http_client is None:
+                _http_client = _create_http_client(MINIO_POOL_MAXSIZE)
+            client = Minio(
+                endpoint,
+                access_key=access_key,
+                secret_key=secret_key,
+                secure=secure,
+                http_client=_http_client
+            )
+            _minio_clients[key] = client
+        return client
+
+
+def get_minio_client(endpoint, access_key, secret_key, bucket_name="stems", secure=False):
+    """
+    Get a MinioClient from the process-wide registry.
+
+    Jobs for the same endpoint, credentials and bucket reuse one client, so
+    they share its connections and skip the bucket check.
+
+    Args:
+        endpoint: MinIO server endpoint
+        access_key: MinIO access key
+        secret_key: MinIO secret key
+        bucket_name: Bucket name for storing files
+        secure: Use secure connection
+
+    Returns:
+        MinioClient instance
+    """
+    key = (endpoint, access_key, secret_key, bucket_name, secure)
+    with _registry_lock:
+        client = _client_registry.get(key)
+    if client is not None:
+        # Retries the bucket check if it failed before, no-op otherwise
+        client.ensure_bucket_exists()
+        return client
+
+    client = MinioClient(endpoint, access_key, secret_key, bucket_name=bucket_name, secure=secure)
+    with _registry_lock:
+        return _client_registry.setdefault(key, client)
+
+
+def clear_minio_clients():
+    """
+    Forget all registered clients and known buckets and close the shared pool.
+    """
+    global _http_client
+    with _registry_lock:
+        _client_registry.clear()
+        _minio_clients.clear()
+        _known_buckets.clear()
+        if _http_client is not None:
+            _http_client.clear()
+            _http_client = None
+
+
+class TransferProgress:
+    """
+    Aggregated byte progress of several concurrent uploads.
+    """
+
+    def __init__(self, callback, total_bytes=None):
+        """
+        Initialize the progress aggregate.
+
+        Args:
+            callback: Callable receiving the transferred fraction (0-1)
+            total_bytes: Expected number of bytes across all transfers, or
+                None to add up the object sizes reported by MinIO
+        """
+        self.callback = callback
+        self.total_bytes = total_bytes or 0
+        self.transferred = 0
+        self._sized_by_objects = not total_bytes
+        self._lock = threading.Lock()
+
+    def tracker(self):
+        """
+        Create a progress object for one upload, as accepted by minio-py.
+        """
+        return _ObjectProgress(self)
+
+    def _add_total(self, size):
+        with self._lock:
+            if self._sized_by_objects and size > 0:
+                self.total_bytes += size
+
+    def _add(self, size):
+        with self._lock:
+            self.transferred += size
+            fraction = min(1.0, self.transferred / max(1, self.total_bytes))
+        self.callback(fraction)
+
+
+class _ObjectProgress(threading.Thread):
+    """
+    Per-object progress hook. minio-py only accepts Thread instances as
+    progress objects; this one is never started.
+    """
+
+    def __init__(self, parent):
+        super().__init__(daemon=True)
+        self._parent = parent
+        self._bytes = 0
+        self._sized = False
+
+    def set_meta(self, object_name, total_length):
+        if not self._sized:
+            self._parent._add_total(total_length)
+            self._sized = True
+
+        # Called at the start of every attempt, discount a failed one
+        if self._bytes:
+            self._parent._add(-self._bytes)
+            self._bytes = 0
+
+    def update(self, size):
+        self._bytes += size
+        self._parent._add(size)
+
+
+class RangedDownload:
+    """
+    Download of one object as byte ranges fetched in parallel.
+
+    Ranges are written with pwrite into a file preallocated to the object's
+    size. They are requested in order, so the file fills up roughly from the
+    start, and readers from open_reader() can decode the beginning of the
+    file while the rest is still arriving.
+    """
+
+    def __init__(self, client, bucket_name, object_name, output_path, size,
+                 progress=None, workers=None, chunk_size=None):
+        """
+        Initialize the download.
+
+        Args:
+            client: Minio instance
+            bucket_name: Bucket of the object
+            object_name: Name of the object
+            output_path: Path to write the object to
+            size: Size of the object in bytes
+            progress: Optional TransferProgress to report bytes to
+            workers: Concurrent range requests (default: MINIO_DOWNLOAD_WORKERS)
+            chunk_size: Bytes per range (default: MINIO_DOWNLOAD_CHUNK_SIZE)
+        """
+        self.client = client
+        self.bucket_name = bucket_name
+        self.object_name = object_name
+        self.path = output_path
+        self.size = size
+        self.progress = progress
+        self.chunk_size = max(1, chunk_size or MINIO_DOWNLOAD_CHUNK_SIZE)
+
+        self._ranges = [
+            (offset, min(self.chunk_size, size - offset))
+            for offset in range(0, size, self.chunk_size)
+        ]
+        self._done = [False] * len(self._ranges)
+        self._contiguous = 0  # Number of leading ranges on disk
+        self._pending = len(self._ranges)  # Range tasks that have not exited
+        self._error = None
+        self._cond = threading.Condition()
+
+        self._fd = None
+        self._pool = ThreadPoolExecutor(
+            max_workers=max(1, min(len(self._ranges), workers or MINIO_DOWNLOAD_WORKERS)),
+            thread_name_prefix="minio-download"
+        )
+
+    def start(self):
+        """
+        Preallocate the output file and start fetching ranges.
+
+        Returns:
+            self
+        """
+        try:
+            self._fd = os.open(self.path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            if self.size:
+                if hasattr(os, "posix_fallocate"):
+                    os.posix_fallocate(self._fd, 0, self.size)
+                else:
+                    os.ftruncate(self._fd, self.size)
+        except Exception:
+            # E.g. the disk is full; do not leak the descriptor and the pool
+            self._close()
+            raise
+
+        if not self._ranges:
+            self._close()
+        for index in range(len(self._ranges)):
+            self._pool.submit(self._run_fetch, index)
+        return self
+
+    def wait(self, timeout=None):
+        """
+        Wait for the whole object to be on disk.
+
+        Args:
+            timeout: Maximum seconds to wait
+
+        Returns:
+            Path of the downloaded file
+
+        Raises:
+            Exception: The error that made the download fail
+        """
+        self.wait_for(self.size, timeout)
+        return self.path
+
+    def wait_for(self, end, timeout=None):
+        """
+        Wait until the first `end` bytes of the object are on disk.
+
+        Args:
+            end: Byte offset
+            timeout: Maximum seconds to wait
+
+        Raises:
+            Exception: The error that made the download fail
+            TimeoutError: If the bytes did not arrive in time
+        """
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._error is not None or self._available() >= end, timeout):
+                raise TimeoutError(f"Timed out downloading {self.object_name}")
+            if self._error is not None:
+                raise self._error
+
+    def open_reader(self):
+        """
+        Open a file object over the download that blocks until the bytes it
+        reads have arrived.
+
+        Returns:
+            ProgressiveReader
+        """
+        return ProgressiveReader(self)
+
+    def cancel(self):
+        """
+        Stop fetching ranges that have not started yet.
+        """
+        self._fail(Exception(f"Download of {self.object_name} cancelled"))
+
+    def _available(self):
+        if self._contiguous == len(self._ranges):
+            return self.size
+        return self._contiguous * self.chunk_size
+
+    def _run_fetch(self, index):
+        try:
+            # After a failure the remaining ranges are skipped
+            if self._error is None:
+                self._fetch(index)
+        except Exception as e:
+            self._fail(e)
+        finally:
+            with self._cond:
+                self._pending -= 1
+                last = self._pending == 0
+            # Only close once no thread can write to the descriptor anymore
+            if last:
+                self._close()
+
+    def _fetch(self, index):
+
+        offset, length = self._ranges[index]
+        tracker = self.progress.tracker() if self.progress is not None else None
+
+        for attempt in range(MINIO_UPLOAD_RETRIES + 1):
+            response = None
+            try:
+                if tracker is not None:
+                    tracker.set_meta(self.object_name, length)
+
+                response = self.client.get_object(self.bucket_name, self.object_name, offset=offset, length=length)
+                position = offset
+                for data in response.stream(_DOWNLOAD_READ_SIZE):
+                    os.pwrite(self._fd, data, position)
+                    position += len(data)
+                    if tracker is not None:
+                        tracker.update(len(data))
+
+                if position != offset + length:
+                    raise IOError(f"Range at {offset} ended after {position - offset} of {length} bytes")
+                break
+            except (S3Error, urllib3.exceptions.HTTPError, OSError) as err:
+                if attempt == MINIO_UPLOAD_RETRIES or self._error is not None:
+                    raise
+
+                delay = MINIO_RETRY_BACKOFF * 2 ** attempt
+                logger.warning(f"Range {offset}-{offset + length} of {self.object_name} failed ({err}), "
+                               f"retrying in {delay:.1f}s")
+                time.sleep(delay)
+            finally:
+                if response is not None:
+                    response.close()
+                    response.release_conn()
+
+        with self._cond:
+            self._done[index] = True
+            while self._contiguous < len(self._done) and self._done[self._contiguous]:
+                self._contiguous += 1
+            self._cond.notify_all()
+
+    def _close(self):
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+        self._pool.shutdown(wait=False)
+
+    def _fail(self, error):
+        with self._cond:
+            if self._error is None:
+                self._error = error
+            self._cond.notify_all()
+
+
+class ProgressiveReader:
+    """
+    Read-only, seekable file object over a RangedDownload in progress.
+
+    Reads block until the requested bytes are on disk, so it can be handed
+    to soundfile while the download is still running.
+    """
+
+    def __init__(self, download):
+        self._download = download
+        self._file = open(download.path, "rb")
+
+    def read(self, size=-1):
+        position = self._file.tell()
+        end = self._download.size if size is None or size < 0 else min(position + size, self._download.size)
+        self._download.wait_for(end)
+        return self._file.read(-1 if size is None else size)
+
+    def readinto(self, buffer):
+        data = self.read(len(buffer))
+        buffer[:len(data)] = data
+        return len(data)
+
+    def seek(self, offset, whence=os.SEEK_SET):
+        if whence == os.SEEK_END:
+            # The file is preallocated, seek relative to the object size
+            return self._file.seek(self._download.size + offset, os.SEEK_SET)
+        return self._file.seek(offset, whence)
+
+    def tell(self):
+        return self._file.tell()
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
 
 class MinioClient:
     """
@@ -41,12 +494,9 @@ class MinioClient:
         self.bucket_name = bucket_name
         self.secure = secure
 
-        self.client = Minio(
-            endpoint,
-            access_key=access_key,
-            secret_key=secret_key,
-            secure=secure
-        )
+        # Clients with the same endpoint and credentials share one Minio
+        # instance (and its region cache), all of them one connection pool
+        self.client = _shared_minio(endpoint, access_key, secret_key, secure)
 
         # Ensure bucket exists
         self.ensure_bucket_exists()
@@ -54,92 +504,263 @@ class MinioClient:
     def ensure_bucket_exists(self):
         """
         Ensure that the bucket exists, creating it if needed.
+
+        Buckets found or created once are remembered for the lifetime of the
+        process, so later clients skip the round-trip.
         """
+        bucket_key = (self.endpoint, self.secure, self.bucket_name)
+        if bucket_key in _known_buckets:
+            return True
+
         try:
             if not self.client.bucket_exists(self.bucket_name):
                 self.client.make_bucket(self.bucket_name)
                 logger.info(f"Bucket '{self.bucket_name}' created successfully")
+            _known_buckets.add(bucket_key)
             return True
         except S3Error as err:
             logger.error(f"Error ensuring bucket exists: {err}")
             return False
 
-    def download_file(self, object_name, output_path=None):
+    def download_file(self, object_name, output_path=None, progress=None):
         """
         Download a file from MinIO.
 
+        Objects of at least MINIO_RANGED_DOWNLOAD_MIN_SIZE bytes are fetched
+        as parallel byte ranges.
+
         Args:
             object_name: The name of the object in the bucket
-            output_path: Path to save the file (optional)
+            output_path: Path to save the file (default: a new file in the
+                splitter's scratch directory)
+            progress: Optional TransferProgress to report bytes to
 
         Returns:
             Path to the downloaded file or None if failed
         """
         try:
-            # If no output path specified, create a temporary file
+            # If no output path specified, create a scratch file
             if output_path is None:
-                ext = os.path.splitext(object_name)[1] or ".tmp"
-                output_file = tempfile.NamedTemporaryFile(delete=False, suffix=ext)
-                output_path = output_file.name
-                output_file.close()
+                output_path = self._scratch_path(object_name)
 
-            # Download the file
-            self.client.fget_object(
-                bucket_name=self.bucket_name,
-                object_name=object_name,
-                file_path=output_path
-            )
+            size = self.client.stat_object(self.bucket_name, object_name).size
+            if size >= MINIO_RANGED_DOWNLOAD_MIN_SIZE:
+                self.start_download(object_name, output_path, progress=progress, size=size).wait()
+            else:
+                # Download the file
+                self.client.fget_object(
+                    bucket_name=self.bucket_name,
+                    object_name=object_name,
+                    file_path=output_path,
+                    progress=progress.tracker() if progress is not None else None
+                )
 
             logger.info(f"Downloaded {object_name} to {output_path}")
             return output_path
-        except S3Error as err:
+        except (S3Error, urllib3.exceptions.HTTPError, OSError) as err:
             logger.error(f"Error downloading file from MinIO: {err}")
+            if output_path is not None and os.path.exists(output_path):
+                os.remove(output_path)
             return None
 
-    def upload_file(self, file_path, object_name=None, content_type=None):
+    def start_download(self, object_name, output_path=None, progress=None, size=None):
+        """
+        Start a parallel ranged download and return without waiting for it.
+
+        Args:
+            object_name: The name of the object in the bucket
+            output_path: Path to save the file (default: a new file in the
+                splitter's scratch directory)
+            progress: Optional TransferProgress to report bytes to
+            size: Size of the object, if already known
+
+        Returns:
+            The running RangedDownload
+
+        Raises:
+            S3Error: If the object cannot be found
+        """
+        if output_path is None:
+            output_path = self._scratch_path(object_name)
+        if size is None:
+            size = self.client.stat_object(self.bucket_name, object_name).size
+
+        return RangedDownload(
+            self.client,
+            self.bucket_name,
+            object_name,
+            output_path,
+            size,
+            progress=progress
+        ).start()
+
+    @staticmethod
+    def _scratch_path(object_name):
+        ext = os.path.splitext(object_name)[1] or ".tmp"
+        return get_temp_filepath(os.path.basename(object_name), suffix=ext)
+
+    def upload_file(self, file_path, object_name=None, content_type=None, progress=None):
         """
         Upload a file to MinIO.
 
+        Large files are sent as a multipart upload with MINIO_PART_SIZE parts,
+        MINIO_PART_PARALLELISM of them in flight at once. Failed uploads are
+        retried up to MINIO_UPLOAD_RETRIES times with exponential backoff.
+
         Args:
             file_path: Path to the file to upload
             object_name: Name to use for the object (optional)
             content_type: Content type of the file (optional)
+            progress: Optional TransferProgress to report bytes to
 
         Returns:
             The object name if successful, None otherwise
         """
-        try:
-            # Determine object name if not provided
-            if object_name is None:
-                _, ext = os.path.splitext(file_path)
-                object_name = f"{uuid.uuid4().hex}{ext}"
-
-            # Determine content type if not provided
-            if content_type is None:
-                # Guess content type based on extension
-                ext = os.path.splitext(file_path)[1].lower()
-                if ext == ".wav":
-                    content_type = "audio/wav"
-                elif ext == ".mp3":
-                    content_type = "audio/mpeg"
-                elif ext == ".flac":
-                    content_type = "audio/flac"
-                else:
-                    content_type = "application/octet-stream"
+        # Determine object name if not provided
+        if object_name is None:
+            _, ext = os.path.splitext(file_path)
+            object_name = f"{uuid.uuid4().hex}{ext}"
 
-            # Upload file
-            self.client.fput_object(
-                bucket_name=self.bucket_name,
-                object_name=object_name,
-                file_path=file_path,
-                content_type=content_type
-            )
+        # Determine content type if not provided
+        if content_type is None:
+            # Guess content type based on extension
+            ext = os.path.splitext(file_path)[1].lower()
+            if ext == ".wav":
+                content_type = "audio/wav"
+            elif ext == ".mp3":
+                content_type = "audio/mpeg"
+            elif ext == ".flac":
+                content_type = "audio/flac"
+            elif ext == ".opus":
+                content_type = "audio/ogg"
+            elif ext == ".zip":
+                content_type = "application/zip"
+            else:
+                content_type = "application/octet-stream"
 
-            logger.info(f"Uploaded {file_path} to MinIO as {object_name}")
-            return object_name
-        except S3Error as err:
-            logger.error(f"Error uploading file to MinIO: {err}")
-            return None
+        tracker = progress.tracker() if progress is not None else None
+
+        for attempt in range(MINIO_UPLOAD_RETRIES + 1):
+            try:
+                # Upload file
+                self.client.fput_object(
+                    bucket_name=self.bucket_name,
+                    object_name=object_name,
+                    file_path=file_path,
+                    content_type=content_type,
+                    progress=tracker,
+                    part_size=MINIO_PART_SIZE,
+                    num_parallel_uploads=MINIO_PART_PARALLELISM
+                )
+
+                logger.info(f"Uploaded {file_path} to MinIO as {object_name}")
+                return object_name
+            except (S3Error, urllib3.exceptions.HTTPError, OSError) as err:
+                if attempt == MINIO_UPLOAD_RETRIES:
+                    logger.error(f"Error uploading file to MinIO: {err}")
+                    return None
+
+                delay = MINIO_RETRY_BACKOFF * 2 ** attempt
+                logger.warning(f"Upload of {object_name} failed ({err}), retrying in {delay:.1f}s")
+                time.sleep(delay)
+
+    def upload_files(self, uploads, max_workers=None, progress=None):
+        """
+        Upload several files to MinIO concurrently.
+
+        Each object is retried independently, so one failed upload does not
+        restart the others.
+
+        Args:
+            uploads: List of (file_path, object_name) tuples
+            max_workers: Number of concurrent uploads (default: MINIO_UPLOAD_WORKERS)
+            progress: Optional TransferProgress to report bytes to
+
+        Returns:
+            List with the object name (or None if it failed) for each upload, in order
+        """
+        if not uploads:
+            return []
+
+        workers = min(len(uploads), max_workers or MINIO_UPLOAD_WORKERS)
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="minio-upload") as pool:
+            futures = [
+                pool.submit(self.upload_file, file_path, object_name, progress=progress)
+                for file_path, object_name in uploads
+            ]
+            return [future.result() for future in futures]
+
+    def upload_stream(self, produce, object_name, content_type="application/octet-stream", progress=None):
+        """
+        Upload data generated on the fly as a multipart upload of unknown length.
+
+        `produce` is called on a separate thread with a writable, unseekable
+        file object and writes the object's content to it. Parts are sent
+        while it is still writing, so the data is never staged on disk. A
+        failed upload is retried by producing the data again.
+
+        Args:
+            produce: Callable taking a writable file object
+            object_name: Name to use for the object
+            content_type: Content type of the data
+            progress: Optional TransferProgress to report bytes to
+
+        Returns:
+            Tuple of (object name, bytes uploaded) if successful, (None, 0) otherwise
+        """
+        tracker = progress.tracker() if progress is not None else None
+
+        for attempt in range(MINIO_UPLOAD_RETRIES + 1):
+            pipe = StreamPipe()
+
+            def run():
+                try:
+                    produce(pipe)
+                    pipe.close()
+                except PipeClosedError:
+                    pass
+                except Exception as e:
+                    try:
+                        pipe.close(error=e)
+                    except PipeClosedError:
+                        pass
+
+            writer = threading.Thread(target=run, name="minio-stream-writer", daemon=True)
+            writer.start()
+
+            try:
+                self.client.put_object(
+                    bucket_name=self.bucket_name,
+                    object_name=object_name,
+                    data=pipe,
+                    length=-1,
+                    content_type=content_type,
+                    progress=tracker,
+                    part_size=MINIO_PART_SIZE,
+                    # Parallel parts would drain the whole pipe into memory
+                    num_parallel_uploads=1
+                )
+                writer.join()
+
+                logger.info(f"Streamed {pipe.bytes_written} bytes to MinIO as {object_name}")
+                return object_name, pipe.bytes_written
+            except (S3Error, urllib3.exceptions.HTTPError, OSError) as err:
+                pipe.close_reader()
+                writer.join()
+
+                if attempt == MINIO_UPLOAD_RETRIES:
+                    logger.error(f"Error streaming upload to MinIO: {err}")
+                    return None, 0
+
+                delay = MINIO_RETRY_BACKOFF * 2 ** attempt
+                logger.warning(f"Streamed upload of {object_name} failed ({err}), retrying in {delay:.1f}s")
+                time.sleep(delay)
+            except BaseException:
+                # Not retried, but the writer must not stay blocked on the
+                # full pipe with the files it is packing still open
+                pipe.close_reader()
+                writer.join()
+                raise
 
     def upload_bytes(self, data, object_name, content_type="application/octet-stream"):
         """
@@ -173,6 +794,40 @@ class MinioClient:
             logger.error(f"Error uploading bytes to MinIO: {err}")
             return None
 
+    def open_object(self, object_name):
+        """
+        Open an object for streaming reads.
+
+        Args:
+            object_name: The name of the object in the bucket
+
+        Returns:
+            Tuple of (readable response, size in bytes or None); the caller
+            closes the response
+
+        Raises:
+            S3Error: If the object cannot be found
+        """
+        response = self.client.get_object(self.bucket_name, object_name)
+        size = response.headers.get("Content-Length")
+        return response, int(size) if size is not None else None
+
+    def object_exists(self, object_name):
+        """
+        Check whether an object exists in the bucket.
+
+        Args:
+            object_name: Name of the object
+
+        Returns:
+            True if the object exists, False otherwise
+        """
+        try:
+            self.client.stat_object(self.bucket_name, object_name)
+            return True
+        except S3Error:
+            return False
+
     def delete_file(self, object_name):
         """
         Delete a file from MinIO.
@@ -0,0 +1,122 @@
+"""
+Throttled job progress reporting.
+
+Pipeline stages report fine-grained progress (separated segments, uploaded
+bytes) into a JobProgress, which maps each stage onto its share of the job's
+0-100 range and writes to the job store at most once per interval. Records
+carry the time of the last progress and an ETA, so clients can tell a slow
+job from a stuck one.
+"""
+import os
+import logging
+import threading
+import time
+
+logger = logging.getLogger("splitter.progress")
+
+# Progress settings
+PROGRESS_MIN_INTERVAL = float(os.environ.get("PROGRESS_MIN_INTERVAL", "1.0"))
+PROGRESS_STALL_SECONDS = float(os.environ.get("PROGRESS_STALL_SECONDS", "300"))
+
+
+class JobProgress:
+    """
+    Progress of one job, written to the job store with throttling.
+    """
+
+    def __init__(self, job_store, job_id, min_interval=PROGRESS_MIN_INTERVAL):
+        """
+        Initialize the progress reporter.
+
+        Args:
+            job_store: JobStore holding the job record
+            job_id: The ID of the job
+            min_interval: Minimum seconds between throttled writes
+        """
+        self.job_store = job_store
+        self.job_id = job_id
+        self.min_interval = min_interval
+
+        self.started_at = time.time()
+        self.percent = 0.0
+        self._written_percent = None
+        self._written_at = 0.0
+        self._lock = threading.Lock()
+
+    def set(self, percent, force=False, **fields):
+        """
+        Record progress, writing it to the job store unless throttled.
+
+        Progress never moves backwards. Writes carrying extra fields, or
+        with force=True, are never throttled.
+
+        Args:
+            percent: Job progress (0-100)
+            force: Write even if the last write was too recent
+            **fields: Extra fields to store with this update
+        """
+        with self._lock:
+            now = time.time()
+            self.percent = max(self.percent, min(100.0, percent))
+            rounded = round(self.percent, 1)
+
+            if not force and not fields:
+                if rounded == self._written_percent or now - self._written_at < self.min_interval:
+                    return
+
+            self._written_percent = rounded
+            self._written_at = now
+
+            elapsed = now - self.started_at
+            eta = None
+            if 0 < self.percent < 100:
+                eta = round(elapsed * (100 - self.percent) / self.percent)
+
+            self.job_store.update(
+                self.job_id,
+                progress=rounded,
+                eta_seconds=eta,
+                last_progress_at=now,
+                **fields
+            )
+
+    def stage(self, name, start, end):
+        """
+        Enter a pipeline stage covering part of the progress range.
+
+        Args:
+            name: Stage name stored in the job record
+            start: Job progress at the start of the stage
+            end: Job progress at the end of the stage
+
+        Returns:
+            Callable taking the stage's completed fraction (0-1)
+        """
+        self.set(start, stage=name)
+
+        def report(fraction):
+            try:
+                self.set(start + (end - start) * min(max(fraction, 0.0), 1.0))
+            except Exception as e:
+                logger.error(f"Error reporting progress for job {self.job_id}: {str(e)}")
+
+        return report
+
+
+def is_stalled(job, now=None):
+    """
+    Check whether an active job has not made progress for too long.
+
+    Args:
+        job: Job record
+        now: Current timestamp (default: time.time())
+
+    Returns:
+        True if the job is processing but has been silent for
+        PROGRESS_STALL_SECONDS
+    """
+    if job.get("status") != "processing":
+        return False
+
+    last = job.get("last_progress_at") or job.get("updated_at") or job.get("created_at")
+    return (now or time.time()) - last > PROGRESS_STALL_SECONDS
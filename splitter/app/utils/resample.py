@@ -0,0 +1,182 @@
+"""
+Polyphase sample-rate conversion for the splitter service.
+
+Converts between rates with a rational factor up/down using a Kaiser-windowed
+sinc low-pass filter split into `up` phases. The resampler is stateful, so a
+file can be streamed through it block by block with bounded memory. Filter
+kernels are cached per rate pair.
+"""
+import os
+from functools import lru_cache
+from math import gcd, ceil
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+# Filter settings
+RESAMPLE_HALF_TAPS = int(os.environ.get("RESAMPLE_HALF_TAPS", "32"))
+RESAMPLE_ROLLOFF = 0.945
+RESAMPLE_KAISER_BETA = 8.6
+
+# Outputs computed per vectorized step, bounds the working set
+_OUTPUT_CHUNK = 1 << 16
+
+
+@lru_cache(maxsize=32)
+def polyphase_filter(up, down, half_taps=RESAMPLE_HALF_TAPS):
+    """
+    Design the anti-aliasing filter for an up/down conversion.
+
+    Args:
+        up: Upsampling factor
+        down: Downsampling factor
+        half_taps: Zero crossings of the sinc on each side of the center
+
+    Returns:
+        Tuple of (phases, center) where phases is an (up, taps) float32 array
+        with phases[p, t] = h[p + t * up], and center is the filter delay in
+        upsampled samples
+    """
+    # Cutoff at the lower of the two Nyquist rates, in cycles per upsampled sample
+    cutoff = 0.5 * RESAMPLE_ROLLOFF / max(up, down)
+
+    center = int(ceil(half_taps / (2 * cutoff)))
+    k = np.arange(2 * center + 1, dtype=np.float64) - center
+    h = 2 * cutoff * np.sinc(2 * cutoff * k) * np.kaiser(len(k), RESAMPLE_KAISER_BETA)
+
+    # Compensate for the zeros inserted by upsampling
+    h *= up
+
+    taps = int(ceil(len(h) / up))
+    h = np.pad(h, (0, taps * up - len(h)))
+    phases = h.reshape(taps, up).T.astype(np.float32)
+    phases.setflags(write=False)
+    return phases, center
+
+
+class PolyphaseResampler:
+    """
+    Streaming polyphase resampler for (frames, channels) float32 blocks.
+    """
+
+    def __init__(self, from_rate, to_rate, channels):
+        """
+        Initialize the resampler.
+
+        Args:
+            from_rate: Input sample rate
+            to_rate: Output sample rate
+            channels: Number of channels
+        """
+        factor = gcd(int(from_rate), int(to_rate))
+        self.up = int(to_rate) // factor
+        self.down = int(from_rate) // factor
+        self.channels = channels
+
+        phases, self.center = polyphase_filter(self.up, self.down)
+        self.taps = phases.shape[1]
+        # Reversed so a forward window over the input lines up with the taps
+        self._phases = np.ascontiguousarray(phases[:, ::-1])
+
+        # Input history, starting with zeros before the first sample
+        self._buffer = np.zeros((self.taps - 1, channels), dtype=np.float32)
+        self._buffer_start = -(self.taps - 1)  # Input index of _buffer[0]
+        self._consumed = 0  # Input frames received
+        self._produced = 0  # Output frames emitted
+
+    def process(self, block):
+        """
+        Feed a block of input and get the output that can be computed so far.
+
+        Args:
+            block: (frames, channels) float32 array
+
+        Returns:
+            (frames, channels) float32 array at the output rate
+        """
+        self._append(block)
+        self._consumed += len(block)
+
+        # Output n needs input up to (n * down + center) // up
+        available = (self._consumed * self.up - 1 - self.center) // self.down + 1
+        return self._emit(max(self._produced, available))
+
+    def flush(self):
+        """
+        Emit the remaining output once the input has ended.
+
+        Returns:
+            (frames, channels) float32 array at the output rate
+        """
+        total = -(-self._consumed * self.up // self.down)
+        padding = self.center // self.up + 2
+        self._append(np.zeros((padding, self.channels), dtype=np.float32))
+        return self._emit(total)
+
+    def _append(self, block):
+        """
+        Append input frames to the history buffer.
+        """
+        self._buffer = np.concatenate([self._buffer, np.asarray(block, dtype=np.float32)])
+
+    def _emit(self, end):
+        """
+        Compute outputs [_produced, end) and drop history no longer needed.
+        """
+        outputs = []
+        while self._produced < end:
+            stop = min(end, self._produced + _OUTPUT_CHUNK)
+            outputs.append(self._compute(self._produced, stop))
+            self._produced = stop
+
+        # Keep the input the next output still needs
+        first_needed = (self._produced * self.down + self.center) // self.up - (self.taps - 1)
+        drop = first_needed - self._buffer_start
+        if drop > 0:
+            self._buffer = self._buffer[drop:]
+            self._buffer_start += drop
+
+        if not outputs:
+            return np.zeros((0, self.channels), dtype=np.float32)
+        return np.concatenate(outputs) if len(outputs) > 1 else outputs[0]
+
+    def _compute(self, start, stop):
+        """
+        Compute outputs [start, stop), vectorized per filter phase.
+        """
+        out = np.empty((stop - start, self.channels), dtype=np.float32)
+
+        # windows[i] is buffer[i:i + taps], shape (frames, channels, taps)
+        windows = sliding_window_view(self._buffer, self.taps, axis=0)
+
+        # Outputs n and n + up use the same phase and inputs `down` apart
+        for offset in range(min(self.up, stop - start)):
+            n = start + offset
+            m = n * self.down + self.center
+            phase = m % self.up
+            first = m // self.up - (self.taps - 1) - self._buffer_start
+            count = len(range(offset, stop - start, self.up))
+
+            selected = windows[first:first + count * self.down:self.down]
+            out[offset::self.up] = selected @ self._phases[phase]
+
+        return out
+
+
+def resample(data, from_rate, to_rate):
+    """
+    Resample a whole (frames, channels) array.
+
+    Args:
+        data: (frames, channels) float32 array
+        from_rate: Input sample rate
+        to_rate: Output sample rate
+
+    Returns:
+        Resampled (frames, channels) float32 array
+    """
+    if from_rate == to_rate:
+        return data
+
+    resampler = PolyphaseResampler(from_rate, to_rate, data.shape[1])
+    return np.concatenate([resampler.process(data), resampler.flush()])
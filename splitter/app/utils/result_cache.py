@@ -0,0 +1,212 @@
+"""
+Content-addressed cache of separation results.
+
+Results are keyed on a hash of the decoded input audio together with the
+separation settings, and point at stem objects that already exist in MinIO.
+Concurrent requests for the same key are coalesced so only one separation runs.
+"""
+import os
+import json
+import hashlib
+import logging
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+
+import soundfile as sf
+
+logger = logging.getLogger("splitter.cache")
+
+# Cache settings
+RESULT_CACHE_ENABLED = os.environ.get("RESULT_CACHE_ENABLED", "true").lower() == "true"
+RESULT_CACHE_MAX_ENTRIES = int(os.environ.get("RESULT_CACHE_MAX_ENTRIES", "1000"))
+RESULT_CACHE_MAX_BYTES = int(os.environ.get("RESULT_CACHE_MAX_BYTES", str(50 * 1024 ** 3)))
+
+# Runner settings that change the separation output
+CACHE_KEY_SETTINGS = ("model_name", "shifts", "split", "overlap", "stems", "float32", "formats", "package_zip")
+
+
+def compute_cache_key(input_file, settings, scope="", block_frames=65536):
+    """
+    Hash decoded audio samples together with the separation settings.
+
+    Hashing the decoded samples (not the file bytes) makes the key independent
+    of container metadata such as tags.
+
+    Args:
+        input_file: Path to the input audio file
+        settings: Runner settings (see HTDemucsRunner.settings)
+        scope: Storage scope (endpoint and bucket) the stems live in
+        block_frames: Frames decoded per block
+
+    Returns:
+        Hex digest identifying the separation result
+    """
+    digest = hashlib.sha256()
+
+    info = sf.info(input_file)
+    digest.update(f"{info.samplerate}:{info.channels}".encode())
+
+    for block in sf.blocks(input_file, blocksize=block_frames, dtype="float32", always_2d=True):
+        digest.update(block.tobytes())
+
+    params = {name: settings.get(name) for name in CACHE_KEY_SETTINGS}
+    digest.update(json.dumps(params, sort_keys=True).encode())
+    digest.update(scope.encode())
+
+    return digest.hexdigest()
+
+
+class SeparationCache:
+    """
+    LRU, size-bounded cache mapping content keys to uploaded stem outputs.
+    """
+
+    def __init__(self, max_entries=RESULT_CACHE_MAX_ENTRIES, max_bytes=RESULT_CACHE_MAX_BYTES):
+        """
+        Initialize the cache.
+
+        Args:
+            max_entries: Maximum number of cached results
+            max_bytes: Maximum total size of the stems referenced by the cache
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+
+        self._entries = OrderedDict()  # key -> {"stems", "bytes", "created_at"}
+        self._inflight = {}  # key -> Future
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+
+        self._hits = 0
+        self._misses = 0
+        self._coalesced = 0
+        self._evictions = 0
+        self._bytes_saved = 0
+
+    def get_or_compute(self, key, compute, validate=None):
+        """
+        Return a cached result or compute it, coalescing concurrent callers.
+
+        Args:
+            key: Cache key from compute_cache_key
+            compute: Callable returning (stems, size_in_bytes) on a miss
+            validate: Optional callable checking a cached stems list is still usable
+
+        Returns:
+            Tuple of (stems, cached) where cached is True if no separation ran
+        """
+        while True:
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None:
+                    self._entries.move_to_end(key)
+
+                inflight = self._inflight.get(key)
+                if entry is None and inflight is None:
+                    # This caller becomes the leader for the key
+                    future = Future()
+                    self._inflight[key] = future
+                    self._misses += 1
+                    break
+
+            if entry is not None:
+                if validate is None or validate(entry["stems"]):
+                    with self._lock:
+                        self._hits += 1
+                        self._bytes_saved += entry["bytes"]
+                    logger.info(f"Separation cache hit for {key[:12]}")
+                    return entry["stems"], True
+
+                # Stems are gone from storage, forget the entry and recompute
+                self._remove(key)
+                continue
+
+            # Another job is computing the same key, wait for it
+            with self._lock:
+                self._coalesced += 1
+            try:
+                stems, size = inflight.result()
+            except Exception:
+                # The leader failed, try again (possibly as the new leader)
+                continue
+
+            with self._lock:
+                self._bytes_saved += size
+            logger.info(f"Coalesced separation for {key[:12]}")
+            return stems, True
+
+        try:
+            stems, size = compute()
+        except Exception as e:
+            with self._lock:
+                del self._inflight[key]
+            future.set_exception(e)
+            raise
+
+        with self._lock:
+            self._entries[key] = {"stems": stems, "bytes": size, "created_at": time.time()}
+            self._total_bytes += size
+            del self._inflight[key]
+            self._evict()
+
+        future.set_result((stems, size))
+        return stems, False
+
+    def stats(self):
+        """
+        Get cache effectiveness figures.
+
+        Returns:
+            Dictionary with hit ratio, bytes saved and occupancy
+        """
+        with self._lock:
+            lookups = self._hits + self._misses + self._coalesced
+            return {
+                "entries": len(self._entries),
+                "bytes": self._total_bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "hits": self._hits,
+                "misses": self._misses,
+                "coalesced": self._coalesced,
+                "evictions": self._evictions,
+                "hit_ratio": round((self._hits + self._coalesced) / lookups, 4) if lookups else 0.0,
+                "bytes_saved": self._bytes_saved
+            }
+
+    def _remove(self, key):
+        """
+        Drop an entry from the cache.
+        """
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is not None:
+                self._total_bytes -= entry["bytes"]
+
+    def _evict(self):
+        """
+        Evict least recently used entries until the cache is within bounds.
+        Must be called with the lock held.
+        """
+        while self._entries and (
+                len(self._entries) > self.max_entries or self._total_bytes > self.max_bytes
+        ):
+            _, entry = self._entries.popitem(last=False)
+            self._total_bytes -= entry["bytes"]
+            self._evictions += 1
+
+
+# Process-wide cache instance
+_cache = None
+
+
+def get_result_cache():
+    """
+    Get the process-wide separation cache, or None if caching is disabled.
+    """
+    global _cache
+    if _cache is None and RESULT_CACHE_ENABLED:
+        _cache = SeparationCache()
+    return _cache
@@ -0,0 +1,63 @@
+"""
+Queue wait of small tenants behind a bulk submission.
+
+One tenant submits an album of --album jobs at once, then --small other
+tenants submit one job each at steady intervals. Jobs sleep for --job-seconds
+on the executor's workers. Reports how long the small tenants' jobs waited
+for a worker with a single FIFO (every job under one tenant) and with the
+fair queue (one tenant per license).
+
+Usage (from the splitter directory):
+    python -m benchmarks.fair_scheduling --album 20 --small 5 --job-seconds 0.2
+"""
+import argparse
+import threading
+import time
+
+from app.utils.job_executor import JobExecutor
+
+
+def run(args, fair):
+    executor = JobExecutor(num_workers=args.workers, max_queue=args.album + args.small)
+    executor.start()
+
+    waits = {}
+    done = threading.Semaphore(0)
+
+    def job(name, submitted):
+        waits[name] = time.perf_counter() - submitted
+        time.sleep(args.job_seconds)
+        done.release()
+
+    for index in range(args.album):
+        executor.submit(job, f"album-{index}", time.perf_counter(), tenant="album" if fair else None)
+
+    for index in range(args.small):
+        time.sleep(args.job_seconds / 2)
+        executor.submit(job, f"small-{index}", time.perf_counter(), tenant=f"small-{index}" if fair else None)
+
+    for _ in range(args.album + args.small):
+        done.acquire()
+    executor.stop()
+
+    small = sorted(wait for name, wait in waits.items() if name.startswith("small"))
+    album = [wait for name, wait in waits.items() if name.startswith("album")]
+    return small, max(album)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--album", type=int, default=20)
+    parser.add_argument("--small", type=int, default=5)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--job-seconds", type=float, default=0.2)
+    args = parser.parse_args()
+
+    for name, fair in (("fifo", False), ("fair", True)):
+        small, album_max = run(args, fair)
+        print(f"{name:<5} small tenants wait: median {small[len(small) // 2]:6.2f}s  max {small[-1]:6.2f}s   "
+              f"album last job wait {album_max:6.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""
+Throughput of the polyphase resampler, as a realtime factor.
+
+Streams a synthetic stereo signal through PolyphaseResampler in blocks and
+reports how many seconds of audio are converted to 44.1kHz per second of
+wall time. The first (cold) run includes filter design; later runs hit the
+kernel cache.
+
+Usage (from the splitter directory):
+    python -m benchmarks.resample_throughput --seconds 300
+"""
+import argparse
+import time
+
+import numpy as np
+
+from app.utils.resample import PolyphaseResampler, polyphase_filter
+
+TARGET_RATE = 44100
+
+
+def run(from_rate, seconds, block_frames):
+    """
+    Resample `seconds` of noise from from_rate to 44.1kHz.
+
+    Returns:
+        Wall time in seconds
+    """
+    rng = np.random.default_rng(0)
+    block = (rng.standard_normal((block_frames, 2)) * 0.1).astype(np.float32)
+    blocks = int(seconds * from_rate / block_frames)
+
+    started = time.perf_counter()
+    resampler = PolyphaseResampler(from_rate, TARGET_RATE, 2)
+    for _ in range(blocks):
+        resampler.process(block)
+    resampler.flush()
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rates", type=int, nargs="+", default=[48000, 96000, 22050])
+    parser.add_argument("--seconds", type=float, default=300)
+    parser.add_argument("--block-frames", type=int, default=262144)
+    args = parser.parse_args()
+
+    print(f"{'input rate':>10} {'taps':>6} {'cold RTF':>9} {'warm RTF':>9}")
+    for from_rate in args.rates:
+        polyphase_filter.cache_clear()
+        cold = run(from_rate, args.seconds, args.block_frames)
+        warm = run(from_rate, args.seconds, args.block_frames)
+
+        resampler = PolyphaseResampler(from_rate, TARGET_RATE, 2)
+        print(f"{from_rate:>10} {resampler.taps:>6} {args.seconds / cold:>8.0f}x {args.seconds / warm:>8.0f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""
+Segment throughput of the separation engine with cross-task batching.
+
+Runs --concurrency tasks at once through the engine worker's code path
+(SegmentBatcher + apply_model) in this process, once with batches of one
+segment and once with --max-batch, and reports aggregate segments/second.
+Each task separates --seconds of noise.
+
+The default --model stub is a small convolutional network with the shape of
+a Demucs model, so the benchmark runs without downloading weights. Pass
+--model htdemucs to measure the real model, with --random-weights to use its
+architecture without downloading the pretrained weights.
+
+Usage (from the splitter directory):
+    python -m benchmarks.segment_batching --concurrency 1,2,4 --max-batch 4 --seconds 30
+"""
+import argparse
+import threading
+import time
+
+import numpy as np
+
+from app.models.model_registry import ModelRegistry
+from app.models.segment_batcher import SegmentBatcher
+from app.models.separation_engine import _count_segments, _load_model, _separate_array
+
+SAMPLERATE = 44100
+
+
+def stub_model(width):
+    import torch
+    from torch import nn
+
+    class StubSeparator(nn.Module):
+        samplerate = SAMPLERATE
+        audio_channels = 2
+        sources = ["drums", "bass", "other", "vocals"]
+        segment = 7.8
+
+        def __init__(self):
+            super().__init__()
+            self.net = nn.Sequential(
+                nn.Conv1d(2, width, 8, stride=4, padding=2),
+                nn.GELU(),
+                nn.Conv1d(width, width, 5, padding=2),
+                nn.GELU(),
+                nn.ConvTranspose1d(width, len(self.sources) * 2, 8, stride=4, padding=2)
+            )
+
+        def valid_length(self, length):
+            # Pad every segment to the training length, like HTDemucs
+            return max(length, int(self.segment * self.samplerate))
+
+        def forward(self, mix):
+            batch, channels, length = mix.shape
+            out = self.net(mix)[..., :length]
+            return out.reshape(batch, len(self.sources), channels, length)
+
+    torch.manual_seed(0)
+    return StubSeparator().eval()
+
+
+def run(models, task, concurrency, max_batch):
+    batcher = SegmentBatcher(max_batch=max_batch, max_wait_ms=20).start()
+    audio = np.random.default_rng(0).standard_normal((2, int(task["seconds"] * SAMPLERATE))).astype(np.float32) * 0.1
+
+    def separate():
+        _separate_array(models, {**task, "audio": audio, "samplerate": SAMPLERATE}, None, batcher)
+
+    threads = [threading.Thread(target=separate) for _ in range(concurrency)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall = time.perf_counter() - start
+
+    batcher.stop()
+    return wall, batcher.segments, batcher.batches
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default="stub")
+    parser.add_argument("--width", type=int, default=48, help="Channels of the stub model")
+    parser.add_argument("--random-weights", action="store_true", help="Untrained HTDemucs, no download")
+    parser.add_argument("--threads", type=int, default=0, help="torch threads (default: all cores)")
+    parser.add_argument("--concurrency", default="1,2,4")
+    parser.add_argument("--max-batch", type=int, default=4)
+    parser.add_argument("--seconds", type=float, default=30)
+    args = parser.parse_args()
+
+    task = {
+        "model_name": args.model,
+        "device": "cpu",
+        "shifts": 0,
+        "split": True,
+        "overlap": 0.25,
+        "seconds": args.seconds
+    }
+    if args.threads:
+        import torch
+        torch.set_num_threads(args.threads)
+
+    if args.model == "stub":
+        model = stub_model(args.width)
+    elif args.random_weights:
+        from demucs.htdemucs import HTDemucs
+        model = HTDemucs(sources=["drums", "bass", "other", "vocals"], segment=7.8).eval()
+    else:
+        model = _load_model(args.model, "cpu")
+    models = ModelRegistry()
+    models.put((args.model, "cpu", None), model)
+
+    segments = _count_segments(model, int(args.seconds * SAMPLERATE), 0, True, 0.25)
+    print(f"{args.model}: {segments} segments per task")
+
+    # Warm up allocator and kernels
+    run(models, {**task, "seconds": 10}, 1, args.max_batch)
+
+    for concurrency in (int(c) for c in args.concurrency.split(",")):
+        for max_batch in sorted({1, args.max_batch}):
+            wall, segments, batches = run(models, task, concurrency, max_batch)
+            print(f"concurrency {concurrency:2d}  max batch {max_batch:2d}  "
+                  f"{segments / wall:6.2f} segments/s  mean batch {segments / batches:4.1f}  wall {wall:6.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+Single-track latency of segment-parallel separation.
+
+Separates one --seconds track with HTDemucsRunner.separate_parallel, cutting
+it into 1, 2, 4, ... windows (--windows) that run on a pool of worker
+processes, one per window, each pinned to --threads torch threads (default:
+cores / workers). Reports wall time and speedup over one window, and the
+largest difference between the windowed and the single-window result.
+
+The workers run the engine's array task (`_separate_array`) on a model built
+in the worker, so the benchmark runs without the engine and without
+downloading weights: --model stub is the small convolutional network of
+benchmarks.segment_batching, --model htdemucs an untrained HTDemucs. Both are
+seeded, so every worker holds the same model.
+
+Usage (from the splitter directory):
+    python -m benchmarks.segment_parallel --windows 1,2,4 --seconds 120
+"""
+import argparse
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from app.models.demucs_runner import HTDemucsRunner, MODEL_SAMPLERATE
+from app.models.model_registry import ModelRegistry
+from app.models.separation_engine import _separate_array
+
+_models = ModelRegistry()
+
+
+def _init_worker(model_name, width, threads):
+    import torch
+    torch.set_num_threads(threads)
+    torch.manual_seed(0)
+    # Shift offsets drawn in a worker match those drawn in the parent
+    random.seed(0)
+
+    if model_name == "stub":
+        from benchmarks.segment_batching import stub_model
+        model = stub_model(width)
+    else:
+        from demucs.htdemucs import HTDemucs
+        model = HTDemucs(sources=["drums", "bass", "other", "vocals"], segment=7.8).eval()
+    _models.put((model_name, "cpu", None), model)
+
+
+def _separate(task):
+    return _separate_array(_models, task)
+
+
+class PoolEngine:
+    """
+    The part of SeparationEngine that separate_parallel uses, on a process pool.
+    """
+
+    def __init__(self, model_name, workers, width, threads):
+        self.model_name = model_name
+        self.num_workers = workers
+        self.pool = ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(model_name, width, threads))
+        # Load the models before timing
+        list(self.pool.map(time.sleep, [0.5] * workers))
+
+    def submit(self, task, progress_callback=None):
+        return self.pool.submit(_separate, {**task, "model_name": self.model_name, "device": "cpu"})
+
+    def cancel(self, future):
+        return future.cancel()
+
+    def shutdown(self):
+        self.pool.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default="stub", choices=["stub", "htdemucs"])
+    parser.add_argument("--width", type=int, default=48, help="Channels of the stub model")
+    parser.add_argument("--windows", default="1,2,4")
+    parser.add_argument("--threads", type=int, default=0, help="torch threads per worker (default: cores / workers)")
+    parser.add_argument("--seconds", type=float, default=120)
+    args = parser.parse_args()
+
+    # Windows are never shorter than SEPARATION_MIN_WINDOW_SECONDS
+    import app.models.demucs_runner as demucs_runner
+    demucs_runner.SEPARATION_MIN_WINDOW_SECONDS = min(demucs_runner.SEPARATION_MIN_WINDOW_SECONDS, args.seconds / 8)
+
+    audio = np.random.default_rng(0).standard_normal((2, int(args.seconds * MODEL_SAMPLERATE))).astype(np.float32) * 0.1
+    runner = HTDemucsRunner(model_name=args.model, device="cpu", shifts=0, use_engine=False)
+    cores = os.cpu_count() or 1
+    print(f"{args.model}: {args.seconds:.0f}s track, {cores} core(s)")
+
+    baseline = None
+    reference = None
+    for windows in (int(w) for w in args.windows.split(",")):
+        threads = args.threads or max(1, cores // windows)
+        engine = PoolEngine(args.model, windows, args.width, threads)
+        try:
+            start = time.perf_counter()
+            stems = runner.separate_parallel(engine, audio, MODEL_SAMPLERATE, max_windows=windows)
+            wall = time.perf_counter() - start
+        finally:
+            engine.shutdown()
+
+        baseline = baseline or wall
+        reference = reference or stems
+        difference = max(np.abs(stems[name] - reference[name]).max() for name in stems)
+        print(f"windows {windows:2d}  threads/worker {threads:2d}  wall {wall:7.2f}s  "
+              f"speedup {baseline / wall:4.2f}x  max diff {difference:.2e}")
+
+
+if __name__ == "__main__":
+    main()
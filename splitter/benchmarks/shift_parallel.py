@@ -0,0 +1,68 @@
+"""
+Single-track latency of random-shift passes run in parallel.
+
+Separates one --seconds track three ways on a pool of worker processes that
+run the engine's array task:
+
+- shifts=1 on one worker (the latency to approach)
+- shifts=--shifts on one worker, passes one after another
+- shifts=--shifts with every pass a task of its own on --shifts workers,
+  averaged by HTDemucsRunner.separate_parallel
+
+Each worker is pinned to cores / workers torch threads. Offsets are drawn
+from the same seed in both --shifts runs, so their results should match.
+Models are built in the workers as in benchmarks.segment_parallel (--model
+stub or an untrained --model htdemucs), no weights are downloaded.
+
+Usage (from the splitter directory):
+    python -m benchmarks.shift_parallel --shifts 5 --seconds 60
+"""
+import argparse
+import os
+import random
+import time
+
+import numpy as np
+
+from app.models.demucs_runner import HTDemucsRunner, MODEL_SAMPLERATE
+from benchmarks.segment_parallel import PoolEngine
+
+
+def run(model_name, width, audio, shifts, workers, parallel):
+    cores = os.cpu_count() or 1
+    engine = PoolEngine(model_name, workers, width, max(1, cores // workers))
+    runner = HTDemucsRunner(model_name=model_name, device="cpu", shifts=shifts, use_engine=False)
+    try:
+        random.seed(0)
+        start = time.perf_counter()
+        stems = runner.separate_parallel(engine, audio, MODEL_SAMPLERATE, shift_passes=parallel)
+        return time.perf_counter() - start, stems
+    finally:
+        engine.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default="stub", choices=["stub", "htdemucs"])
+    parser.add_argument("--width", type=int, default=48, help="Channels of the stub model")
+    parser.add_argument("--shifts", type=int, default=5)
+    parser.add_argument("--seconds", type=float, default=60)
+    args = parser.parse_args()
+
+    audio = np.random.default_rng(0).standard_normal((2, int(args.seconds * MODEL_SAMPLERATE))).astype(np.float32) * 0.1
+    print(f"{args.model}: {args.seconds:.0f}s track, {os.cpu_count() or 1} core(s)")
+
+    single, _ = run(args.model, args.width, audio, 1, 1, False)
+    print(f"shifts 1            1 worker   wall {single:7.2f}s")
+
+    sequential, reference = run(args.model, args.width, audio, args.shifts, 1, False)
+    print(f"shifts {args.shifts} sequential 1 worker   wall {sequential:7.2f}s  {sequential / single:4.2f}x shifts=1")
+
+    parallel, stems = run(args.model, args.width, audio, args.shifts, args.shifts, True)
+    difference = max(np.abs(stems[name] - reference[name]).max() for name in stems)
+    print(f"shifts {args.shifts} parallel   {args.shifts} workers  wall {parallel:7.2f}s  "
+          f"{parallel / single:4.2f}x shifts=1  max diff {difference:.2e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""
+Peak memory of the in-memory and streaming stem pipelines.
+
+Generates a synthetic input of the requested length, runs it through
+StemsProcessor in a fresh process per measurement and reports the peak RSS of
+that process (ru_maxrss) together with the peak of its children, which
+includes the separation engine workers when a real model is used.
+
+Usage (from the splitter directory):
+    python -m benchmarks.streaming_memory --minutes 10 60 180 --mode streaming --stub
+"""
+import os
+import sys
+import argparse
+import resource
+import subprocess
+import tempfile
+import time
+
+import numpy as np
+import soundfile as sf
+
+SAMPLERATE = 44100
+
+
+class PassThroughRunner:
+    """
+    Stand-in for HTDemucsRunner that splits the mix into four scaled copies.
+    Measures the pipeline itself without the model.
+    """
+
+    def separate_array(self, audio, samplerate, progress_callback=None):
+        return {
+            stem_name: (audio * weight).astype(np.float32)
+            for stem_name, weight in [("drums", 0.1), ("bass", 0.2), ("vocals", 0.3), ("other", 0.4)]
+        }
+
+
+def make_input(path, minutes, block_seconds=60):
+    """
+    Write a stereo 16-bit noise file of the given length, block by block.
+    """
+    rng = np.random.default_rng(0)
+    remaining = int(minutes * 60 * SAMPLERATE)
+    with sf.SoundFile(path, "w", samplerate=SAMPLERATE, channels=2, subtype="PCM_16") as f:
+        while remaining > 0:
+            frames = min(remaining, block_seconds * SAMPLERATE)
+            f.write((rng.standard_normal((frames, 2)) * 0.1).astype(np.float32))
+            remaining -= frames
+
+
+def run_case(input_file, mode, stub):
+    """
+    Process one input and print peak RSS figures (single measurement process).
+    """
+    from app.models.stems_processor import StemsProcessor
+
+    if stub:
+        runner = PassThroughRunner()
+    else:
+        from app.models.demucs_runner import HTDemucsRunner
+        from app.models.separation_engine import start_engine
+        start_engine(num_workers=1)
+        runner = HTDemucsRunner(device="cpu")
+
+    output_dir = tempfile.mkdtemp(prefix="bench_out_")
+    processor = StemsProcessor(output_dir=output_dir)
+
+    started = time.time()
+    if mode == "streaming":
+        result = processor.process_streaming(input_file, runner, output_prefix="bench")
+    else:
+        result = processor.process_in_memory(input_file, runner, output_prefix="bench")
+    elapsed = time.time() - started
+
+    if not result:
+        raise SystemExit("processing failed")
+
+    for path in result["stems"].values():
+        os.remove(path)
+
+    self_peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    child_peak = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024
+    print(f"{self_peak:.0f} {child_peak:.0f} {elapsed:.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--minutes", type=float, nargs="+", default=[10, 60, 180])
+    parser.add_argument("--mode", choices=["streaming", "memory"], default="streaming")
+    parser.add_argument("--stub", action="store_true", help="use a pass-through separator instead of HTDemucs")
+    parser.add_argument("--run", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run:
+        run_case(args.run, args.mode, args.stub)
+        return
+
+    scratch = tempfile.mkdtemp(prefix="bench_in_")
+    print(f"mode={args.mode} separator={'pass-through' if args.stub else 'htdemucs'}")
+    print(f"{'minutes':>8} {'peak RSS (MB)':>14} {'children (MB)':>14} {'seconds':>9}")
+
+    for minutes in args.minutes:
+        input_file = os.path.join(scratch, f"input_{minutes:g}min.wav")
+        make_input(input_file, minutes)
+
+        cmd = [sys.executable, "-m", "benchmarks.streaming_memory", "--mode", args.mode, "--run", input_file]
+        if args.stub:
+            cmd.append("--stub")
+        output = subprocess.run(cmd, check=True, capture_output=True, text=True).stdout.split()
+        os.remove(input_file)
+
+        self_peak, child_peak, elapsed = output[-3:]
+        print(f"{minutes:>8g} {self_peak:>14} {child_peak:>14} {elapsed:>9}")
+
+
+if __name__ == "__main__":
+    main()
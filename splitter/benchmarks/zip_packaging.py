@@ -0,0 +1,99 @@
+"""
+CPU time and disk writes of stem packaging.
+
+Compares the original package (every entry deflated into a .zip on disk)
+with the streamed package (audio stored, metadata deflated, written into an
+in-memory pipe drained the way a MinIO multipart upload reads it).
+
+Usage (from the splitter directory):
+    python -m benchmarks.zip_packaging --seconds 240
+"""
+import argparse
+import os
+import shutil
+import tempfile
+import threading
+import time
+import zipfile
+
+import numpy as np
+import soundfile as sf
+
+from app.utils.archive import StreamPipe, write_zip
+
+STEM_NAMES = ["Drums", "Bass", "Vocals", "EE"]
+PART_SIZE = 16 * 1024 * 1024
+
+
+def make_stems(output_dir, seconds):
+    """
+    Write float32 stems of band-limited noise, like separated audio.
+    """
+    rng = np.random.default_rng(0)
+    frames = int(seconds * 44100)
+    for name in STEM_NAMES:
+        audio = np.cumsum(rng.standard_normal((frames, 2)), axis=0)
+        audio = (audio / np.abs(audio).max() * 0.5).astype(np.float32)
+        sf.write(os.path.join(output_dir, f"track_{name}.wav"), audio, 44100, subtype="FLOAT")
+
+
+def deflate_to_disk(output_dir, zip_path):
+    with zipfile.ZipFile(zip_path, "w", zipfile.ZIP_DEFLATED) as zipf:
+        for file in os.listdir(output_dir):
+            zipf.write(os.path.join(output_dir, file), file)
+    return os.path.getsize(zip_path)
+
+
+def stream_to_pipe(entries):
+    pipe = StreamPipe()
+
+    def produce():
+        write_zip(pipe, entries)
+        pipe.close()
+
+    writer = threading.Thread(target=produce)
+    writer.start()
+    size = 0
+    while True:
+        part = pipe.read(PART_SIZE)
+        size += len(part)
+        if len(part) < PART_SIZE:
+            break
+    writer.join()
+    return size
+
+
+def measure(fn, *args):
+    cpu, wall = time.process_time(), time.perf_counter()
+    result = fn(*args)
+    return result, time.process_time() - cpu, time.perf_counter() - wall
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seconds", type=float, default=240)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp()
+    try:
+        output_dir = os.path.join(workdir, "track")
+        os.makedirs(output_dir)
+        make_stems(output_dir, args.seconds)
+        entries = [(os.path.join(output_dir, f), f) for f in sorted(os.listdir(output_dir))]
+        stems_bytes = sum(os.path.getsize(path) for path, _ in entries)
+
+        size, cpu, wall = measure(deflate_to_disk, output_dir, f"{output_dir}.zip")
+        print(f"{'deflate to disk':<16} cpu {cpu:6.2f}s  wall {wall:6.2f}s  "
+              f"size {size / 1e6:7.1f} MB  disk writes {size / 1e6:7.1f} MB")
+
+        size, cpu, wall = measure(stream_to_pipe, entries)
+        print(f"{'stored, streamed':<16} cpu {cpu:6.2f}s  wall {wall:6.2f}s  "
+              f"size {size / 1e6:7.1f} MB  disk writes {0:7.1f} MB")
+
+        print(f"stems total {stems_bytes / 1e6:.1f} MB")
+    finally:
+        shutil.rmtree(workdir)
+
+
+if __name__ == "__main__":
+    main()
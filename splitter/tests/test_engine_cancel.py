@@ -0,0 +1,72 @@
+"""
+Tasks that time out on the separation engine give up their worker slot.
+
+The workers run a stub in place of _worker_main that sleeps for the task's
+"seconds" and returns its process ID, so no model is loaded.
+"""
+import os
+import threading
+import time
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+import numpy as np
+import pytest
+
+from app.models import separation_engine
+from app.models.separation_engine import SeparationEngine
+
+
+def _stub_worker(worker_id, task_queue, result_queue, *args):
+    def run(task):
+        time.sleep(task["seconds"])
+        result_queue.put(("done", task["task_id"], os.getpid()))
+
+    result_queue.put(("ready", None, worker_id))
+    while True:
+        task = task_queue.get()
+        if task is None:
+            break
+        threading.Thread(target=run, args=(task,), daemon=True).start()
+
+
+@pytest.fixture
+def engine(monkeypatch):
+    monkeypatch.setattr(separation_engine, "_worker_main", _stub_worker)
+    engine = SeparationEngine(num_workers=1, preload_models=[], worker_tasks=2)
+    engine.start()
+    yield engine
+    engine.stop(timeout=2.0)
+
+
+def test_timed_out_task_frees_its_worker(engine):
+    other = engine.submit({"seconds": 2.0})
+    started = time.time()
+    with pytest.raises(FutureTimeoutError):
+        engine.separate_array(np.zeros((2, 10), dtype=np.float32), 44100, {"seconds": 60.0}, timeout=1.0)
+
+    # The task on the same worker is requeued, and the restarted worker runs it
+    assert other.result(timeout=30.0) != os.getpid()
+    assert engine.submit({"seconds": 0.0}).result(timeout=30.0)
+    assert time.time() - started < 30.0
+
+    snapshot = engine.snapshot()
+    assert snapshot["tasks_cancelled"] == 1
+    assert snapshot["tasks_completed"] == 2
+    assert snapshot["worker_restarts"] == 1
+    assert snapshot["running_tasks"] == 0
+
+
+def test_cancel_queued_task(engine):
+    running = [engine.submit({"seconds": 1.0}) for _ in range(2)]
+    queued = engine.submit({"seconds": 60.0})
+
+    assert engine.cancel(queued)
+    assert queued.cancelled()
+    for future in running:
+        future.result(timeout=30.0)
+    assert not engine.cancel(running[0])
+
+    snapshot = engine.snapshot()
+    assert snapshot["tasks_cancelled"] == 1
+    assert snapshot["worker_restarts"] == 0
+    assert snapshot["queued_tasks"] == 0
@@ -0,0 +1,55 @@
+"""
+Counters and memory budget of the ModelRegistry.
+"""
+import threading
+import time
+
+import torch
+
+from app.models.model_registry import ModelRegistry, model_bytes
+
+
+def _model():
+    # 1024 x 256 float32 weights and 1024 biases, just over 1 MB
+    return torch.nn.Linear(256, 1024)
+
+
+def test_waiting_for_a_load_is_not_a_hit():
+    registry = ModelRegistry()
+    key = ("htdemucs", "cpu", None)
+    loading = threading.Event()
+
+    def load():
+        loading.set()
+        time.sleep(0.5)
+        return _model()
+
+    def use():
+        registry.acquire(key, load)
+        registry.release(key)
+
+    loader = threading.Thread(target=use)
+    loader.start()
+    loading.wait()
+    waiter = threading.Thread(target=use)
+    waiter.start()
+    loader.join()
+    waiter.join()
+    use()
+
+    stats = registry.snapshot()["models"]["htdemucs"]
+    assert (stats["misses"], stats["coalesced"], stats["hits"]) == (1, 1, 1)
+    assert stats["coalesced_seconds"] > 0.1
+    assert stats["hit_seconds"] < 0.1
+
+
+def test_put_stays_within_the_budget():
+    size = model_bytes(_model())
+    registry = ModelRegistry(budget_mb=1.5 * size / 1024 / 1024)
+
+    registry.put(("htdemucs", "cpu", None), _model())
+    registry.put(("htdemucs_ft", "cpu", None), _model())
+
+    snapshot = registry.snapshot()
+    assert snapshot["resident_bytes"] == size
+    assert snapshot["models"]["htdemucs"]["evictions"] == 1
@@ -0,0 +1,145 @@
+"""
+Outputs of different tracks with the same file name must not collide, even
+when the result cache serves one of them again.
+"""
+import io
+import os
+
+import numpy as np
+import pytest
+import soundfile as sf
+
+from app.models.demucs_runner import HTDemucsRunner
+from app.routes import split
+from app.utils.job_store import MemoryJobStore
+from app.utils.result_cache import SeparationCache
+
+SAMPLERATE = 44100
+
+
+class FakeMinio:
+    """
+    In-memory stand-in for MinioClient.
+    """
+
+    def __init__(self, inputs, scratch):
+        self.inputs = inputs
+        self.objects = {}
+        self.failing = set()  # basenames of files whose upload fails
+        self.scratch = scratch
+        os.makedirs(scratch)
+
+    def download_file(self, object_name, progress=None):
+        path = os.path.join(self.scratch, f"{len(os.listdir(self.scratch))}_{os.path.basename(object_name)}")
+        sf.write(path, self.inputs[object_name], SAMPLERATE, subtype="FLOAT")
+        return path
+
+    def upload_files(self, uploads, progress=None):
+        uploaded = []
+        for path, object_name in uploads:
+            if os.path.basename(path) in self.failing:
+                uploaded.append(None)
+                continue
+            with open(path, "rb") as f:
+                self.objects[object_name] = f.read()
+            uploaded.append(object_name)
+        return uploaded
+
+    def upload_stream(self, produce, object_name, content_type=None, progress=None):
+        buffer = io.BytesIO()
+        produce(buffer)
+        self.objects[object_name] = buffer.getvalue()
+        return object_name, len(buffer.getvalue())
+
+    def object_exists(self, object_name):
+        return object_name in self.objects
+
+
+class FakeRunner(HTDemucsRunner):
+    """
+    Runner whose "separation" scales the mix, so stems follow their input.
+    """
+
+    def separate_array(self, audio, samplerate, progress_callback=None):
+        return {stem: audio * gain for stem, gain in zip(["drums", "bass", "other", "vocals"], [0.1, 0.2, 0.3, 0.4])}
+
+
+MINIO_CONFIG = {"endpoint": "minio:9000", "access_key": "", "secret_key": "", "bucket_name": "stems", "secure": False}
+
+
+@pytest.fixture
+def tracks():
+    rng = np.random.default_rng(0)
+    return {
+        "user-a/song.wav": (rng.standard_normal((SAMPLERATE, 2)) * 0.1).astype(np.float32),
+        "user-b/song.wav": (rng.standard_normal((SAMPLERATE, 2)) * 0.1).astype(np.float32)
+    }
+
+
+@pytest.fixture
+def pipeline(monkeypatch, tmp_path, tracks):
+    """
+    Run jobs against a FakeMinio, a fresh cache and job store, and a
+    processing directory under tmp_path.
+
+    Returns:
+        (minio, run) where run(job_id, object_name) returns the final job record
+    """
+    minio = FakeMinio(tracks, str(tmp_path / "downloads"))
+    job_store = MemoryJobStore()
+    cache = SeparationCache()
+
+    monkeypatch.setattr(split, "PIPELINE_MODE", "memory")
+    monkeypatch.setattr(split, "PROCESSED_DIR", str(tmp_path / "processed"))
+    monkeypatch.setattr(split, "get_minio_client", lambda **kwargs: minio)
+    monkeypatch.setattr(split, "get_job_store", lambda: job_store)
+    monkeypatch.setattr(split, "get_result_cache", lambda: cache)
+    monkeypatch.setattr(split, "runner_for_quality", lambda quality, device: FakeRunner(device=device))
+
+    def run(job_id, object_name):
+        job_store.create(job_id, split.new_job_record(object_name, MINIO_CONFIG, ["wav"], None, None))
+        split.process_audio_splitting(job_id, object_name, MINIO_CONFIG, ["wav"])
+        return job_store.get(job_id)
+
+    return minio, run
+
+
+def test_same_basename_different_tracks_get_own_stems(pipeline, tracks):
+    minio, run = pipeline
+
+    def vocals(job):
+        stem = next(s for s in job["stems"] if s["stem_name"] == "vocals")
+        return sf.read(io.BytesIO(minio.objects[stem["object_name"]]), dtype="float32")[0]
+
+    job_a = run("job-a", "user-a/song.wav")
+    job_b = run("job-b", "user-b/song.wav")
+    # The first track again: served from the cache
+    job_c = run("job-c", "user-a/song.wav")
+
+    assert job_a["status"] == job_b["status"] == job_c["status"] == "completed"
+    assert job_c["cached"] is True
+    names_a = {s["object_name"] for s in job_a["stems"]}
+    names_b = {s["object_name"] for s in job_b["stems"]}
+    assert not names_a & names_b
+
+    np.testing.assert_allclose(vocals(job_b), tracks["user-b/song.wav"] * 0.4, atol=1e-6)
+    np.testing.assert_allclose(vocals(job_c), tracks["user-a/song.wav"] * 0.4, atol=1e-6)
+
+    # Local outputs are removed once they are uploaded
+    assert not os.listdir(split.PROCESSED_DIR)
+
+
+def test_failed_stem_upload_fails_the_job_and_is_not_cached(pipeline):
+    minio, run = pipeline
+    minio.failing.add("song Vocals.wav")
+
+    job = run("job-a", "user-a/song.wav")
+    assert job["status"] == "failed"
+    assert job["error"] == "Uploaded 3 of 4 stems"
+
+    # The next identical request separates again instead of getting the partial result
+    minio.failing.clear()
+    job = run("job-b", "user-a/song.wav")
+    assert job["status"] == "completed"
+    assert job["cached"] is False
+    assert "vocals" in {s["stem_name"] for s in job["stems"]}
@@ -0,0 +1,70 @@
+"""
+Parallel separation of a track as several engine tasks.
+"""
+from concurrent.futures import Future
+
+import numpy as np
+import pytest
+
+from app.models.demucs_runner import HTDemucsRunner, MODEL_SAMPLERATE
+from app.models.separation_engine import EngineError
+
+
+class FakeEngine:
+    """
+    Fails the first task it is sent and leaves the others running.
+    """
+    num_workers = 4
+
+    def __init__(self):
+        self.futures = []
+        self.cancelled = []
+
+    def submit(self, task, progress_callback=None):
+        future = Future()
+        if not self.futures:
+            future.set_exception(EngineError("Separation worker crashed"))
+        self.futures.append(future)
+        return future
+
+    def cancel(self, future):
+        self.cancelled.append(future)
+        return future.cancel()
+
+
+def test_failed_part_cancels_the_others():
+    engine = FakeEngine()
+    runner = HTDemucsRunner(shifts=4, use_engine=False)
+    audio = np.zeros((2, 10 * MODEL_SAMPLERATE), dtype=np.float32)
+
+    with pytest.raises(EngineError):
+        runner.separate_parallel(engine, audio, MODEL_SAMPLERATE, shift_passes=True)
+
+    assert len(engine.futures) == 4
+    assert engine.cancelled == engine.futures[1:]
+    assert all(future.cancelled() for future in engine.futures[1:])
+
+
+class EchoEngine:
+    """
+    Returns every part's audio as its only stem.
+    """
+    num_workers = 2
+
+    def submit(self, task, progress_callback=None):
+        future = Future()
+        future.set_result({"vocals": task["audio"]})
+        return future
+
+    def cancel(self, future):
+        return future.cancel()
+
+
+@pytest.mark.parametrize("overlap", [0.0, 0.25])
+def test_windows_add_back_up_to_the_track(overlap):
+    runner = HTDemucsRunner(overlap=overlap, use_engine=False)
+    audio = np.random.default_rng(0).standard_normal((2, 70 * MODEL_SAMPLERATE)).astype(np.float32)
+
+    stems = runner.separate_parallel(EchoEngine(), audio, MODEL_SAMPLERATE, max_windows=2)
+
+    np.testing.assert_allclose(stems["vocals"], audio, atol=1e-5)